@@ -1,58 +1,116 @@
 import streamlit as st
 import pandas as pd
-import json
+import io
 import os
-import hashlib
+from bank_service import BankService, BankError
+from bank_batch import summarize
+from account_browser import AccountBrowser
+from columnar_store import ColumnarCache
+from money import format_cents, to_cents
+from month_end import STATEMENTS_DIR, month_period, run_month_end
+from datetime import datetime, time
 
 # --- CONFIGURATION ---
-DATA_FILE = "bank_data_secure.json"
+PAGE_SIZES = [25, 50, 100, 250]
 
-# --- SECURITY ---
-def hash_pin(pin: str) -> str:
-    """Hashes a PIN using SHA-256."""
-    return hashlib.sha256(pin.encode()).hexdigest()
+# --- DATA PERSISTENCE ---
+@st.cache_resource
+def get_service() -> BankService:
+    """One bank service (journal + ledger) per process, shared by every session."""
+    return BankService()
 
-def verify_pin(stored_hash: str, provided_pin: str) -> bool:
-    """Verifies a provided PIN against a stored hash."""
-    return stored_hash == hash_pin(provided_pin)
+@st.cache_resource
+def get_columnar() -> ColumnarCache:
+    """Columnar copy of the accounts for the latest journal version, shared by every session."""
+    return ColumnarCache()
 
-# --- DATA PERSISTENCE ---
 def load_data() -> dict:
-    """Loads account data from the JSON file."""
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-    return {}
+    """Takes this session's private copy of the accounts."""
+    epoch, seq, accounts = get_service().journal.copy()
+    st.session_state.journal_pos = (epoch, seq)
+    return accounts
 
-def save_data(data: dict):
-    """Saves account data to the JSON file."""
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def sync_accounts():
+    """Pulls in what other sessions and processes have written since the last rerun."""
+    epoch, seq = st.session_state.journal_pos
+    epoch, seq, changes = get_service().journal.changes_since(epoch, seq)
+    if changes is None:
+        st.session_state.accounts = load_data()
+        st.session_state.browser = AccountBrowser(st.session_state.accounts)
+        return
+    st.session_state.journal_pos = (epoch, seq)
+    accounts, browser = st.session_state.accounts, st.session_state.browser
+    for name, record in changes.items():
+        if record is None:
+            if name in accounts:
+                del accounts[name]
+                browser.remove(name)
+        elif name in accounts:
+            accounts[name] = record
+            browser.update_balance(name, record['balance_cents'])
+        else:
+            accounts[name] = record
+            browser.add(name, record['balance_cents'])
 
 # --- INITIALIZE SESSION STATE ---
 if 'accounts' not in st.session_state:
     st.session_state.accounts = load_data()
+    st.session_state.browser = AccountBrowser(st.session_state.accounts)
+else:
+    sync_accounts()
 
 # --- UI PAGES ---
+def pick_account(label: str, key: str):
+    """Typeahead account picker: only the top matches are sent to the browser."""
+    query = st.text_input("Search account holder", key=f"{key}_search").strip()
+    matches = st.session_state.browser.names.search(query)
+    if not matches:
+        st.info("No matching accounts.")
+        return None
+    return st.selectbox(label, options=matches, key=key)
+
 def view_accounts():
-    """Displays all accounts in a table, excluding PIN hashes."""
+    """Displays one page of accounts, excluding PIN hashes."""
     st.header("👤 All Bank Accounts")
     if not st.session_state.accounts:
         st.info("No accounts found. Please create one from the sidebar.")
         return
 
-    # Convert data to a DataFrame for better display
-    accounts_data = st.session_state.accounts.values()
-    df = pd.DataFrame(accounts_data)
-    
-    # Exclude the hashed pin from the default view for security
-    df_display = df[['account_holder', 'balance']]
-    df_display = df_display.rename(columns={'account_holder': 'Account Holder', 'balance': 'Balance ($)'})
-    
+    # Sorting and filtering run on the presorted browser index
+    col1, col2, col3 = st.columns(3)
+    prefix = col1.text_input("Holder name starts with").strip()
+    sort_by = col2.selectbox("Sort by", ["Account Holder", "Balance"])
+    descending = col3.checkbox("Descending")
+
+    col4, col5, col6 = st.columns(3)
+    min_balance = col4.number_input("Min balance", value=None, format="%.2f")
+    max_balance = col5.number_input("Max balance", value=None, format="%.2f")
+    page_size = col6.selectbox("Rows per page", PAGE_SIZES, index=1)
+
+    page_no = st.session_state.get("page_no", 1)
+    holders, total = st.session_state.browser.page(
+        sort_by="balance" if sort_by == "Balance" else "name",
+        descending=descending,
+        page=page_no - 1,
+        page_size=page_size,
+        min_balance=None if min_balance is None else to_cents(min_balance),
+        max_balance=None if max_balance is None else to_cents(max_balance),
+        prefix=prefix,
+    )
+    pages = max(1, -(-total // page_size))
+    if page_no > pages:
+        # Filters shrank the result; jump back to the last page
+        st.session_state.page_no = pages
+        st.rerun()
+    st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="page_no")
+
+    # Only the rows on this page are turned into a DataFrame
+    df_display = pd.DataFrame(
+        [(name, format_cents(st.session_state.accounts[name]['balance_cents'])) for name in holders],
+        columns=['Account Holder', 'Balance ($)'],
+    )
     st.dataframe(df_display, use_container_width=True)
+    st.caption(f"{total} matching accounts")
 
 def create_account():
     """Page for creating a new bank account."""
@@ -64,19 +122,13 @@ def create_account():
         submitted = st.form_submit_button("Create Account")
 
         if submitted:
-            if not name or not pin or len(pin) != 4 or not pin.isdigit():
-                st.error("Please fill all fields correctly (PIN must be 4 digits).")
-            elif name in st.session_state.accounts:
-                st.error(f"Account for '{name}' already exists!")
+            try:
+                get_service().create_account(name, pin, balance)
+            except BankError as e:
+                st.error(str(e))
             else:
-                hashed_pin = hash_pin(pin)
-                st.session_state.accounts[name] = {
-                    "account_holder": name, 
-                    "pin_hash": hashed_pin, 
-                    "balance": balance
-                }
-                save_data(st.session_state.accounts)
                 st.success(f"Account for '{name}' created successfully!")
+            sync_accounts()
 
 def update_account():
     """Page for updating an existing account (transactions or PIN change)."""
@@ -85,7 +137,7 @@ def update_account():
         st.info("No accounts to update.")
         return
 
-    account_to_update = st.selectbox("Select Account", options=list(st.session_state.accounts.keys()))
+    account_to_update = pick_account("Select Account", "update_pick")
     
     if account_to_update:
         st.subheader(f"Managing Account: {account_to_update}")
@@ -99,20 +151,18 @@ def update_account():
             transact_submitted = st.form_submit_button("Perform Transaction")
 
             if transact_submitted:
-                account_data = st.session_state.accounts[account_to_update]
-                if verify_pin(account_data['pin_hash'], pin):
+                # Applied to the latest stored balance, so concurrent tellers
+                # never overwrite each other.
+                try:
                     if transaction_type == "Deposit":
-                        account_data['balance'] += amount
-                        st.success(f"Deposited ${amount:.2f}. New balance: ${account_data['balance']:.2f}")
+                        account_data = get_service().deposit(account_to_update, pin, amount)
+                        st.success(f"Deposited ${amount:.2f}. New balance: ${format_cents(account_data['balance_cents'])}")
                     elif transaction_type == "Withdraw":
-                        if account_data['balance'] >= amount:
-                            account_data['balance'] -= amount
-                            st.success(f"Withdrew ${amount:.2f}. New balance: ${account_data['balance']:.2f}")
-                        else:
-                            st.error("Insufficient funds.")
-                    save_data(st.session_state.accounts)
-                else:
-                    st.error("Invalid PIN.")
+                        account_data = get_service().withdraw(account_to_update, pin, amount)
+                        st.success(f"Withdrew ${amount:.2f}. New balance: ${format_cents(account_data['balance_cents'])}")
+                except BankError as e:
+                    st.error(str(e))
+                sync_accounts()
 
         # --- PIN Update ---
         st.markdown("---")
@@ -123,16 +173,13 @@ def update_account():
             pin_submitted = st.form_submit_button("Update PIN")
 
             if pin_submitted:
-                account_data = st.session_state.accounts[account_to_update]
-                if verify_pin(account_data['pin_hash'], current_pin):
-                    if len(new_pin) == 4 and new_pin.isdigit():
-                        account_data['pin_hash'] = hash_pin(new_pin)
-                        save_data(st.session_state.accounts)
-                        st.success("PIN updated successfully!")
-                    else:
-                        st.error("New PIN must be 4 digits.")
+                try:
+                    get_service().change_pin(account_to_update, current_pin, new_pin)
+                except BankError as e:
+                    st.error(str(e))
                 else:
-                    st.error("Invalid current PIN.")
+                    st.success("PIN updated successfully!")
+                sync_accounts()
 
 
 def delete_account():
@@ -142,7 +189,7 @@ def delete_account():
         st.info("No accounts to delete.")
         return
         
-    account_to_delete = st.selectbox("Select Account to Delete", options=list(st.session_state.accounts.keys()))
+    account_to_delete = pick_account("Select Account to Delete", "delete_pick")
     
     if account_to_delete:
         st.warning(f"**Warning:** You are about to permanently delete the account for **{account_to_delete}**.")
@@ -150,18 +197,122 @@ def delete_account():
         
         if st.button("Confirm Deletion"):
             if pin:
-                account_data = st.session_state.accounts[account_to_delete]
-                if verify_pin(account_data['pin_hash'], pin):
-                    del st.session_state.accounts[account_to_delete]
-                    save_data(st.session_state.accounts)
+                try:
+                    get_service().delete_account(account_to_delete, pin)
+                except BankError as e:
+                    st.error(str(e))
+                else:
+                    sync_accounts()
                     st.success(f"Account '{account_to_delete}' has been deleted.")
                     # Use st.experimental_rerun() to refresh the page state after deletion
                     st.experimental_rerun()
-                else:
-                    st.error("Invalid PIN.")
             else:
                 st.error("Please enter the PIN to confirm.")
 
+def batch_transactions():
+    """Page for applying a CSV/JSONL file of deposits and withdrawals in one pass."""
+    st.header("📄 Batch Transactions")
+    st.write("Upload a CSV with an `account_holder,type,amount` header, or a JSONL file with the same keys.")
+    uploaded = st.file_uploader("Transaction file", type=["csv", "jsonl"])
+
+    if uploaded is not None and st.button("Apply Batch"):
+        fmt = "jsonl" if uploaded.name.endswith(".jsonl") else "csv"
+        stream = io.TextIOWrapper(uploaded, encoding="utf-8", newline="")
+        results, changed = get_service().apply_batch_file(stream, fmt)
+        sync_accounts()
+
+        st.success(f"Processed {len(results)} rows, {len(changed)} accounts updated.")
+        st.write(summarize(results))
+        failed = [(row_no, holder, outcome, None if balance is None else format_cents(balance))
+                  for row_no, holder, outcome, balance in results if outcome != "ok"]
+        if failed:
+            df = pd.DataFrame(failed, columns=["Row", "Account Holder", "Outcome", "Balance ($)"])
+            st.dataframe(df, use_container_width=True)
+
+def month_end():
+    """Page for bulk month-end jobs run on the columnar balance store."""
+    st.header("📅 Month-End Jobs")
+    if not st.session_state.accounts:
+        st.info("No accounts found.")
+        return
+
+    # sync_accounts has brought this session's accounts to exactly journal_pos
+    store = get_columnar().get(st.session_state.journal_pos, st.session_state.accounts)
+    st.write("**Total Liability:**", f"${format_cents(store.total())}")
+    st.write("**Balance Percentiles:**", {f"p{q}": f"${format_cents(v)}" for q, v in store.percentiles().items()})
+
+    with st.form("month_end_form"):
+        month = st.text_input("Month (YYYY-MM)", value=datetime.now().strftime("%Y-%m")).strip()
+        rate = st.number_input("Annual interest rate (%)", min_value=0.0, value=4.0, format="%.2f")
+        fee = st.number_input("Maintenance fee", min_value=0.0, value=5.0, format="%.2f")
+        below = st.number_input("Charge fee when balance is below", min_value=0.0, value=500.0, format="%.2f")
+        force = st.checkbox("Run again even if this month has already run")
+        run = st.form_submit_button("Run Month-End")
+
+    if run:
+        try:
+            period = month_period(month)
+        except ValueError:
+            st.error("Month must be in YYYY-MM format.")
+            return
+        service = get_service()
+        out_dir = os.path.join(os.path.dirname(os.path.abspath(service.journal.journal_file)), STATEMENTS_DIR, month)
+        # Same job as the month_end CLI: one journal transaction, guarded by the per-month marker
+        try:
+            outcome = run_month_end(service, rate / 100, fee, below, period, out_dir, force=force)
+        except BankError as e:
+            st.error(str(e))
+            return
+        finally:
+            sync_accounts()
+        st.success(f"Credited ${format_cents(outcome['interest'])} interest, "
+                   f"charged {outcome['charged']} fees (${format_cents(outcome['fees'])}). "
+                   f"Statements written to {out_dir}.")
+
+def statements():
+    """Page for viewing an account's transaction history."""
+    st.header("🧾 Account Statement")
+    if not st.session_state.accounts:
+        st.info("No accounts found.")
+        return
+
+    holder = pick_account("Select Account", "statement_pick")
+    if not holder:
+        return
+
+    st.markdown("#### Recent Transactions")
+    last_n = st.number_input("Show last", min_value=1, max_value=500, value=10)
+    recent = get_service().ledger.last(holder, last_n)
+    if recent:
+        st.dataframe(_history_frame(recent), use_container_width=True)
+    else:
+        st.info("No transactions recorded yet.")
+
+    st.markdown("#### Statement for a Period")
+    col1, col2 = st.columns(2)
+    start = col1.date_input("From")
+    end = col2.date_input("To")
+    statement = get_service().ledger.statement(
+        holder,
+        datetime.combine(start, time.min).timestamp(),
+        datetime.combine(end, time.max).timestamp(),
+    )
+    if statement["opening"] is not None:
+        st.write(f"**Opening balance:** ${format_cents(statement['opening'])}  |  "
+                 f"**Closing balance:** ${format_cents(statement['closing'])}")
+    if statement["entries"]:
+        st.dataframe(_history_frame(statement["entries"]), use_container_width=True)
+    else:
+        st.info("No transactions in this period.")
+
+def _history_frame(entries) -> pd.DataFrame:
+    """Ledger entries as a display table."""
+    return pd.DataFrame(
+        [(datetime.fromtimestamp(e["ts"]), e["type"].title(),
+          format_cents(e["amount_cents"]), format_cents(e["balance_cents"])) for e in entries],
+        columns=["Date", "Type", "Amount ($)", "Balance ($)"],
+    )
+
 # --- MAIN APP LAYOUT ---
 st.set_page_config(page_title="Pro Bank Manager", page_icon="🏦", layout="centered")
 
@@ -174,7 +325,10 @@ menu = {
     "View All Accounts": view_accounts,
     "Create Account": create_account,
     "Update Account": update_account,
-    "Delete Account": delete_account
+    "Delete Account": delete_account,
+    "Batch Transactions": batch_transactions,
+    "Month-End Jobs": month_end,
+    "Statements": statements
 }
 choice = st.sidebar.radio("Go to", list(menu.keys()))
 
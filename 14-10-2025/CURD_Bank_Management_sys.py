@@ -1,5 +1,11 @@
+import argparse
 import json
 import os
+import sys
+from itertools import chain
+from bank_batch import read_transactions, apply_batch, summarize
+from bank_stream import FORMATS, iter_accounts, write_accounts, parse_filter, filtered
+from money import format_cents, migrate_record, to_cents
 
 DATA_FILE = "bank_data.json"
 
@@ -12,14 +18,17 @@ def save_data(data):
 
 # ---------- Load existing data (if available) ----------
 def load_data():
-    """Loads data from the JSON file if it exists."""
+    """Loads data from the JSON file if it exists (balances as integer cents)."""
     if os.path.exists(DATA_FILE):
         with open(DATA_FILE, "r") as f:
             try:
-                return json.load(f)
+                data = json.load(f)
             except json.JSONDecodeError:
                 print("Warning: JSON file was empty or corrupted. Starting fresh.")
                 return {}
+        for account in data.values():
+            migrate_record(account)
+        return data
     else:
         return {}
 
@@ -32,9 +41,9 @@ def create_account(data):
         return data
 
     pin = input("Enter 4-digit PIN: ").strip()
-    balance = float(input("Enter initial balance: "))
+    balance = to_cents(input("Enter initial balance: "))
 
-    data[name] = {"account_holder": name, "pin": pin, "balance": balance}
+    data[name] = {"account_holder": name, "pin": pin, "balance_cents": balance}
     print(f"\nAccount for {name} added successfully!")
     return data
 
@@ -47,7 +56,7 @@ def display_accounts(data):
 
     print("\n--- All Bank Accounts ---")
     for account in data.values():
-        print(f"Name: {account['account_holder']}, PIN: {account['pin']}, Balance: ${account['balance']:.2f}")
+        print(f"Name: {account['account_holder']}, PIN: {account['pin']}, Balance: ${format_cents(account['balance_cents'])}")
 
 # ---------- Update account ----------
 def update_account(data):
@@ -67,8 +76,8 @@ def update_account(data):
         data[name]['pin'] = new_pin
         print(f"\nPIN updated for {name}")
     elif choice == '2':
-        new_balance = float(input("Enter new balance: "))
-        data[name]['balance'] = new_balance
+        new_balance = to_cents(input("Enter new balance: "))
+        data[name]['balance_cents'] = new_balance
         print(f"\nBalance updated for {name}")
     else:
         print("Invalid choice.")
@@ -89,9 +98,101 @@ def delete_account(data):
         print(f"Account for '{name}' does not exist!")
     return data
 
+# ---------- Apply a transaction file ----------
+def apply_transaction_file(data):
+    """Applies a CSV/JSONL file of deposits and withdrawals, then saves once."""
+    path = input("Enter path of the transaction file (.csv or .jsonl): ").strip()
+    if not os.path.exists(path):
+        print(f"File '{path}' does not exist!")
+        return data
+
+    fmt = "jsonl" if path.endswith(".jsonl") else "csv"
+    with open(path, "r", newline="") as f:
+        results, changed = apply_batch(data, read_transactions(f, fmt))
+
+    for row_no, holder, outcome, _ in results:
+        if outcome != "ok":
+            print(f"Row {row_no}: {holder or '?'} - {outcome}")
+    print(f"\nProcessed {len(results)} rows: {summarize(results)}")
+    if changed:
+        save_data(data)
+    return data
+
+# ---------- Non-interactive subcommands (streaming, bounded memory) ----------
+def _predicates(args):
+    try:
+        return [parse_filter(expression) for expression in args.filter]
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
+def cmd_import(args):
+    """Streams an account file into DATA_FILE (replacing it unless --append)."""
+    if not os.path.exists(args.source):
+        raise SystemExit(f"File '{args.source}' does not exist!")
+    pairs = iter_accounts(args.source, args.format)
+    replaced = 0
+    if args.append and os.path.exists(DATA_FILE):
+        # One extra pass keeps only the imported holder names; an existing
+        # account with one of them is replaced rather than written twice
+        imported = {holder for holder, _ in iter_accounts(args.source, args.format)}
+
+        def existing():
+            nonlocal replaced
+            for holder, account in iter_accounts(DATA_FILE, "json"):
+                if holder in imported:
+                    replaced += 1
+                else:
+                    yield holder, account
+
+        pairs = chain(existing(), pairs)
+    count = write_accounts(pairs, DATA_FILE, "json")
+    print(f"Imported into {DATA_FILE}: {count} accounts written ({replaced} existing replaced).")
+
+def cmd_export(args):
+    """Streams DATA_FILE, optionally filtered, into another file."""
+    count = write_accounts(filtered(iter_accounts(DATA_FILE, "json"), _predicates(args)), args.dest, args.format)
+    print(f"Exported {count} accounts to {args.dest}.")
+
+def cmd_list(args):
+    """Prints matching accounts as they are read, a chunk at a time."""
+    chunk, count = [], 0
+    for _, account in filtered(iter_accounts(DATA_FILE, "json"), _predicates(args)):
+        chunk.append(f"Name: {account['account_holder']}, Balance: ${format_cents(account.get('balance_cents', 0))}\n")
+        count += 1
+        if len(chunk) >= 1000:
+            sys.stdout.write("".join(chunk))
+            chunk = []
+    sys.stdout.write("".join(chunk))
+    print(f"{count} accounts")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bank Account Manager (run without arguments for the menu).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="load accounts from a JSON, JSONL or CSV file")
+    p.add_argument("source")
+    p.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    p.add_argument("--append", action="store_true", help="keep existing accounts")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="write accounts to a JSON, JSONL or CSV file")
+    p.add_argument("dest")
+    p.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    p.add_argument("--filter", action="append", default=[], help="e.g. balance>=100, name^=Al, name~son")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("list", help="print accounts")
+    p.add_argument("--filter", action="append", default=[], help="e.g. balance>=100, name^=Al, name~son")
+    p.set_defaults(func=cmd_list)
+    return parser
+
 # ---------- Main program ----------
 def main():
     """Main function to run the bank account manager application."""
+    if len(sys.argv) > 1:
+        args = build_parser().parse_args()
+        args.func(args)
+        return
     print("Welcome to the Bank Account Manager")
     data = load_data()
 
@@ -101,9 +202,10 @@ def main():
         print("2. Display All Accounts")
         print("3. Update Account")
         print("4. Delete Account")
-        print("5. Exit")
+        print("5. Apply Transaction File")
+        print("6. Exit")
 
-        choice = input("Enter your choice (1-5): ").strip()
+        choice = input("Enter your choice (1-6): ").strip()
 
         if choice == '1':
             data = create_account(data)
@@ -114,11 +216,13 @@ def main():
         elif choice == '4':
             data = delete_account(data)
         elif choice == '5':
+            data = apply_transaction_file(data)
+        elif choice == '6':
             save_data(data)
             print("Exiting... Goodbye!")
             break
         else:
-            print("Invalid choice. Please enter a number between 1-5.")
+            print("Invalid choice. Please enter a number between 1-6.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,53 +1,21 @@
 import streamlit as st
-import json
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict
-
-# --- MODELS ---
-class User:
-    def __init__(self, user_id, name, role, password):
-        self.user_id = user_id
-        self.name = name
-        self.role = role
-        self.password = password
-
-    def to_dict(self):
-        return self.__dict__
-
-class Doctor(User):
-    def __init__(self, user_id, name, specialization, password):
-        super().__init__(user_id, name, 'doctor', password)
-        self.specialization = specialization
-        self.patients: List[int] = []
-
-    def add_patient(self, patient_id):
-        if patient_id not in self.patients:
-            self.patients.append(patient_id)
-
-class Patient(User):
-    def __init__(self, user_id, name, age, contact, password):
-        super().__init__(user_id, name, 'patient', password)
-        self.age = age
-        self.contact = contact
-        self.appointments: List[int] = []
-
-    def book_appointment(self, appointment_id):
-        self.appointments.append(appointment_id)
-
-class Appointment:
-    def __init__(self, appointment_id, patient_id, doctor_id, date, status='Pending'):
-        self.appointment_id = appointment_id
-        self.patient_id = patient_id
-        self.doctor_id = doctor_id
-        self.date = date
-        self.status = status
-
-    def to_dict(self):
-        return self.__dict__
+from datetime import date, datetime, timedelta
+from prefix_index import PrefixIndex
+from hospital_models import Appointment, Doctor, Patient
+from hospital_import import COLUMNS, import_upload
+from hospital_repository import HospitalRepository
+from hospital_store import HospitalStore
+from id_allocator import IdAllocator
+from scheduling import DEFAULT_HOURS, Scheduler, SlotUnavailable, default_hours
+from trigram_index import open_patient_index
 
 # --- DATABASE ---
-DB_FILE = Path("data.json")
+DATA_DIR = Path("hospital_data")  # one segment file per collection chunk
+DB_FILE = Path("data.json")       # legacy single-file database, migrated on first run
+IDS_FILE = DATA_DIR / "ids.json"  # highest ID reserved per kind, bumped once per block
+PAGE_SIZES = [25, 50, 100, 250]    # admin listing page sizes
+PATIENT_INDEX_FILE = DATA_DIR / "patient_index.bin"  # fuzzy name/contact index, saved every few thousand adds
 DEFAULT_DB = {
     "admins": [{"user_id": 1, "name": "Admin", "role": "admin", "password": "admin123"}],
     "doctors": [],
@@ -56,24 +24,84 @@ DEFAULT_DB = {
     "next_ids": {"doctor": 1, "patient": 1, "appointment": 1}
 }
 
-def read_db():
-    if not DB_FILE.exists():
-        write_db(DEFAULT_DB)
-    with open(DB_FILE, "r") as f:
-        return json.load(f)
-
-def write_db(data):
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
 # --- APP ---
 st.set_page_config(page_title="Hospital Management System", layout="wide")
 
-db = read_db()
+@st.cache_resource
+def get_store():
+    """One indexed copy of the database per process, shared by all sessions.
+
+    Reruns never re-read the files: they check ``version.json`` with one
+    stat and read from the repository's current copy-on-write snapshot.
+    """
+    return {"store": None, "repo": None, "scheduler": None, "ids": None, "patient_index": None, "generation": None}
+
+def sync(exact=False):
+    """Merges other processes' flushes; rebuilds the scheduler and patient index if there were any.
+
+    Writers call it under ``repo.store.locked()`` with ``exact=True``, which
+    compares the on-disk version rather than trusting one stat.
+    """
+    cache = get_store()
+    repo = cache["repo"]
+    with repo.store.lock:
+        repo.refresh(exact)
+        if cache["generation"] != repo.generation:
+            cache["scheduler"] = Scheduler.from_db(repo.db)
+            cache["patient_index"] = open_patient_index(str(PATIENT_INDEX_FILE), repo.db["patients"])
+            cache["generation"] = repo.generation
+
+def get_repository() -> HospitalRepository:
+    cache = get_store()
+    if cache["store"] is None:
+        store = HospitalStore(str(DATA_DIR), DEFAULT_DB, legacy_file=str(DB_FILE))
+        cache["store"], cache["repo"] = store, HospitalRepository(store.db, store)
+        # IDs issued before the allocator existed were tracked in next_ids; never hand those out again
+        cache["ids"] = IdAllocator(str(IDS_FILE), floor=store.db["next_ids"])
+    # Another process's flush is merged in, not reloaded over this one's unflushed writes
+    sync()
+    return cache["repo"]
+
+repo = get_repository()
+snap = repo.snapshot  # every read in this rerun sees one consistent version
+scheduler = get_store()["scheduler"]
+ids = get_store()["ids"]
+patient_index = get_store()["patient_index"]
+
+def book_appointment(patient_id, doctor, when):
+    """Books a slot; raises SlotUnavailable if it is outside hours or was just taken.
+
+    Runs under the store's file lock after a ``sync``, so the slot check
+    sees bookings made by other processes too.
+    """
+    with repo.store.locked():
+        sync(exact=True)
+        get_store()["scheduler"].book(doctor["user_id"], when)
+        new_appt = Appointment(ids.next_id("appointment"), patient_id, doctor["user_id"],
+                               f"{when:%Y-%m-%d}", time=f"{when:%H:%M}")
+        repo.add_appointment(new_appt.to_dict())
 
 if "user" not in st.session_state:
     st.session_state["user"] = None
 
+# --- DOCTOR SEARCH ---
+def doctor_label(doctor):
+    # Names can repeat, so the label carries the ID to stay unique
+    return f"{doctor['name']} ({doctor['specialization']}, #{doctor['user_id']})"
+
+@st.cache_resource
+def get_doctor_search():
+    """Typeahead index over doctor labels, shared by all sessions."""
+    return {"index": PrefixIndex(), "doctors": {}}
+
+def doctor_search():
+    search = get_doctor_search()
+    if len(search["doctors"]) != snap.count("doctor"):
+        # Doctors were added outside this process; rebuild once
+        search["doctors"] = {doctor_label(d): d for d in snap.all_users("doctor")}
+        search["index"] = PrefixIndex(search["doctors"])
+    return search
+
 def login():
     st.title("Hospital Management System")
     username = st.text_input("Username")
@@ -81,36 +109,69 @@ def login():
     role = st.selectbox("Role", ["admin", "doctor", "patient"])
 
     if st.button("Login"):
-        users = db[role + "s"]
-        for user in users:
-            if user["name"] == username and user["password"] == password:
-                st.session_state["user"] = {
-                    "name": username,
-                    "role": role,
-                    "id": user["user_id"],
-                }
-                st.success(f"Logged in as {username} ({role})")
-                st.rerun()
+        user = snap.authenticate(role, username, password)
+        if user is not None:
+            st.session_state["user"] = {
+                "name": username,
+                "role": role,
+                "id": user["user_id"],
+            }
+            st.success(f"Logged in as {username} ({role})")
+            st.rerun()
         st.error("Invalid login credentials")
 
 def admin_dashboard():
     st.header("Admin Dashboard")
-    st.write("**Total Doctors:**", len(db["doctors"]))
-    st.write("**Total Patients:**", len(db["patients"]))
+    st.write("**Total Doctors:**", snap.count("doctor"))
+    st.write("**Total Patients:**", snap.count("patient"))
+
+    # Counters maintained on every booking: no appointment scans here
+    stats = snap.stats
+    st.subheader("Appointments")
+    st.write("**Total Appointments:**", stats.total)
+    col1, col2 = st.columns(2)
+    col1.write("**By status**")
+    col1.table(sorted(stats.histogram("status").items()))
+    col2.write("**By specialization**")
+    col2.table(sorted(stats.histogram("specialization").items(), key=lambda kv: -kv[1]))
+    upcoming = [f"{date.today() + timedelta(days=i):%Y-%m-%d}" for i in range(14)]
+    st.write("**Next 14 days**")
+    st.bar_chart({"appointments": {day: stats.count("day", day) for day in upcoming}})
+
+    st.subheader("Patient Lookup")
+    lookup = st.text_input("Name or phone number (partial or misspelled is fine)").strip()
+    if lookup:
+        matches = [(snap.user("patient", pid), score) for pid, score in patient_index.search(lookup)]
+        matches = [(p, score) for p, score in matches if p is not None]
+        if not matches:
+            st.info("No matching patients.")
+        else:
+            st.dataframe([{"user_id": p["user_id"], "name": p["name"], "age": p["age"], "contact": p["contact"],
+                           "match": f"{score:.0%}"} for p, score in matches],
+                         use_container_width=True, hide_index=True)
 
     st.subheader("Add Doctor")
     with st.form("add_doc"):
         name = st.text_input("Doctor Name")
         spec = st.text_input("Specialization")
         password = st.text_input("Password")
+        col1, col2, col3 = st.columns(3)
+        start = col1.time_input("Works from", value=datetime.strptime(DEFAULT_HOURS["start"], "%H:%M").time())
+        end = col2.time_input("Until", value=datetime.strptime(DEFAULT_HOURS["end"], "%H:%M").time())
+        slot = col3.number_input("Slot (minutes)", min_value=5, max_value=240, value=DEFAULT_HOURS["slot_minutes"], step=5)
         submit = st.form_submit_button("Add Doctor")
         if submit:
-            if name and spec and password:
-                doc_id = db["next_ids"]["doctor"] + 1
-                db["next_ids"]["doctor"] = doc_id
-                new_doc = Doctor(doc_id, name, spec, password)
-                db["doctors"].append(new_doc.to_dict())
-                write_db(db)
+            if name and spec and password and start < end:
+                doc_id = ids.next_id("doctor")
+                hours = {**default_hours(), "start": f"{start:%H:%M}", "end": f"{end:%H:%M}", "slot_minutes": int(slot)}
+                # One locked step, so no booking sees the doctor without a schedule
+                with repo.store.locked():
+                    sync(exact=True)
+                    record = repo.add_user("doctor", Doctor(doc_id, name, spec, password, hours).to_dict())
+                    get_store()["scheduler"].add_doctor(doc_id, spec, hours)
+                search = get_doctor_search()
+                search["doctors"][doctor_label(record)] = record
+                search["index"].add(doctor_label(record))
                 st.success("Doctor added successfully!")
                 st.rerun()
             else:
@@ -125,34 +186,92 @@ def admin_dashboard():
         submit_p = st.form_submit_button("Add Patient")
         if submit_p:
             if pname and contact and ppassword:
-                pat_id = db["next_ids"]["patient"] + 1
-                db["next_ids"]["patient"] = pat_id
-                new_pat = Patient(pat_id, pname, age, contact, ppassword)
-                db["patients"].append(new_pat.to_dict())
-                write_db(db)
+                new_pat = Patient(ids.next_id("patient"), pname, age, contact, ppassword)
+                # Into the index sync() left current, so a merge can't drop or double the entry
+                with repo.store.locked():
+                    sync(exact=True)
+                    repo.add_user("patient", new_pat.to_dict())
+                    index = get_store()["patient_index"]
+                    index.add(new_pat.user_id, pname, contact)
+                    index.maybe_save(str(PATIENT_INDEX_FILE))
                 st.success("Patient added successfully!")
                 st.rerun()
             else:
                 st.warning("Please fill all fields")
 
+    st.subheader("Bulk Import")
+    import_role = st.selectbox("Import", ["patient", "doctor"], format_func=lambda r: f"{r.title()}s")
+    st.caption(f"CSV columns: {', '.join(COLUMNS[import_role])}"
+               + (" (optional: start, end, slot_minutes)" if import_role == "doctor" else ""))
+    upload = st.file_uploader("CSV file", type="csv")
+    if upload is not None and st.button("Import CSV"):
+        # One locked step, as in Add Doctor: the records and their schedules or
+        # index entries appear together, in the scheduler and index sync() left current
+        with repo.store.locked():
+            sync(exact=True)
+            try:
+                summary = import_upload(upload, import_role, repo, ids)
+            except ValueError as e:
+                summary = None
+                st.error(str(e))
+            else:
+                if import_role == "doctor":
+                    current = get_store()["scheduler"]
+                    for d in summary["records"]:
+                        current.add_doctor(d["user_id"], d["specialization"], d["hours"])
+                elif summary["records"]:
+                    index = get_store()["patient_index"]
+                    for p in summary["records"]:
+                        index.add(p["user_id"], p["name"], p["contact"])
+                    index.save(str(PATIENT_INDEX_FILE))
+        if summary is not None:
+            st.success(f"Imported {summary['imported']} {import_role}s.")
+            if summary["rejected"]:
+                st.warning(f"{summary['rejected']} rows rejected:\n" +
+                           "\n".join(f"- line {line}: {error}" for line, error in summary["errors"]))
+
     st.subheader("View Doctors")
-    for d in db["doctors"]:
-        st.write(f"{d['name']} ({d['specialization']})")
+    col1, col2 = st.columns(2)
+    doc_filters = {"name": col1.text_input("Name contains", key="doc_name"),
+                   "specialization": col2.text_input("Specialization contains", key="doc_spec")}
+    user_table("doctor", ["user_id", "name", "specialization"], doc_filters)
 
     st.subheader("View Patients")
-    for p in db["patients"]:
-        st.write(f"{p['name']} (Age: {p['age']}, Contact: {p['contact']})")
+    col1, col2 = st.columns(2)
+    min_age, max_age = col2.slider("Age", 0, 120, (0, 120), key="pat_age")
+    pat_filters = {"name": col1.text_input("Name contains", key="pat_name")}
+    if (min_age, max_age) != (0, 120):
+        pat_filters.update(min_age=min_age, max_age=max_age)
+    user_table("patient", ["user_id", "name", "age", "contact"], pat_filters)
+
+def user_table(role, columns, filters):
+    """One page of users as a table; filtering and slicing happen before anything is sent."""
+    col1, col2 = st.columns([1, 3])
+    page_size = col1.selectbox("Rows per page", PAGE_SIZES, key=f"{role}_page_size")
+    users = snap.find_users(role, **filters)
+    matches = len(users)
+    pages = max(1, -(-matches // page_size))
+    key = f"{role}_page"
+    if st.session_state.get(key, 1) > pages:  # the filter narrowed the results
+        st.session_state[key] = pages
+    page = col2.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=key)
+    rows = users[(page - 1) * page_size:page * page_size]
+    if not rows:
+        st.info(f"No matching {role}s.")
+        return
+    st.dataframe([{c: row.get(c) for c in columns} for row in rows], use_container_width=True, hide_index=True)
+    st.caption(f"{matches:,} {role}s match; showing {(page - 1) * page_size + 1:,}-{(page - 1) * page_size + len(rows):,}")
 
 def doctor_dashboard():
     st.header("Doctor Dashboard")
     doctor_id = st.session_state["user"]["id"]
     st.subheader("My Appointments")
-    doctor_appts = [a for a in db["appointments"] if a["doctor_id"] == doctor_id]
+    doctor_appts = snap.appointments_for_doctor(doctor_id)
     if not doctor_appts:
         st.info("No appointments yet.")
     else:
         for appt in doctor_appts:
-            st.write(f"Patient ID: {appt['patient_id']} | Date: {appt['date']} | Status: {appt['status']}")
+            st.write(f"Patient ID: {appt['patient_id']} | Date: {appt['date']} {appt.get('time') or ''} | Status: {appt['status']}")
     st.subheader("Patient Notes")
     st.info("Feature placeholder – doctors can add/view patient records here.")
 
@@ -161,29 +280,58 @@ def patient_dashboard():
     patient_id = st.session_state["user"]["id"]
 
     st.subheader("Book Appointment")
-    if not db["doctors"]:
+    if not snap.count("doctor"):
         st.warning("No doctors available. Please contact admin.")
         return
-    doctor_names = [d["name"] for d in db["doctors"]]
-    doc_choice = st.selectbox("Choose Doctor", doctor_names)
-    appt_date = st.date_input("Select Date")
-    if st.button("Book Appointment"):
-        doctor = next(d for d in db["doctors"] if d["name"] == doc_choice)
-        appt_id = db["next_ids"]["appointment"] + 1
-        db["next_ids"]["appointment"] = appt_id
-        new_appt = Appointment(appt_id, patient_id, doctor["user_id"], str(appt_date))
-        db["appointments"].append(new_appt.to_dict())
-        write_db(db)
-        st.success(f"Appointment booked with Dr. {doc_choice} on {appt_date}")
-        st.rerun()
+    search = doctor_search()
+    query = st.text_input("Search doctor by name").strip()
+    matches = search["index"].search(query)
+    if not matches:
+        st.info("No matching doctors.")
+    else:
+        doc_label = st.selectbox("Choose Doctor", matches)
+        doctor = search["doctors"][doc_label]
+        appt_date = st.date_input("Select Date")
+        free = scheduler.schedules[doctor["user_id"]].free_slots(appt_date)
+        if not free:
+            st.info("No free slots that day.")
+        else:
+            when = st.selectbox("Time", free, format_func=lambda t: f"{t:%H:%M}")
+            if st.button("Book Appointment"):
+                try:
+                    book_appointment(patient_id, doctor, when)
+                except SlotUnavailable as e:
+                    st.error(str(e))
+                else:
+                    st.success(f"Appointment booked with Dr. {doctor['name']} on {when:%Y-%m-%d %H:%M}")
+                    st.rerun()
+
+    st.subheader("Earliest Available by Specialization")
+    specialization = st.text_input("Specialization").strip()
+    if specialization:
+        found = scheduler.earliest_free(specialization, datetime.now())
+        if found is None:
+            st.info("No free slots for that specialization.")
+        else:
+            when, doctor_id = found
+            doctor = snap.user("doctor", doctor_id)
+            st.write(f"Dr. {doctor['name']} on {when:%a %Y-%m-%d %H:%M}")
+            if st.button("Book Earliest Slot"):
+                try:
+                    book_appointment(patient_id, doctor, when)
+                except SlotUnavailable as e:
+                    st.error(str(e))
+                else:
+                    st.success(f"Appointment booked with Dr. {doctor['name']} on {when:%Y-%m-%d %H:%M}")
+                    st.rerun()
 
     st.subheader("My Appointments")
-    my_appts = [a for a in db["appointments"] if a["patient_id"] == patient_id]
+    my_appts = snap.appointments_for_patient(patient_id)
     if not my_appts:
         st.info("No appointments booked yet.")
     else:
         for appt in my_appts:
-            st.write(f"Doctor ID: {appt['doctor_id']} | Date: {appt['date']} | Status: {appt['status']}")
+            st.write(f"Doctor ID: {appt['doctor_id']} | Date: {appt['date']} {appt.get('time') or ''} | Status: {appt['status']}")
 
 def main():
     user = st.session_state["user"]
@@ -0,0 +1,104 @@
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+
+from prefix_index import PrefixIndex
+
+_balance_of = itemgetter(0)
+
+
+class AccountBrowser:
+    """Presorted indexes over account holders for paginated browsing.
+
+    Holders are kept sorted by name (a ``PrefixIndex``, also used for
+    typeahead) and by ``(balance, holder)``. Balance changes move one entry
+    instead of re-sorting, and a page only touches the index entries it
+    returns.
+    """
+
+    def __init__(self, accounts: dict = None):
+        self._balances = {}
+        self.names = PrefixIndex()
+        self._by_balance = []
+        if accounts:
+            self.build(accounts)
+
+    def __len__(self):
+        return len(self.names)
+
+    # --- MAINTENANCE ---
+    def build(self, accounts: dict):
+        """Builds both indexes from scratch (once, at load time)."""
+        self._balances = {name: acc["balance_cents"] for name, acc in accounts.items()}
+        self.names = PrefixIndex(self._balances)
+        self._by_balance = sorted((bal, name) for name, bal in self._balances.items())
+
+    def add(self, holder: str, balance: int):
+        self.names.add(holder)
+        insort(self._by_balance, (balance, holder))
+        self._balances[holder] = balance
+
+    def remove(self, holder: str):
+        balance = self._balances.pop(holder)
+        self.names.remove(holder)
+        del self._by_balance[bisect_left(self._by_balance, (balance, holder))]
+
+    def update_balance(self, holder: str, balance: int):
+        old = self._balances[holder]
+        if old == balance:
+            return
+        del self._by_balance[bisect_left(self._by_balance, (old, holder))]
+        insort(self._by_balance, (balance, holder))
+        self._balances[holder] = balance
+
+    # --- QUERIES ---
+    def _balance_range(self, min_balance, max_balance):
+        lo = 0 if min_balance is None else bisect_left(self._by_balance, min_balance, key=_balance_of)
+        hi = len(self._by_balance) if max_balance is None else bisect_right(self._by_balance, max_balance, key=_balance_of)
+        return lo, hi
+
+    def page(self, sort_by: str = "name", descending: bool = False, page: int = 0, page_size: int = 50,
+             min_balance: int = None, max_balance: int = None, prefix: str = ""):
+        """Returns ``(holders, total)`` for one page of matching accounts (balances in cents).
+
+        Each filter is one contiguous range of its own index: the prefix in
+        the name index, the bounds in the balance index. With only the sort
+        index's filter the page is sliced straight out of it. With both, the
+        narrower of the two ranges is walked once -- in order if it is the
+        sort index's, else filtered and sorted -- and that one pass also
+        gives ``total``, so a page costs about the size of the narrower
+        range rather than of the whole index.
+        """
+        folded = prefix.casefold()
+        low = float("-inf") if min_balance is None else min_balance
+        high = float("inf") if max_balance is None else max_balance
+
+        def has_prefix(holder):
+            return holder.casefold().startswith(folded)
+
+        def in_bounds(holder):
+            return low <= self._balances[holder] <= high
+
+        if sort_by == "balance":
+            index, (lo, hi) = self._by_balance, self._balance_range(min_balance, max_balance)
+            other, (other_lo, other_hi) = self.names.entries, self.names.range(prefix)
+            in_range, in_other = in_bounds, has_prefix
+            sort_key = lambda holder: (self._balances[holder], holder)
+        else:
+            index, (lo, hi) = self.names.entries, self.names.range(prefix)
+            other, (other_lo, other_hi) = self._by_balance, self._balance_range(min_balance, max_balance)
+            in_range, in_other = has_prefix, in_bounds
+            sort_key = lambda holder: (holder.casefold(), holder)
+
+        # Both indexes hold (sort key, holder) tuples
+        positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+        start = page * page_size
+        if other_hi - other_lo == len(other):  # the other filter lets everything through
+            return [index[i][1] for i in positions[start:start + page_size]], len(positions)
+
+        # Sorting costs more per entry than walking in order: only sort a much narrower range
+        if len(positions) <= 8 * (other_hi - other_lo):
+            matches = [index[i][1] for i in positions if in_other(index[i][1])]
+        else:
+            entries = sorted(sort_key(holder) for _, holder in other[other_lo:other_hi] if in_range(holder))
+            matches = [holder for _, holder in (reversed(entries) if descending else entries)]
+        return matches[start:start + page_size], len(matches)
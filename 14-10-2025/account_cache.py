@@ -0,0 +1,153 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from atm_engine import AccountEngine
+from bank_account import dump_accounts, load_accounts
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+class AccountCache:
+    """Process-wide cache of a JSON account file.
+
+    The file is parsed straight into ``BankAccount`` objects
+    (``load_accounts``), which are kept until its mtime or size changes, so
+    Streamlit reruns do not re-open and re-parse it, and it is written
+    back with ``dump_accounts``, so neither direction builds a dict per
+    account. All sessions share one instance.
+
+    The account objects live in an ``AccountEngine``, and balance changes
+    go through ``deposit`` / ``withdraw``, which run the engine's atomic
+    check-then-debit on the latest stored record under the cache lock and
+    an ``flock``-ed lock file, so a session never saves a stale copy over
+    another session's (or process's) change. Every change rewrites the
+    file, so the cache lock, not the engine's stripes, bounds throughput.
+    """
+
+    def __init__(self, data_file: str):
+        self.data_file = data_file
+        self.lock_file = data_file + ".lock"
+        self.hits = 0
+        self.misses = 0
+        self._key = None
+        self._data = {}
+        self._engine = AccountEngine()  # objects for the accounts touched since the last reload
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _locked(self):
+        """Holds the in-process lock and, where available, the cross-process file lock."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_file, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self) -> dict:
+        """Returns ``{holder: BankAccount}``, re-reading the file only if it changed.
+
+        The returned dict and accounts are shared: treat them as read-only
+        and go through ``create_account`` / ``save_account`` / ``deposit`` / ``withdraw``.
+        """
+        with self._lock:
+            key = self._stat_key()
+            if key == self._key:
+                self.hits += 1
+                return self._data
+            self.misses += 1
+            data = {}
+            if key is not None:
+                with open(self.data_file, "r") as f:
+                    data = load_accounts(f)
+            self._key = key
+            self._data = data
+            self._engine = AccountEngine()
+            return data
+
+    def account(self, name: str):
+        """Returns the cached account object for ``name`` (or None)."""
+        with self._lock:
+            obj = self.load().get(name)
+            if obj is not None and self._engine.get(name) is None:
+                self._engine.open(obj)
+            return obj
+
+    def create_account(self, account) -> bool:
+        """Stores a new account under its holder name; False if that holder already exists.
+
+        The check and the write happen under one lock, so two sessions (or
+        processes) creating the same holder cannot overwrite each other or
+        an account that already has a balance.
+        """
+        with self._locked():
+            name = account.account_holder
+            if name in self.load():
+                return False
+            self._save(name, account)
+            return True
+
+    def save_account(self, name: str, account):
+        """Stores one account and rewrites the file atomically.
+
+        Changes made by other processes are picked up first, so concurrent
+        writers do not drop each other's accounts.
+        """
+        with self._locked():
+            self._save(name, account)
+            self._engine.close(name)  # the new object is registered on next use
+
+    def deposit(self, name: str, amount: int):
+        """Deposits into the latest stored record; returns ``(message, new balance or None)``."""
+        return self._update(name, lambda engine: engine.deposit(name, amount))
+
+    def withdraw(self, name: str, amount: int):
+        """Withdraws from the latest stored record; returns ``(message, new balance or None)``."""
+        return self._update(name, lambda engine: engine.withdraw(name, amount))
+
+    def _update(self, name: str, change):
+        # account() reloads first if the file changed, so the engine holds the
+        # record as stored now; the balance is None when ``change`` left it alone
+        with self._locked():
+            account = self.account(name)
+            if account is None:
+                return "Account not found.", None
+            before = account.get_balance()
+            message = change(self._engine)
+            if account.get_balance() == before:
+                return message, None
+            try:
+                self._save(name, account)
+            except BaseException:
+                self._key = None  # the object no longer matches the file; reload next time
+                raise
+            return message, account.get_balance()
+
+    def _save(self, name: str, account):
+        data = dict(self.load())
+        data[name] = account
+        tmp_file = self.data_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            dump_accounts(data, f)
+        os.replace(tmp_file, self.data_file)
+        self._key = self._stat_key()
+        self._data = data
+
+    def stats(self) -> dict:
+        """Cache hit/miss counters."""
+        return {"hits": self.hits, "misses": self.misses}
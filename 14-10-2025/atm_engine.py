@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+
+from bank_account import BankAccount
+from money import format_cents
+
+# --- CONFIGURATION ---
+STRIPES = 64
+
+
+class AccountEngine:
+    """Thread-safe manager for many ``BankAccount`` objects.
+
+    Each holder maps to one of ``stripes`` locks, so operations on unrelated
+    accounts rarely contend and no per-account lock object is needed. The
+    check-then-debit in ``withdraw`` runs under the account's stripe lock,
+    and transfers take both stripe locks in index order so they cannot
+    deadlock. The locks prevent lost updates and overdrafts; under CPython's
+    GIL they do not make the bookkeeping itself run in parallel.
+    """
+
+    def __init__(self, stripes: int = STRIPES):
+        self._accounts = {}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._registry_lock = threading.Lock()
+
+    def _stripe(self, name: str) -> int:
+        return hash(name) % len(self._locks)
+
+    def _account(self, name: str) -> BankAccount:
+        account = self._accounts.get(name)
+        if account is None:
+            raise KeyError(f"Account for '{name}' does not exist!")
+        return account
+
+    # --- ACCOUNTS ---
+    def open(self, account: BankAccount) -> bool:
+        """Registers an account; returns False if the holder already exists."""
+        with self._registry_lock:
+            if account.account_holder in self._accounts:
+                return False
+            self._accounts[account.account_holder] = account
+            return True
+
+    def get(self, name: str):
+        """The registered account object for ``name`` (or None)."""
+        return self._accounts.get(name)
+
+    def close(self, name: str):
+        with self._registry_lock, self._locks[self._stripe(name)]:
+            self._accounts.pop(name, None)
+
+    def __len__(self):
+        return len(self._accounts)
+
+    # --- OPERATIONS ---
+    def balance(self, name: str):
+        with self._locks[self._stripe(name)]:
+            return self._account(name).get_balance()
+
+    def deposit(self, name: str, amount) -> str:
+        with self._locks[self._stripe(name)]:
+            return self._account(name).deposit(amount)
+
+    def withdraw(self, name: str, amount) -> str:
+        with self._locks[self._stripe(name)]:
+            return self._account(name).withdraw(amount)
+
+    def transfer(self, source: str, target: str, amount) -> str:
+        """Moves ``amount`` cents from ``source`` to ``target`` atomically."""
+        if source == target:
+            return "Cannot transfer to the same account."
+        if amount <= 0:
+            return "Invalid transfer amount."
+        first, second = sorted((self._stripe(source), self._stripe(target)))
+        with self._locks[first]:
+            # Both accounts may share a stripe; take the second lock only if distinct
+            if first != second:
+                self._locks[second].acquire()
+            try:
+                src, dst = self._account(source), self._account(target)
+                before = src.get_balance()
+                message = src.withdraw(amount)
+                if src.get_balance() == before:
+                    return message  # refused: insufficient funds or blocked by the detector
+                dst.deposit(amount)
+                return f"Transferred ₹{format_cents(amount)} from {source} to {target}."
+            finally:
+                if first != second:
+                    self._locks[second].release()
+
+    def total(self):
+        """Sum of all balances in cents, taken with every stripe held (a consistent snapshot)."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            return sum(account.get_balance() for account in self._accounts.values())
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+# --- BENCHMARK ---
+def _worker(engine: AccountEngine, names: list, ops: int, seed: int, net: list):
+    rng = random.Random(seed)
+    moved = 0
+    for _ in range(ops):
+        r = rng.random()
+        name = rng.choice(names)
+        if r < 0.4:
+            engine.deposit(name, 10)
+            moved += 10
+        elif r < 0.8:
+            if engine.withdraw(name, 10).startswith("Withdrew"):
+                moved -= 10
+        else:
+            engine.transfer(name, rng.choice(names), 5)
+    net.append(moved)
+
+
+def benchmark(n_accounts: int = 10_000, ops_per_thread: int = 50_000, thread_counts=(1, 2, 4, 8, 16)):
+    """Runs the same mixed workload with 1..N threads, striped vs one global lock.
+
+    Also checks that the final total matches the deposits and withdrawals
+    that succeeded, i.e. no update was lost and transfers created no money. Under CPython's GIL
+    the pure-Python bookkeeping does not run in parallel, so the interesting
+    number is how little throughput drops as threads are added.
+    """
+    names = [f"holder{i}" for i in range(n_accounts)]
+    for stripes in (STRIPES, 1):
+        label = f"{stripes} stripes" if stripes > 1 else "global lock"
+        for threads in thread_counts:
+            engine = AccountEngine(stripes)
+            for name in names:
+                engine.open(BankAccount(name, "0000", 100_000))
+            opening = engine.total()
+            net = []
+            workers = [
+                threading.Thread(target=_worker, args=(engine, names, ops_per_thread, seed, net))
+                for seed in range(threads)
+            ]
+            start = time.perf_counter()
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            elapsed = time.perf_counter() - start
+            total_ops = threads * ops_per_thread
+            assert engine.total() == opening + sum(net), "an update was lost"
+            print(f"{label:>12}, {threads:>2} threads: {total_ops / elapsed:>10,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,151 @@
+import json
+import os
+import time
+import tracemalloc
+
+from money import balance_cents, format_cents, to_cents
+
+# --- BankAccount Class ---
+class BankAccount:
+    """Represents a bank account with basic ATM functionalities (amounts in integer cents)."""
+    # No per-instance __dict__: millions of accounts fit in far less memory
+    __slots__ = ("account_holder", "__pin", "__balance")
+    # Optional VelocityDetector shared by all accounts (set by the app)
+    detector = None
+
+    def __init__(self, account_holder, pin, balance=0):
+        self.account_holder = account_holder
+        self.__pin = pin  # Private attribute for the PIN
+        self.__balance = balance  # Private attribute for the balance
+
+    def verify_pin(self, pin):
+        """Checks if the provided PIN matches the account's PIN."""
+        return self.__pin == pin
+
+    def deposit(self, amount):
+        """Adds a positive amount to the account balance."""
+        if amount > 0:
+            self.__balance += amount
+            return f"Deposited ₹{format_cents(amount)}. New balance: ₹{format_cents(self.__balance)}"
+        return "Invalid deposit amount."
+
+    def withdraw(self, amount):
+        """Withdraws a positive amount if funds are sufficient."""
+        if amount <= 0:
+            return "Invalid withdrawal amount."
+        elif amount > self.__balance:
+            return "Insufficient funds."
+        elif self.detector is not None and (reason := self.detector.check(self.account_holder, amount)):
+            return f"Withdrawal blocked for review: {reason}."
+        else:
+            self.__balance -= amount
+            return f"Withdrew ₹{format_cents(amount)}. Remaining balance: ₹{format_cents(self.__balance)}"
+
+    def get_balance(self):
+        """Returns the current account balance in cents."""
+        return self.__balance
+
+    def to_dict(self):
+        """Converts the account object to a dictionary for JSON serialization."""
+        return {
+            "account_holder": self.account_holder,
+            "pin": self._BankAccount__pin,  # Accessing the private PIN
+            "balance_cents": self._BankAccount__balance  # Accessing the private balance
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a BankAccount object from a dictionary."""
+        return cls(data["account_holder"], data["pin"], balance_cents(data))
+
+    def to_json(self):
+        """Serializes the account straight to a JSON object string, without a dict."""
+        return (f'{{"account_holder": {json.dumps(self.account_holder)}, '
+                f'"pin": {json.dumps(self.__pin)}, "balance_cents": {self.__balance:d}}}')
+
+
+# --- Bulk Serialization ---
+def dump_accounts(accounts, f, chunk_size=10_000):
+    """Writes ``{holder: account}`` to ``f`` in the bank_data.json layout.
+
+    Accounts are formatted straight to text and written in chunks, so no
+    intermediate dict is built per account and memory stays flat.
+    """
+    f.write("{")
+    chunk = []
+    for i, (name, account) in enumerate(accounts.items()):
+        chunk.append(f'{"," if i else ""}\n    {json.dumps(name)}: {account.to_json()}')
+        if len(chunk) >= chunk_size:
+            f.write("".join(chunk))
+            chunk = []
+    f.write("".join(chunk))
+    f.write("\n}")
+
+
+def _account_hook(pairs):
+    # Called for every JSON object: account objects (those with an
+    # "account_holder" string, whatever the key order) become BankAccounts
+    # directly from their key/value pairs, the outer mapping stays a dict.
+    if not any(key == "account_holder" and isinstance(value, str) for key, value in pairs):
+        return dict(pairs)
+    holder = pin = None
+    balance = 0
+    for key, value in pairs:
+        if key == "account_holder":
+            holder = value
+        elif key == "pin":
+            pin = value
+        elif key == "balance_cents":
+            balance = value
+        elif key == "balance":  # legacy float balance
+            balance = to_cents(value)
+    return BankAccount(holder, pin, balance)
+
+
+def load_accounts(f):
+    """Reads the bank_data.json layout into ``{holder: BankAccount}``."""
+    return json.load(f, object_pairs_hook=_account_hook)
+
+
+# --- Memory Benchmark ---
+class _DictBankAccount:
+    """The previous layout: same fields, but with a per-instance __dict__."""
+    def __init__(self, account_holder, pin, balance=0):
+        self.account_holder = account_holder
+        self._pin = pin
+        self._balance = balance
+
+
+def _measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, current, peak, elapsed
+
+
+def benchmark(n=1_000_000):
+    """Compares bytes per account for the dict-based and slotted layouts."""
+    names = [f"holder{i}" for i in range(n)]  # shared by both, not counted
+    balances = [(i % 5000) * 100 for i in range(n)]
+    for label, cls in (("__dict__ class", _DictBankAccount), ("__slots__ class", BankAccount)):
+        objects, current, _, elapsed = _measure(
+            lambda: [cls(name, "1234", bal) for name, bal in zip(names, balances)]
+        )
+        print(f"{label:>16}: {current / n:6.1f} bytes/account ({elapsed:.2f}s to build {n})")
+        del objects
+
+    accounts = {name: BankAccount(name, "1234", bal) for name, bal in zip(names, balances)}
+    for label, dump in (
+        ("to_dict + json.dump", lambda f: json.dump({k: a.to_dict() for k, a in accounts.items()}, f, indent=4)),
+        ("dump_accounts", lambda f: dump_accounts(accounts, f)),
+    ):
+        with open(os.devnull, "w") as sink:
+            _, _, peak, elapsed = _measure(lambda: dump(sink))
+        print(f"{label:>20}: peak {peak / 2**20:7.1f} MiB extra ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,396 @@
+import json
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# --- CONFIGURATION ---
+# Compact once this many records have piled up in the journal.
+COMPACT_EVERY = 1000
+# How many times update() re-reads and retries after losing a race.
+MAX_RETRIES = 50
+# How many recent changes are remembered for changes_since().
+RECENT_CHANGES = 10_000
+
+
+class ConflictError(Exception):
+    """Raised when an optimistic update keeps losing to other writers."""
+
+
+class CopyOnRead(dict):
+    """Dict over ``base`` that copies a record the first time ``get`` reads it.
+
+    Lets code that mutates account dicts in place (like ``apply_batch``) run
+    inside ``transact`` without touching the store's own records.
+    """
+
+    def __init__(self, base: dict):
+        super().__init__()
+        self.base = base
+
+    def get(self, key, default=None):
+        if key not in self and key in self.base:
+            self[key] = dict(self.base[key])
+        return super().get(key, default)
+
+
+class JournalStore:
+    """Account store backed by a snapshot file plus an append-only journal.
+
+    Every mutation appends one JSON line to the journal, so the cost of a
+    transaction does not depend on how many accounts exist. ``compact()``
+    folds the journal into a fresh snapshot.
+
+    Each account record carries a ``version``. Writers from any process
+    serialize on an ``flock``-ed lock file and first replay whatever other
+    processes appended, so ``compare_and_swap`` always checks against the
+    latest record and no write is silently overwritten.
+    """
+
+    def __init__(self, snapshot_file: str, journal_file: str = None, compact_every: int = COMPACT_EVERY,
+                 normalize=None):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or os.path.splitext(snapshot_file)[0] + ".journal"
+        self.lock_file = self.journal_file + ".lock"
+        self.compact_every = compact_every
+        self.normalize = normalize  # applied to every record read from disk (legacy formats)
+        self.accounts = {}
+        self.epoch = 0  # bumped on every full reload
+        self.seq = 0    # bumped on every replayed record
+        self._recent = deque(maxlen=RECENT_CHANGES)  # (seq, holder)
+        self._offset = 0        # bytes of the journal already replayed
+        self._generation = None  # generation header of the journal we replayed from
+        self._pending = 0  # journal records not yet folded into the snapshot
+        self._lock = threading.RLock()
+        self._lock_depth = 0  # flock is taken only by the outermost _locked()
+        self._compacting = False
+
+    # --- LOCKING ---
+    @contextmanager
+    def _locked(self):
+        """Holds the in-process lock and, where available, the cross-process file lock."""
+        with self._lock:
+            if fcntl is None or self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self.lock_file, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _journal_generation(self, f) -> int:
+        """Reads the generation header that every compaction writes first.
+
+        Inode numbers can be reused, so a generation counter is what tells a
+        process that the journal it was reading has been replaced.
+        """
+        f.seek(0)
+        try:
+            record = json.loads(f.readline())
+        except json.JSONDecodeError:
+            return 0
+        return record.get("gen", 0) if record.get("op") == "gen" else 0
+
+    # --- LOADING ---
+    def load(self) -> dict:
+        """Rebuilds the accounts from the newest snapshot plus the journal tail."""
+        with self._locked():
+            self._reload()
+            return self.accounts
+
+    def copy(self):
+        """Returns ``(epoch, seq, accounts)`` with a private copy of every record."""
+        with self._locked():
+            self._refresh()
+            accounts = {name: dict(account) for name, account in self.accounts.items()}
+            return self.epoch, self.seq, accounts
+
+    def refresh(self):
+        """Replays records appended by other processes since the last call."""
+        with self._locked():
+            self._refresh()
+
+    def _reload(self):
+        self.accounts = self._read_snapshot()
+        self.epoch += 1
+        self._recent.clear()
+        self._pending = 0
+        self._offset = 0
+        self._generation = None
+        self._refresh()
+
+    def _refresh(self):
+        try:
+            f = open(self.journal_file, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            generation = self._journal_generation(f)
+            size = os.fstat(f.fileno()).st_size
+            if self._generation is not None and (generation != self._generation or size < self._offset):
+                # Another process compacted: start over from its new snapshot.
+                f.close()
+                self._reload()
+                return
+            self._generation = generation
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn last line; the next _append cuts it off
+                if self._replay(line):
+                    self._pending += 1
+                self._offset += len(line)
+
+    def _read_snapshot(self) -> dict:
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, "r") as f:
+                try:
+                    accounts = json.load(f)
+                except json.JSONDecodeError:
+                    return {}
+            if self.normalize:
+                for account in accounts.values():
+                    self.normalize(account)
+            return accounts
+        return {}
+
+    def _replay(self, line) -> bool:
+        """Applies one journal line; a torn line from a crash is ignored."""
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            return False
+        if record["op"] == "gen":
+            return False
+        if record["op"] == "put":
+            account = record["account"]
+            self.accounts[record["holder"]] = self.normalize(account) if self.normalize else account
+        elif record["op"] == "del":
+            self.accounts.pop(record["holder"], None)
+        self.seq += 1
+        self._recent.append((self.seq, record["holder"]))
+        return True
+
+    def changes_since(self, epoch: int, seq: int):
+        """Returns ``(epoch, seq, changes)`` for records written after ``(epoch, seq)``.
+
+        ``changes`` maps each changed holder to a copy of its record (None if
+        deleted), or is None when the caller has fallen too far behind and
+        must reload. Lets each Streamlit session patch its own copy of the
+        accounts instead of reloading everything on every rerun.
+        """
+        with self._locked():
+            self._refresh()
+            if epoch != self.epoch or (seq < self.seq and (not self._recent or self._recent[0][0] > seq + 1)):
+                return self.epoch, self.seq, None
+            holders = {holder for s, holder in self._recent if s > seq}
+            changes = {h: dict(self.accounts[h]) if h in self.accounts else None for h in holders}
+            return self.epoch, self.seq, changes
+
+    @staticmethod
+    def version(record: dict):
+        """Version of a record: None if it does not exist, 0 for legacy records."""
+        return None if record is None else record.get("version", 0)
+
+    # --- MUTATIONS ---
+    def put(self, holder: str, account: dict):
+        """Records the new state of one account, whatever its current version."""
+        with self._locked():
+            self._refresh()
+            self._write({holder: account})
+
+    def put_many(self, accounts: dict):
+        """Records many accounts with a single write and fsync (batch runs)."""
+        with self._locked():
+            self._refresh()
+            self._write(accounts)
+
+    def delete(self, holder: str):
+        """Records the deletion of one account."""
+        with self._locked():
+            self._refresh()
+            self._append([{"op": "del", "holder": holder}])
+
+    def compare_and_swap(self, holder: str, expected_version: int, account: dict) -> bool:
+        """Writes ``account`` only if the stored version is still ``expected_version``.
+
+        Use ``expected_version=None`` to create an account that must not exist yet.
+        """
+        with self._locked():
+            self._refresh()
+            if self.version(self.accounts.get(holder)) != expected_version:
+                return False
+            self._write({holder: account})
+            return True
+
+    def update(self, holder: str, fn, retries: int = MAX_RETRIES) -> dict:
+        """Optimistically applies ``fn`` to a copy of the latest record and stores the result.
+
+        ``fn`` runs without any lock held and may raise to abort (e.g.
+        insufficient funds). If another writer got in first, the record is
+        re-read and ``fn`` runs again, so concurrent deposits are never lost.
+        """
+        for _ in range(retries):
+            with self._locked():
+                self._refresh()
+                current = self.accounts.get(holder)
+                if current is None:
+                    raise KeyError(holder)
+                current = dict(current)
+            expected = self.version(current)
+            new = fn(current)
+            if self.compare_and_swap(holder, expected, new):
+                return self.accounts[holder]
+        raise ConflictError(f"Gave up updating '{holder}' after {retries} conflicting writes.")
+
+    def transact(self, fn):
+        """Runs ``fn`` under the store lock for bulk jobs and stores what it returns.
+
+        ``fn`` gets a ``CopyOnRead`` view of the latest accounts and returns
+        the holders to write back (set a holder to None in the view to delete
+        it); nobody else can write meanwhile. All records go out in one write.
+        """
+        with self._locked():
+            self._refresh()
+            view = CopyOnRead(self.accounts)
+            changed = fn(view)
+            self._write({holder: view[holder] for holder in changed})
+
+    def _write(self, accounts: dict):
+        """Appends put records (or deletes for None), bumping each account's version."""
+        records = []
+        for holder, account in accounts.items():
+            if account is None:
+                records.append({"op": "del", "holder": holder})
+                continue
+            account = dict(account)
+            account["version"] = (self.version(self.accounts.get(holder)) or 0) + 1
+            records.append({"op": "put", "holder": holder, "account": account})
+        self._append(records)
+
+    def _append(self, records: list):
+        """Writes records under the lock; the caller has already refreshed."""
+        if not records:
+            return
+        lines = [(json.dumps(record, separators=(",", ":")) + "\n").encode() for record in records]
+        with open(self.journal_file, "ab") as f:
+            if f.tell() > self._offset:
+                # A torn line left by a writer that crashed; appending after it
+                # would glue our first record onto it and lose that record.
+                f.truncate(self._offset)
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh()
+        due = self._pending >= self.compact_every and not self._compacting
+        if due:
+            self._compacting = True
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    # --- COMPACTION ---
+    def compact(self):
+        """Writes a new snapshot and drops the journal records it covers.
+
+        The snapshot is written outside the lock so transactions keep flowing;
+        records appended meanwhile are carried over into the new journal.
+        """
+        tmp_snapshot = self.snapshot_file + f".{os.getpid()}.tmp"
+        try:
+            with self._locked():
+                self._refresh()
+                state = dict(self.accounts)
+                generation, covered = self._generation or 0, self._offset
+
+            with open(tmp_snapshot, "w") as f:
+                json.dump(state, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+
+            with self._locked():
+                with open(self.journal_file, "rb") as f:
+                    if self._journal_generation(f) != generation:
+                        return  # another process compacted first
+                    f.seek(covered)
+                    tail = f.read()
+                # Journal records are idempotent, so a crash between these two
+                # renames only replays a few records onto the new snapshot.
+                os.replace(tmp_snapshot, self.snapshot_file)
+                tmp_journal = self.journal_file + f".{os.getpid()}.tmp"
+                header = json.dumps({"op": "gen", "gen": generation + 1}) + "\n"
+                with open(tmp_journal, "wb") as f:
+                    f.write(header.encode() + tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_journal, self.journal_file)
+                self._generation = generation + 1
+                self._offset = 0
+                self._pending = 0
+                self._refresh()
+        finally:
+            if os.path.exists(tmp_snapshot):
+                os.remove(tmp_snapshot)
+            self._compacting = False
+
+
+# --- STRESS TEST ---
+def _deposit_worker(snapshot_file: str, holders: list, deposits: int):
+    store = JournalStore(snapshot_file, compact_every=200)
+    store.load()
+
+    def add_one(account):
+        account["balance_cents"] += 1
+        return account
+
+    for i in range(deposits):
+        store.update(holders[i % len(holders)], add_one)
+
+
+def stress_test(processes: int = 24, deposits: int = 200, n_holders: int = 3, workdir: str = "journal_stress"):
+    """Hammers a few accounts from many processes and checks no deposit was lost."""
+    import multiprocessing
+    import shutil
+    import time
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    snapshot_file = os.path.join(workdir, "accounts.json")
+    holders = [f"holder{i}" for i in range(n_holders)]
+    store = JournalStore(snapshot_file)
+    store.load()
+    store.put_many({h: {"account_holder": h, "pin_hash": "", "balance_cents": 0} for h in holders})
+
+    start = time.perf_counter()
+    workers = [
+        multiprocessing.Process(target=_deposit_worker, args=(snapshot_file, holders, deposits))
+        for _ in range(processes)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    accounts = JournalStore(snapshot_file).load()
+    total = sum(accounts[h]["balance_cents"] for h in holders)
+    expected = processes * deposits
+    print(f"{processes} processes x {deposits} deposits in {elapsed:.2f}s "
+          f"({expected / elapsed:,.0f} deposits/s): total {total}, expected {expected}")
+    shutil.rmtree(workdir)
+    assert total == expected, "deposits were lost"
+
+
+if __name__ == "__main__":
+    stress_test()
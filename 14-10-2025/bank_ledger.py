@@ -0,0 +1,194 @@
+import json
+import os
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+
+from money import to_cents
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+class Ledger:
+    """Append-only transaction history with a per-holder time index.
+
+    Every deposit/withdrawal is one JSON line in ``ledger_file``, with the
+    amount and resulting balance in integer cents. For each
+    holder the ledger keeps two parallel arrays -- timestamps and byte
+    offsets -- so date-range and last-N queries bisect straight to the rows
+    they need and read only those lines from disk.
+
+    Several processes (the apps, bank_server, month_end) append to the same
+    file: appends serialize on an ``flock``-ed lock file, and every query
+    first indexes whatever complete lines others appended since.
+    """
+
+    def __init__(self, ledger_file: str):
+        self.ledger_file = ledger_file
+        self.lock_file = ledger_file + ".lock"
+        self._times = {}    # holder -> array('d') of timestamps, ascending
+        self._offsets = {}  # holder -> array('q') of byte offsets, same order
+        self._offset = 0    # bytes of the file already indexed
+        self._lock = threading.Lock()
+        with self._lock:
+            self._refresh()
+
+    @contextmanager
+    def _locked(self):
+        """Holds the cross-process file lock where available (the caller holds ``_lock``)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Indexes the lines appended since the last call (at startup, the whole file)."""
+        try:
+            f = open(self.ledger_file, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size < self._offset:  # replaced by a shorter file
+                self._times, self._offsets, self._offset = {}, {}, 0
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written, or torn by a crash (cut off by the next append)
+                try:
+                    entry = json.loads(line)
+                    self._index(entry["holder"], entry["ts"], self._offset)
+                except (json.JSONDecodeError, KeyError):
+                    pass  # a damaged line; the history after it still counts
+                self._offset += len(line)
+
+    def _index(self, holder: str, ts: float, offset: int):
+        times = self._times.get(holder)
+        if times is None:
+            times = self._times[holder] = array("d")
+            self._offsets[holder] = array("q")
+        offsets = self._offsets[holder]
+        if not times or ts >= times[-1]:
+            times.append(ts)
+            offsets.append(offset)
+        else:  # clock went backwards; keep the arrays sorted
+            pos = bisect_right(times, ts)
+            times.insert(pos, ts)
+            offsets.insert(pos, offset)
+
+    # --- RECORDING ---
+    def record(self, holder: str, kind: str, amount_cents: int, balance_cents: int, ts: float = None):
+        """Appends one transaction and returns the stored entry."""
+        return self.record_many([(holder, kind, amount_cents, balance_cents)], ts)[0]
+
+    def record_many(self, transactions, ts: float = None):
+        """Appends ``(holder, kind, amount_cents, balance_cents)`` tuples with a single write."""
+        ts = time.time() if ts is None else ts
+        entries = [
+            {"ts": ts, "holder": holder, "type": kind, "amount_cents": amount, "balance_cents": balance}
+            for holder, kind, amount, balance in transactions
+        ]
+        lines = [(json.dumps(entry, separators=(",", ":")) + "\n").encode() for entry in entries]
+        with self._lock, self._locked():
+            self._refresh()
+            with open(self.ledger_file, "ab") as f:
+                if f.tell() > self._offset:
+                    f.truncate(self._offset)  # a torn line left by a writer that crashed
+                f.write(b"".join(lines))
+            self._refresh()
+        return entries
+
+    # --- QUERIES ---
+    def _read(self, offsets) -> list:
+        entries = []
+        with open(self.ledger_file, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                entry = json.loads(f.readline())
+                if "amount" in entry:  # written before balances were kept in cents
+                    entry["amount_cents"] = to_cents(entry.pop("amount"))
+                    entry["balance_cents"] = to_cents(entry.pop("balance"))
+                entries.append(entry)
+        return entries
+
+    def between(self, holder: str, start: float, end: float) -> list:
+        """Transactions for ``holder`` with ``start <= ts <= end``, oldest first."""
+        with self._lock:
+            self._refresh()
+            times = self._times.get(holder)
+            if times is None:
+                return []
+            lo, hi = bisect_left(times, start), bisect_right(times, end)
+            offsets = self._offsets[holder][lo:hi]
+        return self._read(offsets)
+
+    def last(self, holder: str, n: int = 10) -> list:
+        """The ``n`` most recent transactions for ``holder``, newest first."""
+        with self._lock:
+            self._refresh()
+            offsets = self._offsets.get(holder, array("q"))[-n:] if n > 0 else []
+        return self._read(reversed(offsets))
+
+    def statement(self, holder: str, start: float, end: float) -> dict:
+        """Opening balance, transactions and closing balance (in cents) for a period."""
+        entries = self.between(holder, start, end)
+        if not entries:
+            with self._lock:
+                times = self._times.get(holder)
+                pos = bisect_left(times, start) if times is not None else 0
+                offsets = self._offsets[holder][pos - 1:pos] if pos else []
+            before = self._read(offsets)
+            balance = before[0]["balance_cents"] if before else None
+            return {"holder": holder, "opening": balance, "closing": balance, "entries": []}
+        first = entries[0]
+        sign = -1 if first["type"] in ("deposit", "interest") else 1
+        opening = first["balance_cents"] + sign * first["amount_cents"]
+        return {"holder": holder, "opening": opening, "closing": entries[-1]["balance_cents"], "entries": entries}
+
+
+# --- BENCHMARK ---
+def benchmark(path: str = "ledger_bench.jsonl", n_rows: int = 2_000_000, n_holders: int = 10_000):
+    """Writes years of synthetic history, then times statement queries."""
+    if os.path.exists(path):
+        os.remove(path)
+    ledger = Ledger(path)
+    start_ts = time.time() - 5 * 365 * 86400
+    step = 5 * 365 * 86400 / n_rows
+    batch = []
+    start = time.perf_counter()
+    for i in range(n_rows):
+        batch.append((f"holder{random.randrange(n_holders)}", "deposit", 1000, 10_000))
+        if len(batch) == 10_000:
+            ledger.record_many(batch, ts=start_ts + i * step)
+            batch = []
+    ledger.record_many(batch, ts=start_ts + n_rows * step)
+    print(f"wrote {n_rows} rows in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    Ledger(path)
+    print(f"index rebuild at startup: {time.perf_counter() - start:.1f}s")
+
+    queries = 1000
+    start = time.perf_counter()
+    for _ in range(queries):
+        holder = f"holder{random.randrange(n_holders)}"
+        month = start_ts + random.randrange(59) * 30 * 86400
+        ledger.statement(holder, month, month + 30 * 86400)
+        ledger.last(holder, 10)
+    elapsed = time.perf_counter() - start
+    print(f"{queries} monthly statements + last-10 queries: {elapsed * 1000 / queries:.2f} ms each")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    benchmark()
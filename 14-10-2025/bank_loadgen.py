@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from bank_server import HOST, PORT
+
+# Refusals the service is expected to give under this load: most withdrawals
+# over 50 accounts trip the velocity check (5 per holder per 10 minutes)
+EXPECTED_ERRORS = ("Insufficient funds.", "Withdrawal blocked for review:")
+
+
+class Client:
+    """One keep-alive HTTP connection to the bank server."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, payload: dict = None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode().partition(":")
+            if key.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+async def run_client(host: str, port: int, ops: int, holders: list, latencies: list, errors: list, refused: list):
+    client = Client(host, port)
+    await client.connect()
+    try:
+        for _ in range(ops):
+            op = random.choice(("deposit", "deposit", "withdraw"))
+            payload = {"name": random.choice(holders), "pin": "1234", "amount": round(random.uniform(1, 50), 2)}
+            start = time.perf_counter()
+            status, body = await client.request("POST", f"/{op}", payload)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                error = body.get("error") or ""
+                (refused if error.startswith(EXPECTED_ERRORS) else errors).append(error)
+    finally:
+        await client.close()
+
+
+async def main_async(args):
+    holders = [f"loadtest{i}" for i in range(args.accounts)]
+    setup = Client(args.host, args.port)
+    await setup.connect()
+    for name in holders:
+        await setup.request("POST", "/create", {"name": name, "pin": "1234", "balance": 1000})
+    await setup.close()
+
+    latencies, errors, refused = [], [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(args.host, args.port, args.ops, holders, latencies, errors, refused)
+        for _ in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    stats_client = Client(args.host, args.port)
+    await stats_client.connect()
+    _, stats = await stats_client.request("GET", "/stats")
+    await stats_client.close()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{args.clients} clients x {args.ops} ops: {total} requests in {elapsed:.2f}s ({total / elapsed:,.0f} ops/s)")
+    print(f"latency p50 {percentile(latencies, 50) * 1000:.2f} ms, p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    if stats["commits"]:
+        print(f"group commits: {stats['commits']} ({stats['operations'] / stats['commits']:.1f} ops per commit)")
+    if refused:
+        blocked = sum(error.startswith("Withdrawal blocked") for error in refused)
+        print(f"{len(refused)} expected refusals ({blocked} by the velocity check, "
+              f"{len(refused) - blocked} for insufficient funds)")
+    if errors:
+        print(f"{len(errors)} unexpected errors, e.g. {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay simulated clients against bank_server.py.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--clients", type=int, default=100, help="concurrent simulated clients")
+    parser.add_argument("--ops", type=int, default=100, help="operations per client")
+    parser.add_argument("--accounts", type=int, default=50, help="accounts to spread the load over")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import json
+import os
+from urllib.parse import unquote
+
+from bank_service import BankService, BankError, DATA_FILE, JOURNAL_FILE, LEDGER_FILE
+
+# --- CONFIGURATION ---
+HOST = "127.0.0.1"
+PORT = 8765
+# Upper bound on operations folded into one group commit.
+MAX_BATCH = 512
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 422: "Unprocessable Entity"}
+
+
+class BankServer:
+    """Local HTTP/JSON front end for ``BankService`` with group commit.
+
+    Routes::
+
+        GET  /accounts/<name>   -> account without PIN hash
+        POST /<op>              -> create, deposit, withdraw, change_pin, delete
+                                   (JSON body holds the keyword arguments)
+
+    Writes from all connections are queued; a single committer task drains
+    whatever is waiting and hands it to ``execute_many`` so the batch shares
+    one journal append and fsync.
+    """
+
+    def __init__(self, service: BankService, max_batch: int = MAX_BATCH):
+        self.service = service
+        self.max_batch = max_batch
+        self.queue = None
+        self.commits = 0
+        self.committed_ops = 0
+
+    # --- GROUP COMMIT ---
+    async def submit(self, op: str, kwargs: dict) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((op, kwargs, future))
+        return await future
+
+    async def committer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            operations = [(op, kwargs) for op, kwargs, _ in batch]
+            try:
+                # File I/O runs off the event loop so new requests keep queueing
+                results = await loop.run_in_executor(None, self.service.execute_many, operations)
+            except Exception as e:
+                results = [{"ok": False, "error": f"Commit failed: {e}"}] * len(batch)
+            self.commits += 1
+            self.committed_ops += len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if not future.cancelled():
+                    future.set_result(result)
+
+    # --- HTTP ---
+    async def handle(self, method: str, path: str, body: bytes):
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if method == "GET" and len(parts) == 2 and parts[0] == "accounts":
+            try:
+                # Reading refreshes from the journal under its file lock; keep that off the event loop
+                account = await asyncio.get_running_loop().run_in_executor(
+                    None, self.service.get_account, unquote(parts[1]))
+                return 200, account
+            except BankError as e:
+                return 404, {"error": str(e)}
+        if method == "GET" and parts == ["stats"]:
+            return 200, {"commits": self.commits, "operations": self.committed_ops}
+        if method != "POST":
+            return 405, {"error": "Use GET /accounts/<name> or POST /<operation>."}
+        if len(parts) != 1 or parts[0] not in BankService.OPERATIONS:
+            return 404, {"error": f"Unknown operation '{path}'."}
+        try:
+            kwargs = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return 400, {"error": "Body must be JSON."}
+        if not isinstance(kwargs, dict):
+            return 400, {"error": "Body must be a JSON object."}
+        result = await self.submit(parts[0], kwargs)
+        if result["ok"]:
+            return 200, result["result"]
+        return 422, {"error": result["error"]}
+
+    @staticmethod
+    async def respond(writer, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    async def serve_connection(self, reader, writer):
+        """Serves keep-alive HTTP/1.1 requests on one connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode().split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode().partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # The body cannot be framed, so nothing after it can be either: answer and hang up
+                    await self.respond(writer, 400, {"error": "Content-Length must be a non-negative integer."})
+                    break
+                body = await reader.readexactly(length)
+
+                status, payload = await self.handle(method, path, body)
+                await self.respond(writer, status, payload)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = HOST, port: int = PORT):
+        self.queue = asyncio.Queue()
+        committer = asyncio.create_task(self.committer())
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        print(f"Bank server listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            committer.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the bank over local HTTP/JSON.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--data-dir", default=".", help="directory holding the bank data files")
+    args = parser.parse_args()
+
+    service = BankService(
+        os.path.join(args.data_dir, DATA_FILE),
+        os.path.join(args.data_dir, JOURNAL_FILE),
+        os.path.join(args.data_dir, LEDGER_FILE),
+    )
+    try:
+        asyncio.run(BankServer(service).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import hashlib
+
+from bank_journal import JournalStore
+from bank_ledger import Ledger
+from bank_batch import read_transactions, apply_batch
+from fraud_detector import VelocityDetector
+from money import migrate_record, to_cents
+
+# --- CONFIGURATION ---
+DATA_FILE = "bank_data_secure.json"
+JOURNAL_FILE = "bank_data_secure.journal"
+LEDGER_FILE = "bank_ledger_secure.jsonl"
+
+
+class BankError(ValueError):
+    """A rejected operation; the message is safe to show to the user."""
+
+
+# --- SECURITY ---
+def hash_pin(pin: str) -> str:
+    """Hashes a PIN using SHA-256."""
+    return hashlib.sha256(pin.encode()).hexdigest()
+
+def verify_pin(stored_hash: str, provided_pin: str) -> bool:
+    """Verifies a provided PIN against a stored hash."""
+    return stored_hash == hash_pin(provided_pin)
+
+def public_view(account: dict) -> dict:
+    """An account without its PIN hash."""
+    return {"account_holder": account["account_holder"], "balance_cents": account["balance_cents"]}
+
+
+class BankService:
+    """UI-independent account operations over the journal and ledger.
+
+    Streamlit pages, the asyncio server and scripts all call these methods.
+    ``execute_many`` applies several operations under one store lock and
+    writes them with a single journal append, which is what the server uses
+    for group commits. Amounts come in as currency units and are kept as
+    integer cents from then on.
+    """
+
+    def __init__(self, data_file: str = DATA_FILE, journal_file: str = JOURNAL_FILE, ledger_file: str = LEDGER_FILE):
+        self.journal = JournalStore(data_file, journal_file, normalize=migrate_record)
+        self.journal.load()
+        self.ledger = Ledger(ledger_file)
+        self.detector = VelocityDetector()
+
+    # --- READS ---
+    def get_account(self, name: str) -> dict:
+        self.journal.refresh()
+        account = self.journal.accounts.get(name)
+        if account is None:
+            raise BankError(f"Account for '{name}' does not exist!")
+        return public_view(account)
+
+    # --- OPERATIONS ---
+    # Each _op_* works on a CopyOnRead view, returns (changed holder, result,
+    # ledger entry or None) and raises BankError to reject the operation.
+    def _authorized(self, accounts, name: str, pin: str) -> dict:
+        account = accounts.get(name)
+        if account is None:
+            raise BankError(f"Account for '{name}' does not exist!")
+        if not verify_pin(account["pin_hash"], str(pin)):
+            raise BankError("Invalid PIN.")
+        return account
+
+    @staticmethod
+    def _amount(amount) -> int:
+        try:
+            amount = to_cents(amount)
+        except (TypeError, ValueError):
+            raise BankError("Amount must be a number.")
+        if not amount > 0:
+            raise BankError("Amount must be positive.")
+        return amount
+
+    def _op_create(self, accounts, name: str, pin: str, balance=0.0):
+        name = str(name).strip()
+        pin = str(pin)
+        if not name or len(pin) != 4 or not pin.isdigit():
+            raise BankError("Please fill all fields correctly (PIN must be 4 digits).")
+        try:
+            balance = to_cents(balance)
+        except (TypeError, ValueError):
+            raise BankError("Initial balance must be a number.")
+        if balance < 0:
+            raise BankError("Initial balance cannot be negative.")
+        if accounts.get(name) is not None:
+            raise BankError(f"Account for '{name}' already exists!")
+        accounts[name] = {"account_holder": name, "pin_hash": hash_pin(pin), "balance_cents": balance}
+        return name, public_view(accounts[name]), None
+
+    def _op_deposit(self, accounts, name: str, pin: str, amount):
+        account = self._authorized(accounts, name, pin)
+        amount = self._amount(amount)
+        account["balance_cents"] += amount
+        return name, public_view(account), (name, "deposit", amount, account["balance_cents"])
+
+    def _op_withdraw(self, accounts, name: str, pin: str, amount):
+        account = self._authorized(accounts, name, pin)
+        amount = self._amount(amount)
+        if account["balance_cents"] < amount:
+            raise BankError("Insufficient funds.")
+        reason = self.detector.check(name, amount)
+        if reason:
+            raise BankError(f"Withdrawal blocked for review: {reason}.")
+        account["balance_cents"] -= amount
+        return name, public_view(account), (name, "withdraw", amount, account["balance_cents"])
+
+    def _op_change_pin(self, accounts, name: str, pin: str, new_pin: str):
+        account = self._authorized(accounts, name, pin)
+        new_pin = str(new_pin)
+        if len(new_pin) != 4 or not new_pin.isdigit():
+            raise BankError("New PIN must be 4 digits.")
+        account["pin_hash"] = hash_pin(new_pin)
+        return name, public_view(account), None
+
+    def _op_delete(self, accounts, name: str, pin: str):
+        self._authorized(accounts, name, pin)
+        accounts[name] = None
+        return name, {"account_holder": name, "deleted": True}, None
+
+    OPERATIONS = ("create", "deposit", "withdraw", "change_pin", "delete")
+
+    def execute_many(self, operations) -> list:
+        """Applies ``(op, kwargs)`` pairs in order with one durable write.
+
+        Returns one result per operation: ``{"ok": True, "result": ...}`` or
+        ``{"ok": False, "error": message}``. A rejected operation does not
+        affect the others.
+        """
+        results = []
+        history = []
+
+        def run(accounts):
+            changed = set()
+            for op, kwargs in operations:
+                handler = getattr(self, f"_op_{op}", None) if op in self.OPERATIONS else None
+                try:
+                    if handler is None:
+                        raise BankError(f"Unknown operation '{op}'.")
+                    holder, result, entry = handler(accounts, **kwargs)
+                except TypeError:
+                    results.append({"ok": False, "error": f"Bad arguments for '{op}'."})
+                    continue
+                except BankError as e:
+                    results.append({"ok": False, "error": str(e)})
+                    continue
+                changed.add(holder)
+                if entry is not None:
+                    history.append(entry)
+                results.append({"ok": True, "result": result})
+            return changed
+
+        self.journal.transact(run)
+        self.ledger.record_many(history)
+        return results
+
+    def execute(self, op: str, **kwargs) -> dict:
+        """Runs one operation; raises BankError if it is rejected."""
+        outcome = self.execute_many([(op, kwargs)])[0]
+        if not outcome["ok"]:
+            raise BankError(outcome["error"])
+        return outcome["result"]
+
+    def create_account(self, name: str, pin: str, balance: float = 0.0) -> dict:
+        return self.execute("create", name=name, pin=pin, balance=balance)
+
+    def deposit(self, name: str, pin: str, amount: float) -> dict:
+        return self.execute("deposit", name=name, pin=pin, amount=amount)
+
+    def withdraw(self, name: str, pin: str, amount: float) -> dict:
+        return self.execute("withdraw", name=name, pin=pin, amount=amount)
+
+    def change_pin(self, name: str, pin: str, new_pin: str) -> dict:
+        return self.execute("change_pin", name=name, pin=pin, new_pin=new_pin)
+
+    def delete_account(self, name: str, pin: str) -> dict:
+        return self.execute("delete", name=name, pin=pin)
+
+    # --- BULK JOBS ---
+    def apply_batch_file(self, stream, fmt: str = "csv"):
+        """Applies a CSV/JSONL transaction stream; returns ``(results, changed)``."""
+        applied = []
+        outcome = {}
+
+        def run(accounts):
+            outcome["results"], changed = apply_batch(accounts, read_transactions(stream, fmt), applied)
+            return changed
+
+        self.journal.transact(run)
+        self.ledger.record_many(applied)
+        return outcome["results"], {row[0] for row in applied}
@@ -0,0 +1,274 @@
+import csv
+import json
+import os
+import random
+import re
+import time
+
+from money import cents_to_str, migrate_record, to_cents
+
+# --- CONFIGURATION ---
+READ_SIZE = 64 * 1024  # bytes read per refill of the parse buffer
+CHUNK_SIZE = 10_000    # records formatted per write
+FORMATS = ("json", "jsonl", "csv")
+
+_decoder = json.JSONDecoder()
+_WS = re.compile(r"[ \t\n\r]*")
+
+
+def detect_format(path: str, fmt: str = None) -> str:
+    """Explicit ``fmt``, else the file extension (``.json``, ``.jsonl``, ``.csv``)."""
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    return ext if ext in FORMATS else "json"
+
+
+# --- READING ---
+def iter_json_accounts(f, read_size: int = READ_SIZE):
+    """Yields ``(holder, record)`` from the bank_data.json layout, one at a time.
+
+    The top-level object is walked with ``raw_decode`` over a small buffer
+    that is refilled from ``f`` as needed, so only one account record is
+    ever held in memory regardless of file size.
+    """
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        data = f.read(read_size)
+        if not data:
+            eof = True
+        buf = buf[pos:] + data
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            pos = _WS.match(buf, pos).end()
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    def value():
+        nonlocal pos
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A number that ends exactly at the buffer edge may continue in the next read
+            if end == len(buf) and not eof:
+                fill()
+                continue
+            pos = end
+            return obj
+
+    def expect(char):
+        nonlocal pos
+        skip_ws()
+        if buf[pos:pos + 1] != char:
+            raise ValueError(f"Expected {char!r} in account file")
+        pos += 1
+
+    fill()
+    skip_ws()
+    if eof and pos >= len(buf):
+        return  # empty file
+    expect("{")
+    skip_ws()
+    if buf[pos:pos + 1] == "}":
+        return
+    while True:
+        skip_ws()
+        holder = value()
+        expect(":")
+        skip_ws()
+        yield holder, migrate_record(value())
+        skip_ws()
+        if buf[pos:pos + 1] == ",":
+            pos += 1
+            continue
+        expect("}")
+        return
+
+
+def iter_jsonl_accounts(f):
+    """Yields ``(holder, record)`` from one JSON account object per line."""
+    for line in f:
+        line = line.strip()
+        if line:
+            record = migrate_record(json.loads(line))
+            yield record["account_holder"], record
+
+
+def iter_csv_accounts(f):
+    """Yields ``(holder, record)`` from a CSV with an ``account_holder`` column.
+
+    A ``balance`` column holds currency amounts, ``balance_cents`` integers.
+    """
+    for row in csv.DictReader(f):
+        record = dict(row)
+        if "balance_cents" in record:
+            record["balance_cents"] = int(record["balance_cents"])
+        migrate_record(record)
+        yield record["account_holder"], record
+
+
+def iter_accounts(path: str, fmt: str = None):
+    """Streams ``(holder, record)`` pairs from a JSON, JSONL or CSV account file."""
+    fmt = detect_format(path, fmt)
+    reader = {"json": iter_json_accounts, "jsonl": iter_jsonl_accounts, "csv": iter_csv_accounts}[fmt]
+    with open(path, "r", newline="" if fmt == "csv" else None) as f:
+        yield from reader(f)
+
+
+# --- WRITING ---
+def _write_chunked(f, pieces, chunk_size: int):
+    chunk = []
+    for piece in pieces:
+        chunk.append(piece)
+        if len(chunk) >= chunk_size:
+            f.write("".join(chunk))
+            chunk = []
+    f.write("".join(chunk))
+
+
+def write_json_accounts(pairs, f, chunk_size: int = CHUNK_SIZE) -> int:
+    """Writes ``(holder, record)`` pairs in the bank_data.json layout; returns the count."""
+    count = 0
+
+    def pieces():
+        nonlocal count
+        for holder, record in pairs:
+            yield f'{"," if count else ""}\n    {json.dumps(holder)}: {json.dumps(record)}'
+            count += 1
+
+    f.write("{")
+    _write_chunked(f, pieces(), chunk_size)
+    f.write("\n}" if count else "}")
+    return count
+
+
+def write_jsonl_accounts(pairs, f, chunk_size: int = CHUNK_SIZE) -> int:
+    count = 0
+
+    def pieces():
+        nonlocal count
+        for _, record in pairs:
+            yield json.dumps(record, separators=(",", ":")) + "\n"
+            count += 1
+
+    _write_chunked(f, pieces(), chunk_size)
+    return count
+
+
+def write_csv_accounts(pairs, f, chunk_size: int = CHUNK_SIZE) -> int:
+    """CSV with the columns of the first record; balances as plain decimals."""
+    writer = None
+    count = 0
+    rows = []
+    for _, record in pairs:
+        row = dict(record)
+        if "balance_cents" in row:
+            row["balance"] = cents_to_str(row.pop("balance_cents"))
+        if writer is None:
+            writer = csv.DictWriter(f, fieldnames=list(row), extrasaction="ignore")
+            writer.writeheader()
+        rows.append(row)
+        count += 1
+        if len(rows) >= chunk_size:
+            writer.writerows(rows)
+            rows = []
+    if rows:
+        writer.writerows(rows)
+    return count
+
+
+def write_accounts(pairs, path: str, fmt: str = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """Streams pairs to ``path`` through a temporary file and an atomic rename."""
+    fmt = detect_format(path, fmt)
+    writer = {"json": write_json_accounts, "jsonl": write_jsonl_accounts, "csv": write_csv_accounts}[fmt]
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", newline="" if fmt == "csv" else None) as f:
+            count = writer(pairs, f, chunk_size)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return count
+
+
+# --- FILTERS ---
+_FILTER = re.compile(r"^\s*(name|balance)\s*(>=|<=|==|!=|\^=|>|<|=|~)\s*(.*?)\s*$")
+_COMPARE = {
+    ">=": lambda a, b: a >= b, "<=": lambda a, b: a <= b, ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b, "=": lambda a, b: a == b, "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+}
+
+
+def parse_filter(expression: str):
+    """Turns ``balance>=100``, ``name^=Al`` (prefix) or ``name~son`` (contains) into a predicate."""
+    match = _FILTER.match(expression)
+    if not match:
+        raise ValueError(f"Bad filter '{expression}' (try balance>=100, name^=Al, name~son).")
+    field, op, raw = match.groups()
+    if field == "balance":
+        if op in ("^=", "~"):
+            raise ValueError(f"'{op}' only applies to name.")
+        target, compare = to_cents(raw), _COMPARE[op]
+        return lambda record: compare(record.get("balance_cents", 0), target)
+    folded = raw.casefold()
+    if op == "^=":
+        return lambda record: record["account_holder"].casefold().startswith(folded)
+    if op == "~":
+        return lambda record: folded in record["account_holder"].casefold()
+    compare = _COMPARE[op]
+    return lambda record: compare(record["account_holder"], raw)
+
+
+def filtered(pairs, predicates):
+    """Keeps the pairs whose record satisfies every predicate."""
+    for holder, record in pairs:
+        if all(p(record) for p in predicates):
+            yield holder, record
+
+
+# --- BENCHMARK ---
+def _make_file(path: str, n: int):
+    pairs = ((f"holder{i}", {"account_holder": f"holder{i}", "pin": "1234",
+                              "balance_cents": random.randrange(10_000_000)}) for i in range(n))
+    write_accounts(pairs, path, "json")
+
+
+def benchmark(sizes=(10_000, 100_000, 1_000_000, 3_000_000), workdir: str = "stream_bench"):
+    """Exports growing files JSON -> JSONL with a filter and reports the process's peak RSS.
+
+    Peak RSS only ever grows, so a flat column means the largest file needed
+    no more memory than the smallest one.
+    """
+    import resource
+    os.makedirs(workdir, exist_ok=True)
+    predicate = parse_filter("balance>=50000")
+    for n in sizes:
+        src, dst = os.path.join(workdir, "accounts.json"), os.path.join(workdir, "out.jsonl")
+        _make_file(src, n)
+        start = time.perf_counter()
+        count = write_accounts(filtered(iter_accounts(src), [predicate]), dst)
+        elapsed = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        size = os.path.getsize(src) / 2**20
+        print(f"{n:>9} accounts ({size:6.1f} MiB): exported {count} in {elapsed:.2f}s, "
+              f"peak RSS {peak:.1f} MiB")
+        os.remove(src)
+        os.remove(dst)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    benchmark()
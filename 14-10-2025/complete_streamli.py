@@ -1,71 +1,44 @@
 import streamlit as st
 import json
-import os
+from account_cache import AccountCache
+from bank_ledger import Ledger
+from bank_account import BankAccount
+from fraud_detector import VelocityDetector
+from money import format_cents, to_cents
 
-# --- Configuration & Data Persistence ---
+# --- Configuration ---
 DATA_FILE = "bank_data.json"
+LEDGER_FILE = "bank_ledger.jsonl"
+
+# --- Data Persistence ---
+@st.cache_resource
+def get_account_cache():
+    """One parsed copy of the account file per process, shared by all sessions."""
+    return AccountCache(DATA_FILE)
+
+@st.cache_resource
+def get_ledger():
+    """Transaction history shared by all sessions."""
+    return Ledger(LEDGER_FILE)
+
+@st.cache_resource
+def get_detector():
+    """Withdrawal-velocity checks shared by all sessions."""
+    return VelocityDetector()
+
+BankAccount.detector = get_detector()
 
 def load_data():
-    """Loads account data from a JSON file."""
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                st.error("Error decoding JSON file. Starting with an empty dataset.")
-                return {}
-    return {}
-
-def save_data(data):
-    """Saves account data to a JSON file."""
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
-# --- BankAccount Class ---
-class BankAccount:
-    """Represents a bank account with basic ATM functionalities."""
-    def __init__(self, account_holder, pin, balance=0):
-        self.account_holder = account_holder
-        self.__pin = pin  # Private attribute for the PIN
-        self.__balance = balance  # Private attribute for the balance
-
-    def verify_pin(self, pin):
-        """Checks if the provided PIN matches the account's PIN."""
-        return self.__pin == pin
-
-    def deposit(self, amount):
-        """Adds a positive amount to the account balance."""
-        if amount > 0:
-            self.__balance += amount
-            return f"Deposited ₹{amount}. New balance: ₹{self.__balance}"
-        return "Invalid deposit amount."
-
-    def withdraw(self, amount):
-        """Withdraws a positive amount if funds are sufficient."""
-        if amount <= 0:
-            return "Invalid withdrawal amount."
-        elif amount > self.__balance:
-            return "Insufficient funds."
-        else:
-            self.__balance -= amount
-            return f"Withdrew ₹{amount}. Remaining balance: ₹{self.__balance}"
-
-    def get_balance(self):
-        """Returns the current account balance."""
-        return self.__balance
-
-    def to_dict(self):
-        """Converts the account object to a dictionary for JSON serialization."""
-        return {
-            "account_holder": self.account_holder,
-            "pin": self._BankAccount__pin,  # Accessing the private PIN
-            "balance": self._BankAccount__balance  # Accessing the private balance
-        }
-
-    @classmethod
-    def from_dict(cls, data):
-        """Creates a BankAccount object from a dictionary."""
-        return cls(data["account_holder"], data["pin"], data["balance"])
+    """Loads account data, re-parsing the JSON file only when it has changed."""
+    try:
+        return get_account_cache().load()
+    except json.JSONDecodeError:
+        st.error("Error decoding JSON file. Starting with an empty dataset.")
+        return {}
+
+def create_account(account):
+    """Saves a new account to the JSON file; False if the holder exists (balance changes go through deposit/withdraw)."""
+    return get_account_cache().create_account(account)
 
 # --- Streamlit UI Components ---
 
@@ -77,13 +50,14 @@ st.title("ATM System")
 accounts_data = load_data()
 
 # Initialize session state variables if they don't exist
-if "account" not in st.session_state:
-    st.session_state.account = None
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "user_name" not in st.session_state:
     st.session_state.user_name = ""
 
+cache_stats = get_account_cache().stats()
+st.sidebar.caption(f"Account cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+
 # --- Navigation Menu ---
 menu = st.sidebar.radio("Menu", ["Create Account", "Login", "ATM Operations"])
 
@@ -101,14 +75,14 @@ if menu == "Create Account":
             st.warning("Please enter a valid name.")
         elif not pin.isdigit() or len(pin) != 4:
             st.warning("The PIN must be a 4-digit number.")
-        elif name in accounts_data:
-            st.error("An account with this name already exists. Please choose a different name.")
         else:
-            new_account = BankAccount(name.strip(), pin, initial_balance)
-            accounts_data[name] = new_account.to_dict()
-            save_data(accounts_data)
-            st.success(f"Account created successfully for {name} with a balance of ₹{initial_balance}.")
-            st.info("Go to the 'Login' page from the sidebar to access ATM services.")
+            name = name.strip()  # the key and the stored holder are the same string
+            # Checked again under the cache lock, so a racing create or deposit is never overwritten
+            if not create_account(BankAccount(name, pin, to_cents(initial_balance))):
+                st.error("An account with this name already exists. Please choose a different name.")
+            else:
+                st.success(f"Account created successfully for {name} with a balance of ₹{initial_balance}.")
+                st.info("Go to the 'Login' page from the sidebar to access ATM services.")
 
 # Login Page
 elif menu == "Login":
@@ -123,10 +97,8 @@ elif menu == "Login":
             if name not in accounts_data:
                 st.error("Account not found. Please check your name.")
             else:
-                account_info = accounts_data[name]
-                account = BankAccount.from_dict(account_info)
+                account = get_account_cache().account(name)
                 if account.verify_pin(entered_pin):
-                    st.session_state.account = account
                     st.session_state.logged_in = True
                     st.session_state.user_name = name
                     st.success(f"Welcome, {account.account_holder}! You have successfully logged in.")
@@ -137,37 +109,40 @@ elif menu == "Login":
 # ATM Operations Page
 elif menu == "ATM Operations":
     st.header("ATM Operations")
-    if not st.session_state.logged_in or st.session_state.account is None:
+    account = get_account_cache().account(st.session_state.user_name) if st.session_state.logged_in else None
+    if account is None:
         st.warning("Please log in first from the 'Login' page.")
     else:
-        account = st.session_state.account
         name = st.session_state.user_name
         
         st.subheader(f"Account: {name}")
         action = st.radio("Choose an action", ["Check Balance", "Deposit", "Withdraw"])
 
         if action == "Check Balance":
-            st.success(f"Your current balance is ₹{account.get_balance()}.")
+            st.success(f"Your current balance is ₹{format_cents(account.get_balance())}.")
+            st.markdown("#### Mini Statement")
+            for entry in get_ledger().last(name, 5):
+                st.write(f"{entry['type'].title()} ₹{format_cents(entry['amount_cents'])} "
+                         f"→ balance ₹{format_cents(entry['balance_cents'])}")
 
         elif action == "Deposit":
             amount = st.number_input("Enter deposit amount", min_value=0, step=100, key="deposit_input")
             if st.button("Deposit", key="deposit_button"):
-                message = account.deposit(amount)
+                message, balance = get_account_cache().deposit(name, to_cents(amount))
                 st.info(message)
-                accounts_data[name] = account.to_dict()
-                save_data(accounts_data)
+                if balance is not None:
+                    get_ledger().record(name, "deposit", to_cents(amount), balance)
 
         elif action == "Withdraw":
             amount = st.number_input("Enter withdrawal amount", min_value=0, step=100, key="withdraw_input")
             if st.button("Withdraw", key="withdraw_button"):
-                message = account.withdraw(amount)
+                message, balance = get_account_cache().withdraw(name, to_cents(amount))
                 st.info(message)
-                accounts_data[name] = account.to_dict()
-                save_data(accounts_data)
+                if balance is not None:
+                    get_ledger().record(name, "withdraw", to_cents(amount), balance)
         
         st.write("---")
         if st.button("Logout"):
             st.session_state.logged_in = False
-            st.session_state.account = None
             st.session_state.user_name = ""
             st.success("You have been logged out successfully.")
\ No newline at end of file
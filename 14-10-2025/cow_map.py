@@ -0,0 +1,73 @@
+# --- CONFIGURATION ---
+SHARDS = 1024  # a write copies one shard and the shard table
+
+
+class CowMap:
+    """Immutable hash map split into ``shards`` small dicts.
+
+    ``set``/``delete`` return a new map that shares every untouched shard,
+    so a write costs one small dict copy plus a tuple of shard references
+    instead of a copy of the whole map, and existing readers keep their
+    unchanged view.
+    """
+    __slots__ = ("_shards", "_len")
+
+    def __init__(self, items=(), shards: int = SHARDS):
+        shards = [{} for _ in range(shards)]
+        for key, value in items:
+            shards[hash(key) % len(shards)][key] = value
+        self._shards = tuple(shards)
+        self._len = sum(len(shard) for shard in shards)
+
+    @classmethod
+    def _make(cls, shards: tuple, length: int) -> "CowMap":
+        new = cls.__new__(cls)
+        new._shards = shards
+        new._len = length
+        return new
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, key):
+        return key in self._shards[hash(key) % len(self._shards)]
+
+    def get(self, key, default=None):
+        return self._shards[hash(key) % len(self._shards)].get(key, default)
+
+    def values(self):
+        for shard in self._shards:
+            yield from shard.values()
+
+    def items(self):
+        for shard in self._shards:
+            yield from shard.items()
+
+    def set(self, key, value) -> "CowMap":
+        i = hash(key) % len(self._shards)
+        shard = dict(self._shards[i])
+        added = key not in shard
+        shard[key] = value
+        return self._make(self._shards[:i] + (shard,) + self._shards[i + 1:], self._len + added)
+
+    def update(self, items) -> "CowMap":
+        """Like repeated ``set`` but copies each touched shard once."""
+        shards, touched, length = list(self._shards), {}, self._len
+        for key, value in items:
+            i = hash(key) % len(self._shards)
+            shard = touched.get(i)
+            if shard is None:
+                shard = touched[i] = dict(shards[i])
+            length += key not in shard
+            shard[key] = value
+        for i, shard in touched.items():
+            shards[i] = shard
+        return self._make(tuple(shards), length)
+
+    def delete(self, key) -> "CowMap":
+        i = hash(key) % len(self._shards)
+        if key not in self._shards[i]:
+            return self
+        shard = dict(self._shards[i])
+        del shard[key]
+        return self._make(self._shards[:i] + (shard,) + self._shards[i + 1:], self._len - 1)
@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+from money import format_cents
+
+# --- CONFIGURATION ---
+WINDOW_SECONDS = 600       # sliding window per holder
+MAX_WITHDRAWALS = 5        # withdrawals allowed inside the window
+MAX_AMOUNT = 5_000_000     # total withdrawn allowed inside the window, in cents
+MAX_TRACKED = 100_000      # holders kept in memory at most
+IDLE_SECONDS = 3600        # holders with no activity this long are dropped
+
+
+class VelocityDetector:
+    """Streaming withdrawal-velocity check with bounded memory.
+
+    Each holder has a deque of ``(timestamp, amount)`` inside the sliding
+    window plus a running sum, so every event costs O(1) amortized: old
+    events are popped once and the sum is adjusted. Holders live in an
+    ``OrderedDict`` in least-recently-active order, which makes evicting
+    idle holders (and capping the total) cheap as well.
+    """
+
+    def __init__(self, window: float = WINDOW_SECONDS, max_count: int = MAX_WITHDRAWALS,
+                 max_amount: int = MAX_AMOUNT, max_tracked: int = MAX_TRACKED, idle: float = IDLE_SECONDS):
+        self.window = window
+        self.max_count = max_count
+        self.max_amount = max_amount
+        self.max_tracked = max_tracked
+        self.idle = idle
+        self.flagged = 0
+        self._holders = OrderedDict()  # holder -> [deque of (ts, amount), running sum, last seen]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._holders)
+
+    def check(self, holder: str, amount: int, ts: float = None):
+        """Records a withdrawal attempt; returns a reason string if it should be blocked.
+
+        Blocked attempts are not added to the window, so a holder is not
+        locked out longer because of retries.
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            state = self._holders.get(holder)
+            if state is None:
+                state = self._holders[holder] = [deque(), 0, ts]
+            else:
+                self._holders.move_to_end(holder)
+            events = state[0]
+            cutoff = ts - self.window
+            while events and events[0][0] <= cutoff:
+                state[1] -= events.popleft()[1]
+            state[2] = ts
+            self._evict(ts)
+
+            if len(events) + 1 > self.max_count:
+                self.flagged += 1
+                return f"more than {self.max_count} withdrawals in {self.window // 60:.0f} minutes"
+            if state[1] + amount > self.max_amount:
+                self.flagged += 1
+                return f"more than {format_cents(self.max_amount)} withdrawn in {self.window // 60:.0f} minutes"
+            events.append((ts, amount))
+            state[1] += amount
+            return None
+
+    def _evict(self, now: float):
+        # Least recently active holders sit at the front
+        holders = self._holders
+        while holders:
+            holder, state = next(iter(holders.items()))
+            if len(holders) <= self.max_tracked and state[2] > now - self.idle:
+                break
+            holders.popitem(last=False)
+
+
+# --- BENCHMARK ---
+def benchmark(n_events: int = 1_000_000, n_holders: int = 200_000):
+    """Feeds synthetic withdrawals through the detector and reports events/s."""
+    detector = VelocityDetector(max_tracked=50_000)
+    rng = random.Random(7)
+    hot = [f"holder{i}" for i in range(20)]  # a few accounts with bursts
+    events = [
+        (rng.choice(hot) if rng.random() < 0.01 else f"holder{rng.randrange(n_holders)}", rng.randrange(1_000, 200_000))
+        for _ in range(n_events)
+    ]
+    ts = time.time()
+    start = time.perf_counter()
+    for i, (holder, amount) in enumerate(events):
+        detector.check(holder, amount, ts + i * 0.01)
+    elapsed = time.perf_counter() - start
+    print(f"{n_events} events in {elapsed:.2f}s ({n_events / elapsed:,.0f} events/s, "
+          f"{elapsed / n_events * 1e6:.2f} us each); flagged {detector.flagged}, tracking {len(detector)} holders")
+
+
+if __name__ == "__main__":
+    benchmark()
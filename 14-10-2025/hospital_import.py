@@ -0,0 +1,209 @@
+import argparse
+import csv
+import io
+import os
+import random
+import time
+from datetime import datetime
+from itertools import islice
+
+from hospital_models import Doctor, Patient
+from hospital_repository import HospitalRepository
+from hospital_store import HospitalStore
+from id_allocator import IdAllocator
+from scheduling import default_hours
+
+# --- CONFIGURATION ---
+CHUNK_ROWS = 10_000  # rows validated per chunk (and IDs reserved per durable bump)
+MAX_ERRORS = 100     # rejected rows reported in detail; the rest are only counted
+COLUMNS = {
+    "doctor": ("name", "specialization", "password"),   # optional: start, end, slot_minutes
+    "patient": ("name", "age", "contact", "password"),
+}
+
+
+# --- RECORDS ---
+def doctor_record(user_id: int, name: str, specialization: str, password: str, hours: dict) -> dict:
+    return Doctor(user_id, name, specialization, password, hours).to_dict()
+
+
+def patient_record(user_id: int, name: str, age: int, contact: str, password: str) -> dict:
+    return Patient(user_id, name, age, contact, password).to_dict()
+
+
+# --- VALIDATION ---
+def _hhmm(value: str) -> str:
+    return f"{datetime.strptime(value, '%H:%M'):%H:%M}"
+
+
+def validate_doctor(row: dict) -> tuple:
+    """``(name, specialization, password, hours)`` from a CSV row; raises ValueError."""
+    hours = default_hours()
+    try:
+        if row.get("start"):
+            hours["start"] = _hhmm(row["start"])
+        if row.get("end"):
+            hours["end"] = _hhmm(row["end"])
+        if row.get("slot_minutes"):
+            hours["slot_minutes"] = int(row["slot_minutes"])
+    except ValueError:
+        raise ValueError("start/end must be HH:MM and slot_minutes a whole number")
+    if hours["start"] >= hours["end"]:
+        raise ValueError("start must be before end")
+    if not 5 <= hours["slot_minutes"] <= 240:
+        raise ValueError("slot_minutes must be between 5 and 240")
+    return row["name"], row["specialization"], row["password"], hours
+
+
+def validate_patient(row: dict) -> tuple:
+    """``(name, age, contact, password)`` from a CSV row; raises ValueError."""
+    try:
+        age = int(row["age"])
+    except ValueError:
+        raise ValueError(f"age {row['age']!r} is not a whole number")
+    if not 0 <= age <= 120:
+        raise ValueError(f"age {age} is outside 0-120")
+    return row["name"], age, row["contact"], row["password"]
+
+
+VALIDATORS = {"doctor": (validate_doctor, doctor_record), "patient": (validate_patient, patient_record)}
+
+
+# --- IMPORT ---
+def iter_chunks(f, role: str, chunk_rows: int = CHUNK_ROWS):
+    """Yields lists of ``(line number, row)`` from a CSV file, ``chunk_rows`` at a time."""
+    reader = csv.DictReader(f)
+    missing = [c for c in COLUMNS[role] if c not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+    rows = ((reader.line_num, row) for row in reader)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_csv(f, role: str, repo: HospitalRepository = None, ids: IdAllocator = None,
+               chunk_rows: int = CHUNK_ROWS, dry_run: bool = False) -> dict:
+    """Validates and imports doctors or patients from an open CSV file.
+
+    Rows are parsed and checked a chunk at a time; each chunk's valid rows
+    get IDs from one ``ids.take`` and become db records. Bad rows are
+    skipped and reported. Nothing is visible until the end, when every
+    record is added with one snapshot publish and one store flush. With
+    ``dry_run`` only validation runs and no records are kept.
+    """
+    validate, make_record = VALIDATORS[role]
+    required = COLUMNS[role]
+    summary = {"imported": 0, "rejected": 0, "errors": [], "records": []}
+    for chunk in iter_chunks(f, role, chunk_rows):
+        valid = []
+        for line, row in chunk:
+            row = {key: (value or "").strip() for key, value in row.items() if key is not None}
+            try:
+                empty = [c for c in required if not row.get(c)]
+                if empty:
+                    raise ValueError(f"missing {', '.join(empty)}")
+                valid.append(validate(row))
+            except ValueError as e:
+                summary["rejected"] += 1
+                if len(summary["errors"]) < MAX_ERRORS:
+                    summary["errors"].append((line, str(e)))
+        summary["imported"] += len(valid)
+        if dry_run or not valid:
+            continue
+        summary["records"].extend(make_record(user_id, *fields)
+                                  for user_id, fields in zip(ids.take(role, len(valid)), valid))
+    if summary["records"]:
+        repo.add_users(role, summary["records"])
+        if repo.store is not None:
+            repo.store.flush()
+    return summary
+
+
+def import_upload(upload, role: str, repo: HospitalRepository, ids: IdAllocator) -> dict:
+    """``import_csv`` for a binary upload (e.g. Streamlit's ``file_uploader``)."""
+    return import_csv(io.TextIOWrapper(upload, encoding="utf-8-sig", newline=""), role, repo, ids)
+
+
+# --- BENCHMARK ---
+def _make_csv(path: str, n: int, bad_every: int = 1_000):
+    rng = random.Random(21)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS["patient"])
+        for i in range(n):
+            age = "abc" if i % bad_every == 0 else rng.randrange(0, 100)
+            writer.writerow((f"Patient {i}", age, f"+1-555-{rng.randrange(10**7):07d}", f"pw{i}"))
+
+
+def benchmark(sizes=(20_000, 200_000, 1_000_000), import_rows: int = 200_000,
+              workdir: str = "hospital_import_bench"):
+    """Rows per second for validation alone and for a full import, with peak RSS.
+
+    The validation pass keeps no records, so its flat peak RSS shows the
+    parser's memory does not grow with the file; a full import also holds
+    the imported patients, which the in-memory db needs anyway.
+    """
+    import resource
+    import shutil
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    src = os.path.join(workdir, "patients.csv")
+    for n in sizes:
+        _make_csv(src, n)
+        start = time.perf_counter()
+        with open(src, newline="") as f:
+            summary = import_csv(f, "patient", dry_run=True)
+        elapsed = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        print(f"validate {n:>9,} rows: {n / elapsed:>9,.0f} rows/s, {summary['rejected']} rejected, "
+              f"peak RSS {peak:.1f} MiB")
+    n = import_rows
+    _make_csv(src, n)
+    store = HospitalStore(os.path.join(workdir, "data"), {"next_ids": {}}, background=False)
+    repo, ids = HospitalRepository(store.db, store), IdAllocator(os.path.join(workdir, "data", "ids.json"))
+    store.flushes = store.bytes_written = 0
+    start = time.perf_counter()
+    with open(src, newline="") as f:
+        summary = import_csv(f, "patient", repo, ids)
+    elapsed = time.perf_counter() - start
+    print(f"import   {n:>9,} rows: {n / elapsed:>9,.0f} rows/s ({summary['imported']:,} patients, "
+          f"{ids.reservations} ID reservations, {store.flushes} flush, {store.bytes_written / 2**20:.1f} MiB written)")
+    shutil.rmtree(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import doctors or patients from CSV.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("import", help="import a CSV file into the hospital data")
+    p.add_argument("file")
+    p.add_argument("--role", choices=sorted(COLUMNS), required=True)
+    p.add_argument("--data-dir", default="hospital_data", help="hospital segment directory")
+    p.add_argument("--dry-run", action="store_true", help="validate only")
+    bench = sub.add_parser("bench", help="throughput and memory benchmark")
+    bench.add_argument("--rows", type=int, nargs="+", default=[20_000, 200_000, 1_000_000])
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        benchmark(args.rows)
+        return
+    if not os.path.exists(os.path.join(args.data_dir, "next_ids.json")):
+        parser.error(f"{args.data_dir} holds no hospital data; start the app once to create it")
+    store = HospitalStore(args.data_dir, background=False)
+    repo = HospitalRepository(store.db, store)
+    ids = IdAllocator(os.path.join(args.data_dir, "ids.json"), floor=store.db["next_ids"])
+    start = time.perf_counter()
+    with open(args.file, newline="", encoding="utf-8-sig") as f:
+        summary = import_csv(f, args.role, repo, ids, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - start
+    verb = "valid" if args.dry_run else "imported"
+    print(f"{summary['imported']:,} {args.role}s {verb}, {summary['rejected']:,} rejected in {elapsed:.1f}s")
+    for line, error in summary["errors"]:
+        print(f"  line {line}: {error}")
+
+
+if __name__ == "__main__":
+    main()
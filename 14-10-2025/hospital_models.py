@@ -0,0 +1,288 @@
+import gc
+import json
+import random
+import time
+import tracemalloc
+from array import array
+from datetime import date
+from operator import itemgetter
+
+from scheduling import default_hours
+
+# --- CONFIGURATION ---
+STATUSES = ["Pending", "Confirmed", "Completed", "Cancelled"]  # AppointmentTable status codes; new ones are appended
+
+
+# --- MODELS ---
+class User:
+    """Base for every hospital user; ``__slots__`` instead of a per-instance ``__dict__``."""
+    __slots__ = ("user_id", "name", "role", "password")
+
+    def __init__(self, user_id, name, role, password):
+        self.user_id = user_id
+        self.name = name
+        self.role = role
+        self.password = password
+
+    def to_dict(self) -> dict:
+        """The db record: a new dict of every slot."""
+        return {"user_id": self.user_id, "name": self.name, "role": self.role, "password": self.password}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "User":
+        return cls(data["user_id"], data["name"], data["role"], data["password"])
+
+
+class Doctor(User):
+    """A doctor; ``patients`` is a set (created on the first patient) so adding one is O(1)."""
+    __slots__ = ("specialization", "hours", "patients")
+
+    def __init__(self, user_id, name, specialization, password, hours=None, patients=None):
+        super().__init__(user_id, name, "doctor", password)
+        self.specialization = specialization
+        self.hours = hours or default_hours()
+        self.patients = set(patients) if patients else None
+
+    def add_patient(self, patient_id):
+        if self.patients is None:
+            self.patients = set()
+        self.patients.add(patient_id)
+
+    def to_dict(self) -> dict:
+        return {"user_id": self.user_id, "name": self.name, "role": "doctor", "password": self.password,
+                "specialization": self.specialization, "hours": self.hours,
+                "patients": sorted(self.patients) if self.patients else []}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Doctor":
+        return cls(data["user_id"], data["name"], data["specialization"], data["password"],
+                   data.get("hours"), data.get("patients"))
+
+
+class Patient(User):
+    """A patient; ``appointments`` is a set (created on the first booking)."""
+    __slots__ = ("age", "contact", "appointments")
+
+    def __init__(self, user_id, name, age, contact, password, appointments=None):
+        super().__init__(user_id, name, "patient", password)
+        self.age = age
+        self.contact = contact
+        self.appointments = set(appointments) if appointments else None
+
+    def book_appointment(self, appointment_id):
+        if self.appointments is None:
+            self.appointments = set()
+        self.appointments.add(appointment_id)
+
+    def to_dict(self) -> dict:
+        return {"user_id": self.user_id, "name": self.name, "role": "patient", "password": self.password,
+                "age": self.age, "contact": self.contact,
+                "appointments": sorted(self.appointments) if self.appointments else []}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Patient":
+        return cls(data["user_id"], data["name"], data["age"], data["contact"], data["password"],
+                   data.get("appointments"))
+
+
+class Appointment:
+    __slots__ = ("appointment_id", "patient_id", "doctor_id", "date", "status", "time")
+
+    def __init__(self, appointment_id, patient_id, doctor_id, date, status="Pending", time=None):
+        self.appointment_id = appointment_id
+        self.patient_id = patient_id
+        self.doctor_id = doctor_id
+        self.date = date
+        self.status = status
+        self.time = time
+
+    def to_dict(self) -> dict:
+        return {"appointment_id": self.appointment_id, "patient_id": self.patient_id, "doctor_id": self.doctor_id,
+                "date": self.date, "time": self.time, "status": self.status}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Appointment":
+        return cls(data["appointment_id"], data["patient_id"], data["doctor_id"], data["date"],
+                   data.get("status", "Pending"), data.get("time"))
+
+
+# --- BULK CONVERSION ---
+# Only benchmark() uses these and AppointmentTable so far; the store still keeps db records.
+def patients_from_dicts(records) -> list:
+    """``Patient`` objects for db records; missing appointment lists are treated as empty."""
+    return [Patient(r["user_id"], r["name"], r["age"], r["contact"], r["password"], r.get("appointments"))
+            for r in records]
+
+
+def appointments_from_dicts(records) -> list:
+    """``Appointment`` objects for db records, sharing one string per distinct date, time and status."""
+    shared = {}
+    appts = []
+    for r in records:
+        day, hhmm, status = r["date"], r.get("time"), r.get("status", "Pending")
+        appts.append(Appointment(r["appointment_id"], r["patient_id"], r["doctor_id"], shared.setdefault(day, day),
+                                 shared.setdefault(status, status), shared.setdefault(hhmm, hhmm)))
+    return appts
+
+
+def to_dicts(models) -> list:
+    return [model.to_dict() for model in models]
+
+
+class AppointmentTable:
+    """Appointments as parallel typed arrays: about 19 bytes each instead of an object.
+
+    Dates are stored as day ordinals, times as minutes after midnight (-1
+    for none) and statuses as codes into ``statuses``. ``to_columns`` /
+    ``from_columns`` serialize one JSON list per field, so loading builds
+    no per-appointment dict at all; ``from_dicts`` / ``to_dicts`` convert
+    from and to the db record format.
+    """
+    FIELDS = ("appointment_id", "patient_id", "doctor_id", "day", "minute", "status")
+    TYPECODES = ("I", "I", "I", "I", "h", "B")
+
+    def __init__(self, statuses=None):
+        self.statuses = list(statuses or STATUSES)
+        self._codes = {status: i for i, status in enumerate(self.statuses)}
+        for field, typecode in zip(self.FIELDS, self.TYPECODES):
+            setattr(self, field, array(typecode))
+
+    def __len__(self):
+        return len(self.appointment_id)
+
+    def _code(self, status: str) -> int:
+        code = self._codes.get(status)
+        if code is None:
+            code = self._codes[status] = len(self.statuses)
+            self.statuses.append(status)
+        return code
+
+    def append(self, appt_id: int, patient_id: int, doctor_id: int, day: str, hhmm: str = None,
+               status: str = "Pending"):
+        self.appointment_id.append(appt_id)
+        self.patient_id.append(patient_id)
+        self.doctor_id.append(doctor_id)
+        self.day.append(date.fromisoformat(day).toordinal())
+        self.minute.append(int(hhmm[:2]) * 60 + int(hhmm[3:]) if hhmm else -1)
+        self.status.append(self._code(status))
+
+    def record(self, i: int) -> dict:
+        """Row ``i`` in the db format."""
+        minute = self.minute[i]
+        return {"appointment_id": self.appointment_id[i], "patient_id": self.patient_id[i],
+                "doctor_id": self.doctor_id[i], "date": date.fromordinal(self.day[i]).isoformat(),
+                "time": f"{minute // 60:02d}:{minute % 60:02d}" if minute >= 0 else None,
+                "status": self.statuses[self.status[i]]}
+
+    # --- SERIALIZATION ---
+    @classmethod
+    def from_dicts(cls, records) -> "AppointmentTable":
+        table = cls()
+        get = itemgetter("appointment_id", "patient_id", "doctor_id", "date")
+        days = {}  # most appointments share a few hundred dates; parse each once
+        for r in records:
+            appt_id, patient_id, doctor_id, day = get(r)
+            ordinal = days.get(day)
+            if ordinal is None:
+                ordinal = days[day] = date.fromisoformat(day).toordinal()
+            hhmm = r.get("time")
+            table.appointment_id.append(appt_id)
+            table.patient_id.append(patient_id)
+            table.doctor_id.append(doctor_id)
+            table.day.append(ordinal)
+            table.minute.append(int(hhmm[:2]) * 60 + int(hhmm[3:]) if hhmm else -1)
+            table.status.append(table._code(r.get("status", "Pending")))
+        return table
+
+    def to_dicts(self):
+        """Yields every row in the db format."""
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def to_columns(self) -> dict:
+        return {"statuses": self.statuses, **{field: getattr(self, field).tolist() for field in self.FIELDS}}
+
+    @classmethod
+    def from_columns(cls, data: dict) -> "AppointmentTable":
+        table = cls(data["statuses"])
+        for field, typecode in zip(cls.FIELDS, cls.TYPECODES):
+            setattr(table, field, array(typecode, data[field]))
+        return table
+
+
+# --- BENCHMARK ---
+def _size(build, sample: int) -> float:
+    """Bytes per record that ``build(sample)`` keeps alive, measured with tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    kept = build(sample)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / sample
+
+
+def benchmark(n_patients: int = 1_000_000, n_appointments: int = 10_000_000, sample: int = 200_000):
+    """Memory per record and load time from the db format: dicts vs slotted objects vs typed arrays.
+
+    Bytes per record are measured on ``sample`` records (tracemalloc is
+    slow) and scaled; load times are measured at full size from JSON text.
+    """
+    rng = random.Random(25)
+    days = [date(2026, 1, 1).toordinal() + d for d in range(365)]
+
+    def patient_dicts(n):
+        return [{"user_id": i, "name": f"Patient {i}", "role": "patient", "password": f"pw{i}",
+                 "age": rng.randrange(100), "contact": f"555-{i:07d}", "appointments": []} for i in range(n)]
+
+    def appointment_dicts(n):
+        return [{"appointment_id": i, "patient_id": rng.randrange(n_patients), "doctor_id": rng.randrange(5_000),
+                 "date": date.fromordinal(rng.choice(days)).isoformat(), "time": f"{rng.randrange(9, 17):02d}:00",
+                 "status": rng.choice(STATUSES)} for i in range(n)]
+
+    print(f"memory per record (measured on {sample:,}, scaled to {n_patients:,} patients / "
+          f"{n_appointments:,} appointments):")
+    rows = [
+        ("patient dicts", n_patients, lambda n: patient_dicts(n)),
+        ("slotted Patient", n_patients, lambda n: patients_from_dicts(patient_dicts(n))),
+        ("appointment dicts", n_appointments, lambda n: appointment_dicts(n)),
+        ("slotted Appointment", n_appointments, lambda n: appointments_from_dicts(appointment_dicts(n))),
+        ("AppointmentTable", n_appointments, lambda n: AppointmentTable.from_dicts(appointment_dicts(n))),
+    ]
+    for label, n, build in rows:
+        per = _size(build, sample)
+        print(f"  {label:>20}: {per:6.0f} B/record -> {per * n / 2**20:8,.0f} MiB")
+
+    # Load times at full size, from the text each format is stored as
+    text = json.dumps(patient_dicts(n_patients))
+    start = time.perf_counter()
+    patients = patients_from_dicts(json.loads(text))
+    print(f"load {n_patients:,} patients (JSON records -> slotted): {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    json.dumps(to_dicts(patients))
+    print(f"dump {n_patients:,} patients (slotted -> JSON records): {time.perf_counter() - start:.1f}s")
+    del patients, text
+
+    chunk = 1_000_000  # build the appointment JSON a segment-sized million at a time to bound memory
+    table = AppointmentTable()
+    record_load = 0.0
+    for _ in range(n_appointments // chunk):
+        text = json.dumps(appointment_dicts(chunk))
+        start = time.perf_counter()
+        part = AppointmentTable.from_dicts(json.loads(text))
+        record_load += time.perf_counter() - start
+        for field in AppointmentTable.FIELDS:
+            getattr(table, field).extend(getattr(part, field))
+    print(f"load {len(table):,} appointments (JSON records -> AppointmentTable): {record_load:.1f}s")
+    start = time.perf_counter()
+    text = json.dumps(table.to_columns(), separators=(",", ":"))
+    dumped = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = AppointmentTable.from_columns(json.loads(text))
+    print(f"columns: dump {dumped:.1f}s, load {time.perf_counter() - start:.1f}s "
+          f"({len(text) / 2**20:,.0f} MiB, no per-appointment dicts)")
+    assert loaded.record(12_345) == table.record(12_345)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,572 @@
+import random
+import threading
+import time
+from bisect import insort
+from contextlib import contextmanager
+from operator import itemgetter
+
+from cow_map import CowMap
+from hospital_stats import Stats, appointment_keys
+
+# --- CONFIGURATION ---
+ROLES = ("admin", "doctor", "patient")
+
+_user_id = itemgetter("user_id")
+
+
+def collection(role: str) -> str:
+    """Name of the db list holding users of ``role`` (``doctor`` -> ``doctors``)."""
+    return role + "s"
+
+
+def _with(index: CowMap, key, item_id, record) -> CowMap:
+    """``index`` with ``record`` added to the ``{item_id: record}`` bucket under ``key``.
+
+    Copies the whole bucket, so a write costs O(bucket): a few microseconds
+    for a patient's or doctor's bucket, about 20 us for a date holding 3,000
+    appointments. Buckets stay plain dicts because their readers rely on
+    booking (insertion) order, which a sharded ``CowMap`` would not keep.
+    """
+    bucket = dict(index.get(key, ()))
+    bucket[item_id] = record
+    return index.set(key, bucket)
+
+
+def _without(index: CowMap, key, item_id) -> CowMap:
+    bucket = index.get(key)
+    if bucket is None or item_id not in bucket:
+        return index
+    if len(bucket) == 1:
+        return index.delete(key)
+    bucket = dict(bucket)
+    del bucket[item_id]
+    return index.set(key, bucket)
+
+
+class Snapshot:
+    """One consistent, read-only version of every index.
+
+    Users are indexed by ``user_id`` and by name per role; appointments by
+    ID and, as secondary indexes, by doctor, patient and date. Secondary
+    index buckets are ``{appointment_id: record}`` dicts in booking order.
+    ``stats`` holds the appointment counters for the admin dashboard.
+    Nothing reachable from a snapshot is ever mutated, except that newer
+    snapshots append to the ID-sorted user lists past the part this one
+    reads, so a page can render from one without locks while writers
+    publish newer versions.
+    """
+    __slots__ = ("version", "users", "by_name", "appointments", "by_doctor", "by_patient", "by_date", "stats",
+                 "_ordered")
+
+    def __init__(self, version, users, by_name, appointments, by_doctor, by_patient, by_date, stats,
+                 _ordered=None):
+        self.version = version
+        self.users = users              # role -> CowMap(user_id -> record)
+        self.by_name = by_name          # role -> CowMap(name -> {user_id: record})
+        self.appointments = appointments  # CowMap(appointment_id -> record)
+        self.by_doctor = by_doctor
+        self.by_patient = by_patient
+        self.by_date = by_date
+        self.stats = stats
+        # role -> (users sorted by ID, how many of them this snapshot has), built on demand
+        self._ordered = {} if _ordered is None else _ordered
+
+    def replace(self, **changes) -> "Snapshot":
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes, version=self.version + 1)
+        if "users" in changes and "_ordered" not in changes:
+            fields["_ordered"] = None  # bookings keep sharing the sorted lists; edited users rebuild them
+        return Snapshot(**fields)
+
+    def ordered_with(self, role: str, added: list) -> dict:
+        """``_ordered`` for the next snapshot once ``added`` (new users, sorted by ID) join ``role``.
+
+        The sorted list is shared and append-only: new IDs are allocated in
+        order, so usually they go on the end in place, and every older
+        snapshot keeps reading only its first ``n`` entries. Otherwise the
+        entries are copied and the new users inserted into the copy.
+        """
+        ordered = dict(self._ordered)
+        entry = ordered.get(role)
+        if entry is not None and added:
+            users, n = entry
+            if len(users) == n and (not n or _user_id(users[-1]) < _user_id(added[0])):
+                users.extend(added)
+            elif len(added) == 1:
+                users = users[:n]
+                insort(users, added[0], key=_user_id)
+            else:
+                users = users[:n] + added
+                users.sort(key=_user_id)  # two sorted runs: one linear merge
+            ordered[role] = (users, n + len(added))
+        return ordered
+
+    # --- USERS ---
+    def user(self, role: str, user_id: int):
+        return self.users[role].get(user_id)
+
+    def users_named(self, role: str, name: str) -> list:
+        return list(self.by_name[role].get(name, {}).values())
+
+    def authenticate(self, role: str, name: str, password: str):
+        """The user of ``role`` with this name and password, or None."""
+        for user in self.by_name[role].get(name, {}).values():
+            if user["password"] == password:
+                return user
+        return None
+
+    def count(self, role: str) -> int:
+        return len(self.users[role])
+
+    def all_users(self, role: str) -> list:
+        """Every user of ``role``, ordered by ID (sorted once, then kept in order as users are added)."""
+        entry = self._ordered.get(role)
+        if entry is None:
+            ordered = sorted(self.users[role].values(), key=_user_id)
+            self._ordered[role] = (ordered, len(ordered))
+            return ordered
+        ordered, n = entry
+        if len(ordered) != n:  # a newer snapshot has appended to the shared list
+            ordered = ordered[:n]
+            self._ordered[role] = (ordered, n)
+        return ordered
+
+    def find_users(self, role: str, name: str = "", specialization: str = "", min_age: int = None,
+                   max_age: int = None) -> list:
+        """Users of ``role`` by ID, filtered on name/specialization substrings and an age range.
+
+        With no filters this is the shared sorted list itself (no copy);
+        callers slice the page they show, and a user added meanwhile can
+        at most appear after the end of it.
+        """
+        users = self.all_users(role)
+        name, specialization = name.casefold(), specialization.casefold()
+        if not (name or specialization or min_age is not None or max_age is not None):
+            return users
+
+        def keep(user):
+            age = user.get("age")
+            return ((not name or name in user["name"].casefold())
+                    and (not specialization or specialization in user.get("specialization", "").casefold())
+                    and (min_age is None or (age is not None and age >= min_age))
+                    and (max_age is None or (age is not None and age <= max_age)))
+
+        return [user for user in users if keep(user)]
+
+    # --- APPOINTMENTS ---
+    def appointment(self, appointment_id: int):
+        return self.appointments.get(appointment_id)
+
+    def appointments_for_doctor(self, doctor_id: int) -> list:
+        return list(self.by_doctor.get(doctor_id, {}).values())
+
+    def appointments_for_patient(self, patient_id: int) -> list:
+        return list(self.by_patient.get(patient_id, {}).values())
+
+    def appointments_on(self, date: str) -> list:
+        return list(self.by_date.get(date, {}).values())
+
+    def specialization_of(self, doctor_id: int) -> str:
+        doctor = self.users["doctor"].get(doctor_id)
+        return doctor.get("specialization", "") if doctor is not None else ""
+
+    def appointment_keys(self, appt: dict) -> tuple:
+        return appointment_keys(appt, self.specialization_of(appt["doctor_id"]))
+
+
+class HospitalRepository:
+    """Indexed access to the hospital db with copy-on-write snapshots.
+
+    Writers run under one lock, build the next ``Snapshot`` from the
+    current one and publish it with a single reference assignment; readers
+    take ``repo.snapshot`` once per page and see either all of a write or
+    none of it. Records are replaced, never mutated. The repository also
+    keeps the db lists up to date and, given a ``HospitalStore``, marks
+    each changed record for flushing.
+
+    Appointment stats are persisted as the store's ``stats`` document and
+    rebuilt with one scan when that is missing or older than the segments.
+
+    Other processes may write to the same store. Every write holds the
+    store's file lock and first merges any flush it has not seen yet
+    (``refresh``), so it is applied on top of their records rather than
+    flushed over them; reruns call ``refresh`` to pick them up for reading.
+    """
+
+    def __init__(self, db: dict, store=None):
+        self.db = db
+        self.store = store
+        self._lock = store.lock if store is not None else threading.RLock()
+        self.generation = store.generation if store is not None else 0  # store.generation the snapshot matches
+        self.snapshot = None
+        with self._lock:
+            self._build()
+        if store is not None:
+            store.register("stats", self._stats_document)
+
+    def _build(self):
+        """Indexes the whole db into a new snapshot (at startup and after a merge)."""
+        db, store = self.db, self.store
+        users, by_name = {}, {}
+        for role in ROLES:
+            records = db.get(collection(role), [])
+            users[role] = CowMap((user["user_id"], user) for user in records)
+            names = {}
+            for user in records:
+                names.setdefault(user["name"], {})[user["user_id"]] = user
+            by_name[role] = CowMap(names.items())
+        appts = db.get("appointments", [])
+        snap = Snapshot(self.snapshot.version + 1 if self.snapshot else 0, users, by_name,
+                        CowMap((a["appointment_id"], a) for a in appts),
+                        *(CowMap(self._group(appts, field).items()) for field in ("doctor_id", "patient_id", "date")),
+                        None)
+        # The saved document only describes the segments, not records merged in but not yet flushed
+        stats = store.load_document("stats") if store is not None and not store.dirty else None
+        snap.stats = Stats.from_dict(stats) if stats is not None else self.rebuild_stats(snap)
+        self.snapshot = snap
+        if store is not None:
+            self.generation = store.generation
+
+    def _stats_document(self):
+        # None (skip this flush) while the snapshot predates a merge the store has done
+        return self.snapshot.stats.to_dict() if self.generation == self.store.generation else None
+
+    def refresh(self, exact: bool = False) -> bool:
+        """Merges another process's flush and re-indexes; True if the snapshot was rebuilt.
+
+        One stat when nothing changed, so it is cheap enough for every rerun;
+        ``exact`` (used before writes) compares the on-disk version instead.
+        """
+        if self.store is None:
+            return False
+        with self._lock:
+            self.store.refresh(exact)
+            if self.generation == self.store.generation:
+                return False
+            self._build()
+            return True
+
+    @contextmanager
+    def _writing(self):
+        """Holds the write lock(s), with the snapshot caught up to every flush on disk."""
+        if self.store is None:
+            with self._lock:
+                yield
+            return
+        with self.store.locked():
+            self.refresh(exact=True)
+            yield
+
+    def rebuild_stats(self, snap: Snapshot = None) -> Stats:
+        """Stats recomputed from every appointment (compare with ``snapshot.stats`` to verify)."""
+        snap = snap or self.snapshot
+        return Stats.from_appointments(snap.appointments.values(), snap.specialization_of)
+
+    @staticmethod
+    def _group(appts, field) -> dict:
+        groups = {}
+        for appt in appts:
+            groups.setdefault(appt[field], {})[appt["appointment_id"]] = appt
+        return groups
+
+    # --- USERS ---
+    def add_user(self, role: str, user: dict) -> dict:
+        with self._writing():
+            snap = self.snapshot
+            self.db[collection(role)].append(user)
+            if self.store is not None:
+                self.store.mark(collection(role), user)
+            self.snapshot = snap.replace(
+                users={**snap.users, role: snap.users[role].set(user["user_id"], user)},
+                by_name={**snap.by_name, role: _with(snap.by_name[role], user["name"], user["user_id"], user)},
+                _ordered=self._ordered_after(snap, role, [user]),
+            )
+        return user
+
+    @staticmethod
+    def _ordered_after(snap: Snapshot, role: str, users: list) -> dict:
+        if any(user["user_id"] in snap.users[role] for user in users):
+            return None  # an ID was replaced rather than added: sort again on demand
+        return snap.ordered_with(role, sorted(users, key=_user_id))
+
+    def add_users(self, role: str, users: list) -> list:
+        """Adds many users with one snapshot publish (bulk imports)."""
+        with self._writing():
+            snap = self.snapshot
+            if self.store is not None:
+                self.store.extend(collection(role), users)
+            else:
+                self.db[collection(role)].extend(users)
+            names = snap.by_name[role]
+            buckets = {}
+            for user in users:
+                bucket = buckets.get(user["name"])
+                if bucket is None:
+                    bucket = buckets[user["name"]] = dict(names.get(user["name"], ()))
+                bucket[user["user_id"]] = user
+            self.snapshot = snap.replace(
+                users={**snap.users, role: snap.users[role].update((user["user_id"], user) for user in users)},
+                by_name={**snap.by_name, role: names.update(buckets.items())},
+                _ordered=self._ordered_after(snap, role, users),
+            )
+        return users
+
+    def update_user(self, role: str, user_id: int, **fields) -> dict:
+        with self._writing():
+            snap = self.snapshot
+            old = snap.users[role].get(user_id)
+            user = {**old, **fields}
+            self._replace_record(collection(role), old, user)
+            names = _with(_without(snap.by_name[role], old["name"], user_id), user["name"], user_id, user)
+            self.snapshot = snap.replace(
+                users={**snap.users, role: snap.users[role].set(user_id, user)},
+                by_name={**snap.by_name, role: names},
+            )
+        return user
+
+    def _replace_record(self, name: str, old: dict, new: dict):
+        if self.store is not None:
+            self.store.replace(name, old, new)
+        else:
+            records = self.db[name]
+            records[records.index(old)] = new
+
+    # --- APPOINTMENTS ---
+    def add_appointment(self, appt: dict) -> dict:
+        with self._writing():
+            snap = self.snapshot
+            appt_id = appt["appointment_id"]
+            self.db["appointments"].append(appt)
+            if self.store is not None:
+                self.store.mark("appointments", appt)
+            self.snapshot = snap.replace(
+                appointments=snap.appointments.set(appt_id, appt),
+                by_doctor=_with(snap.by_doctor, appt["doctor_id"], appt_id, appt),
+                by_patient=_with(snap.by_patient, appt["patient_id"], appt_id, appt),
+                by_date=_with(snap.by_date, appt["date"], appt_id, appt),
+                stats=snap.stats.changed((), snap.appointment_keys(appt)),
+            )
+        return appt
+
+    def update_appointment(self, appointment_id: int, **fields) -> dict:
+        """Replaces an appointment with updated fields and moves it between index buckets."""
+        with self._writing():
+            snap = self.snapshot
+            old = snap.appointments.get(appointment_id)
+            appt = {**old, **fields}
+            self._replace_record("appointments", old, appt)
+            changes = {"appointments": snap.appointments.set(appointment_id, appt),
+                       "stats": snap.stats.changed(snap.appointment_keys(old), snap.appointment_keys(appt))}
+            for name, field in (("by_doctor", "doctor_id"), ("by_patient", "patient_id"), ("by_date", "date")):
+                index = _without(getattr(snap, name), old[field], appointment_id)
+                changes[name] = _with(index, appt[field], appointment_id, appt)
+            self.snapshot = snap.replace(**changes)
+        return appt
+
+    # --- READS (on the current snapshot) ---
+    def user(self, role: str, user_id: int):
+        return self.snapshot.user(role, user_id)
+
+    def users_named(self, role: str, name: str) -> list:
+        return self.snapshot.users_named(role, name)
+
+    def authenticate(self, role: str, name: str, password: str):
+        return self.snapshot.authenticate(role, name, password)
+
+    def count(self, role: str) -> int:
+        return self.snapshot.count(role)
+
+    def appointment(self, appointment_id: int):
+        return self.snapshot.appointment(appointment_id)
+
+    def appointments_for_doctor(self, doctor_id: int) -> list:
+        return self.snapshot.appointments_for_doctor(doctor_id)
+
+    def appointments_for_patient(self, patient_id: int) -> list:
+        return self.snapshot.appointments_for_patient(patient_id)
+
+    def appointments_on(self, date: str) -> list:
+        return self.snapshot.appointments_on(date)
+
+
+# --- BENCHMARK ---
+def benchmark(n_patients: int = 200_000, n_doctors: int = 2_000, n_appointments: int = 1_000_000):
+    """Compares dashboard queries as list scans against the repository indexes."""
+    rng = random.Random(3)
+    db = {
+        "admins": [],
+        "doctors": [{"user_id": i, "name": f"doc{i}", "role": "doctor", "password": "x"} for i in range(n_doctors)],
+        "patients": [{"user_id": i, "name": f"pat{i}", "role": "patient", "password": "x"} for i in range(n_patients)],
+        "appointments": [
+            {"appointment_id": i, "patient_id": rng.randrange(n_patients), "doctor_id": rng.randrange(n_doctors),
+             "date": f"2026-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}", "status": "Pending"}
+            for i in range(n_appointments)
+        ],
+    }
+    start = time.perf_counter()
+    repo = HospitalRepository(db)
+    print(f"indexed {n_patients} patients, {n_appointments} appointments in {time.perf_counter() - start:.2f}s")
+
+    queries = 20
+    start = time.perf_counter()
+    for _ in range(queries):
+        doctor_id, patient_id = rng.randrange(n_doctors), rng.randrange(n_patients)
+        next(u for u in db["patients"] if u["name"] == f"pat{patient_id}" and u["password"] == "x")
+        [a for a in db["appointments"] if a["doctor_id"] == doctor_id]
+        [a for a in db["appointments"] if a["patient_id"] == patient_id]
+    scan = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        doctor_id, patient_id = rng.randrange(n_doctors), rng.randrange(n_patients)
+        repo.authenticate("patient", f"pat{patient_id}", "x")
+        repo.appointments_for_doctor(doctor_id)
+        repo.appointments_for_patient(patient_id)
+    indexed = (time.perf_counter() - start) / queries
+    print(f"login + doctor and patient dashboards: scan {scan * 1000:.1f} ms, indexed {indexed * 1000:.3f} ms "
+          f"({scan / indexed:,.0f}x)")
+
+    writes = 1_000
+    start = time.perf_counter()
+    for i in range(writes):
+        repo.add_appointment({"appointment_id": n_appointments + i, "patient_id": rng.randrange(n_patients),
+                              "doctor_id": rng.randrange(n_doctors), "date": "2026-06-01", "status": "Pending"})
+    print(f"copy-on-write booking: {(time.perf_counter() - start) / writes * 1e6:.0f} us per publish")
+
+
+def _percentile(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def sessions_benchmark(sessions: int = 100, n_patients: int = 5_000, n_doctors: int = 200,
+                       n_appointments: int = 50_000, workdir: str = "hospital_sessions_bench"):
+    """Rerun latency for ``sessions`` concurrent sessions: read_db per rerun vs the shared snapshot.
+
+    A rerun is what the patient dashboard does: get the db, log in, list the
+    patient's appointments. During the shared run a writer keeps booking on
+    one date and every reader checks its snapshot holds all of each booking
+    or none of it.
+    """
+    import json
+    import os
+    import shutil
+
+    from hospital_store import HospitalStore
+
+    rng = random.Random(4)
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    db = {
+        "admins": [],
+        "doctors": [{"user_id": i, "name": f"doc{i}", "role": "doctor", "password": "x"} for i in range(n_doctors)],
+        "patients": [{"user_id": i, "name": f"pat{i}", "role": "patient", "password": "x"} for i in range(n_patients)],
+        "appointments": [
+            {"appointment_id": i, "patient_id": rng.randrange(n_patients), "doctor_id": rng.randrange(n_doctors),
+             "date": f"2026-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}", "status": "Pending"}
+            for i in range(n_appointments)
+        ],
+        "next_ids": {"doctor": n_doctors, "patient": n_patients, "appointment": n_appointments},
+    }
+    legacy = os.path.join(workdir, "data.json")
+    with open(legacy, "w") as f:
+        json.dump(db, f, indent=4)
+
+    def run(rerun, reruns: int) -> list:
+        latencies = [[] for _ in range(sessions)]
+
+        def session(i):
+            for _ in range(reruns):
+                start = time.perf_counter()
+                rerun(i)
+                latencies[i].append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return [t for per_session in latencies for t in per_session]
+
+    def read_db_rerun(i):
+        with open(legacy, "r") as f:
+            data = json.load(f)
+        patient_id = i % n_patients
+        next(u for u in data["patients"] if u["name"] == f"pat{patient_id}" and u["password"] == "x")
+        [a for a in data["appointments"] if a["patient_id"] == patient_id]
+
+    before = run(read_db_rerun, 1)
+
+    store = HospitalStore(os.path.join(workdir, "segments"), legacy_file=legacy)
+    repo = HospitalRepository(store.db, store)
+    write_date, base = "2027-01-01", len(repo.snapshot.appointments)
+    torn = []
+
+    def shared_rerun(i):
+        store.stale()
+        snap = repo.snapshot
+        patient_id = i % n_patients
+        snap.authenticate("patient", f"pat{patient_id}", "x")
+        snap.appointments_for_patient(patient_id)
+        if len(snap.appointments) - base != len(snap.appointments_on(write_date)):
+            torn.append(snap.version)
+
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            with store.lock:
+                appt_id = store.db["next_ids"]["appointment"] + 1
+                store.db["next_ids"]["appointment"] = appt_id
+                repo.add_appointment({"appointment_id": appt_id, "patient_id": rng.randrange(n_patients),
+                                      "doctor_id": rng.randrange(n_doctors), "date": write_date, "status": "Pending"})
+                store.mark("next_ids")
+            time.sleep(0.001)
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    after = run(shared_rerun, 50)
+    stop.set()
+    writer_thread.join()
+    store.close()
+    shutil.rmtree(workdir)
+
+    print(f"{sessions} concurrent sessions, {n_patients} patients, {n_appointments} appointments:")
+    for label, samples in (("read_db per rerun", before), ("shared snapshot  ", after)):
+        print(f"  {label}: p50 {_percentile(samples, 0.5) * 1000:9.3f} ms, p99 {_percentile(samples, 0.99) * 1000:9.3f} ms")
+    print(f"  p50 {_percentile(before, 0.5) / _percentile(after, 0.5):,.0f}x lower; "
+          f"{len(repo.snapshot.appointments) - base} bookings published during the run, {len(torn)} torn reads")
+
+
+def listing_benchmark(n_patients: int = 50_000, page_size: int = 50):
+    """What the admin patient list sends per rerun: every record vs one filtered page."""
+    import json
+
+    rng = random.Random(23)
+    db = {"patients": [{"user_id": i, "name": f"Patient {i}", "role": "patient", "password": "x",
+                        "age": rng.randrange(0, 100), "contact": f"555-{i:07d}"} for i in range(n_patients)]}
+    snap = HospitalRepository(db).snapshot
+    snap.all_users("patient")  # sorted once per change to the patients, not per rerun
+
+    start = time.perf_counter()
+    elements = [json.dumps(f"{p['name']} (Age: {p['age']}, Contact: {p['contact']})") for p in db["patients"]]
+    every = time.perf_counter() - start
+    sent = sum(map(len, elements))
+
+    reruns = 100
+    start = time.perf_counter()
+    for i in range(reruns):
+        users = snap.find_users("patient", name="1", min_age=30, max_age=60)
+        rows = users[i * page_size:(i + 1) * page_size]
+        page = json.dumps([{c: row[c] for c in ("user_id", "name", "age", "contact")} for row in rows])
+    paged = (time.perf_counter() - start) / reruns
+    print(f"{n_patients:,} patients: one element per record {len(elements):,} elements, {sent / 2**20:.1f} MiB, "
+          f"{every * 1000:.0f} ms to serialize (before Streamlit renders any of them)")
+    print(f"  filtered page of {page_size}: 1 table, {len(page) / 2**10:.1f} KiB, {paged * 1000:.1f} ms "
+          f"({len(users):,} matches)")
+
+
+if __name__ == "__main__":
+    benchmark()
+    sessions_benchmark()
+    listing_benchmark()
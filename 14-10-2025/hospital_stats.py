@@ -0,0 +1,167 @@
+import argparse
+import random
+import time
+from collections import Counter
+
+from cow_map import CowMap
+
+# --- CONFIGURATION ---
+DIMENSIONS = ("status", "doctor", "day", "specialization")
+SHARDS = 64  # counter maps are small; fewer shards make each update cheaper
+
+
+def appointment_keys(appt: dict, specialization: str) -> tuple:
+    """The ``(dimension, key)`` counters one appointment contributes to."""
+    return (("status", appt["status"]), ("doctor", appt["doctor_id"]), ("day", appt["date"]),
+            ("specialization", specialization))
+
+
+class Stats:
+    """Appointment counters per status, doctor, day and specialization.
+
+    Immutable like the snapshot that holds it: ``changed`` returns a new
+    ``Stats`` sharing every untouched ``CowMap`` shard, so a booking or a
+    status change costs a few small dict copies and every query is a dict
+    lookup, however many appointments exist. An appointment counts under
+    its doctor's specialization at the time it was booked. Counters that
+    drop to zero are kept and skipped when listed.
+    """
+    __slots__ = ("total", "counts")
+
+    def __init__(self, total: int = 0, counts: dict = None):
+        self.total = total
+        self.counts = counts or {dim: CowMap((), SHARDS) for dim in DIMENSIONS}  # dimension -> CowMap(key -> count)
+
+    @classmethod
+    def from_appointments(cls, appts, specialization_of) -> "Stats":
+        """Rebuilds every counter with one scan; ``specialization_of(doctor_id)`` names a doctor's field."""
+        counters = {dim: Counter() for dim in DIMENSIONS}
+        total = 0
+        for appt in appts:
+            total += 1
+            for dim, key in appointment_keys(appt, specialization_of(appt["doctor_id"])):
+                counters[dim][key] += 1
+        return cls(total, {dim: CowMap(counters[dim].items(), SHARDS) for dim in DIMENSIONS})
+
+    def changed(self, old_keys=(), new_keys=()) -> "Stats":
+        """Stats with one appointment's ``old_keys`` removed and ``new_keys`` added."""
+        deltas = {}
+        for keys, step in ((old_keys, -1), (new_keys, 1)):
+            for dim, key in keys:
+                delta = deltas.setdefault(dim, {})
+                delta[key] = delta.get(key, 0) + step
+        counts = dict(self.counts)
+        for dim, delta in deltas.items():
+            counters = counts[dim]
+            changes = [(key, counters.get(key, 0) + step) for key, step in delta.items() if step]
+            if changes:  # e.g. a status change leaves doctor, day and specialization alone
+                counts[dim] = counters.update(changes)
+        return Stats(self.total + bool(new_keys) - bool(old_keys), counts)
+
+    # --- QUERIES ---
+    def count(self, dim: str, key) -> int:
+        return self.counts[dim].get(key, 0)
+
+    def histogram(self, dim: str) -> dict:
+        """Every ``key: count`` of one dimension (sized by its keys, not by appointments)."""
+        return {key: n for key, n in self.counts[dim].items() if n}
+
+    # --- PERSISTENCE ---
+    def to_dict(self) -> dict:
+        # Pairs rather than objects, so integer doctor IDs survive JSON
+        return {"total": self.total, **{dim: list(self.histogram(dim).items()) for dim in DIMENSIONS}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Stats":
+        return cls(data["total"], {dim: CowMap(map(tuple, data[dim]), SHARDS) for dim in DIMENSIONS})
+
+    def __eq__(self, other):
+        return isinstance(other, Stats) and self._canonical() == other._canonical()
+
+    def _canonical(self) -> dict:
+        return {"total": self.total, **{dim: self.histogram(dim) for dim in DIMENSIONS}}
+
+
+# --- BENCHMARK ---
+def benchmark(n_appointments: int = 10_000_000, n_doctors: int = 5_000, updates: int = 100_000):
+    """Dashboard queries from the counters vs a scan, incremental update cost, and a full rebuild."""
+    rng = random.Random(22)
+    specializations = [f"spec{i}" for i in range(40)]
+    doctor_spec = {d: specializations[d % len(specializations)] for d in range(n_doctors)}
+    statuses = ("Pending", "Confirmed", "Completed", "Cancelled")
+    days = [f"2026-{m:02d}-{d:02d}" for m in range(1, 13) for d in range(1, 29)]
+
+    def appointments(n):
+        for i in range(n):
+            yield {"appointment_id": i, "doctor_id": rng.randrange(n_doctors), "patient_id": i,
+                   "date": rng.choice(days), "status": rng.choice(statuses)}
+
+    start = time.perf_counter()
+    stats = Stats.from_appointments(appointments(n_appointments), doctor_spec.get)
+    rebuild = time.perf_counter() - start
+    print(f"rebuild from {n_appointments:,} appointments: {rebuild:.1f}s")
+
+    sample = list(appointments(1_000_000))
+    start = time.perf_counter()
+    sum(1 for a in sample if a["status"] == "Pending")
+    scan = (time.perf_counter() - start) * n_appointments / len(sample)
+    start = time.perf_counter()
+    for _ in range(10_000):
+        stats.count("status", "Pending")
+        stats.count("doctor", 42)
+        stats.count("day", "2026-06-01")
+        stats.count("specialization", "spec7")
+    query = (time.perf_counter() - start) / 10_000
+    print(f"dashboard counters: {query * 1e6:.1f} us for four counts; one scan over "
+          f"{n_appointments:,} appointments: ~{scan:.1f}s")
+
+    start = time.perf_counter()
+    for appt in sample[:updates]:
+        keys = appointment_keys(appt, doctor_spec[appt["doctor_id"]])
+        stats = stats.changed((), keys)
+        stats = stats.changed(keys, (("status", "Completed"),) + keys[1:])
+    per_update = (time.perf_counter() - start) / (2 * updates)
+    print(f"incremental update (booking or status change): {per_update * 1e6:.1f} us")
+
+    start = time.perf_counter()
+    data = stats.to_dict()
+    assert Stats.from_dict(data) == stats
+    print(f"serialize + reload: {time.perf_counter() - start:.2f}s "
+          f"({sum(len(stats.counts[d]) for d in DIMENSIONS):,} counters)")
+
+
+def verify(data_dir: str) -> bool:
+    """Rebuilds the stats from the appointments on disk and compares them with the persisted ones."""
+    from hospital_repository import HospitalRepository
+    from hospital_store import HospitalStore
+
+    store = HospitalStore(data_dir, background=False)
+    persisted = store.load_document("stats")
+    if persisted is None:
+        print("no stats for the current version on disk (they are rebuilt at the next start)")
+        return False
+    repo = HospitalRepository(store.db, store)  # loads the persisted stats into its snapshot
+    start = time.perf_counter()
+    rebuilt = repo.rebuild_stats()
+    ok = rebuilt == repo.snapshot.stats
+    print(f"rebuilt from {rebuilt.total:,} appointments in {time.perf_counter() - start:.1f}s: "
+          f"{'matches' if ok else 'DIFFERS FROM'} the persisted stats")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hospital appointment stats.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("verify", help="rebuild from scratch and compare with the persisted stats")
+    check.add_argument("--data-dir", default="hospital_data")
+    bench = sub.add_parser("bench", help="query, update and rebuild benchmark")
+    bench.add_argument("--appointments", type=int, default=10_000_000)
+    args = parser.parse_args()
+    if args.command == "bench":
+        benchmark(args.appointments)
+    elif not verify(args.data_dir):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+# --- CONFIGURATION ---
+SEGMENT_SIZE = 1_000    # records per segment file
+FLUSH_DELAY = 0.05      # seconds the flusher waits so a burst of writes shares one flush
+LIST_COLLECTIONS = ("admins", "doctors", "patients", "appointments")
+ID_FIELDS = {"admins": "user_id", "doctors": "user_id", "patients": "user_id", "appointments": "appointment_id"}
+ID_KINDS = {"doctors": "doctor", "patients": "patient", "appointments": "appointment"}
+VERSION_FILE = "version.json"  # bumped after every flush; one stat tells if another process wrote
+LOCK_FILE = "store.lock"       # flock-ed by every process while it loads, merges or flushes
+
+
+class HospitalStore:
+    """The hospital db persisted as per-collection segment files.
+
+    Each list collection is split into ``<name>.<n>.json`` files of
+    ``SEGMENT_SIZE`` records and ``next_ids`` lives in ``next_ids.json``.
+    ``mark`` records which segments changed; ``flush`` rewrites only those,
+    each through a temporary file and an atomic rename, so a crash leaves
+    every file either old or new and never half-written. A background
+    thread flushes shortly after the first change, coalescing bursts.
+    Each flush ends by bumping the counter in ``version.json``, which is
+    how other processes notice the data changed.
+
+    Derived documents (``register``) are rewritten by every flush, stamped
+    with its version; ``load_document`` returns one only if that stamp is
+    the current version, i.e. it matches the segments on disk.
+
+    Several processes can share a directory. Loading and flushing hold an
+    ``flock`` on ``store.lock``; a flush that finds the directory ``stale``
+    first reloads it and re-applies this process's unflushed records on
+    top, matched by ID (not list position), so neither side's records are
+    lost. Every such reload bumps ``generation`` so indexes built on the
+    db know to rebuild.
+    """
+
+    def __init__(self, directory: str, default_db: dict = None, legacy_file: str = None,
+                 segment_size: int = SEGMENT_SIZE, flush_delay: float = FLUSH_DELAY, background: bool = True):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.flush_delay = flush_delay
+        self.lock = threading.RLock()  # guards db and the dirty sets
+        self.db = None
+        self.bytes_written = 0
+        self.flushes = 0
+        self._dirty = {}      # collection -> set of segment numbers, or None for "whole collection"
+        self._changed = {}    # collection -> {record id: record} not yet flushed, or None for all of it
+        self._derived = {}    # document name -> getter returning its JSON-able data
+        self._positions = {}  # collection -> {record id: list position}
+        self.version = 0
+        self.generation = 0  # bumped whenever db is reloaded from another process's flush
+        self._version_sig = None  # (mtime_ns, size, inode) of version.json as we last wrote or read it
+        self._lock_depth = 0  # the flock is taken only by the outermost locked()
+        self._wake = threading.Condition(self.lock)
+        self._closed = False
+        os.makedirs(directory, exist_ok=True)
+        with self.locked():
+            self._load(default_db, legacy_file)
+        self._flusher = None
+        if background:
+            self._flusher = threading.Thread(target=self._flush_loop, name="hospital-flusher", daemon=True)
+            self._flusher.start()
+
+    # --- LOCKING ---
+    @contextmanager
+    def locked(self):
+        """Holds ``lock`` and, where available, the cross-process file lock.
+
+        The flock is only ever taken while ``lock`` is held, so the two are
+        always acquired in the same order.
+        """
+        with self.lock:
+            if fcntl is None or self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self._path(LOCK_FILE), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # --- LOADING ---
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment_name(self, collection: str, n: int) -> str:
+        return f"{collection}.{n}.json"
+
+    def _load(self, default_db, legacy_file):
+        if not os.path.exists(self._path("next_ids.json")):
+            # First run: migrate the single-file db (or start from the default) and write every segment
+            if legacy_file and os.path.exists(legacy_file):
+                with open(legacy_file, "r") as f:
+                    self.db = json.load(f)
+            else:
+                self.db = json.loads(json.dumps(default_db or {}))
+            for collection in LIST_COLLECTIONS:
+                self.db.setdefault(collection, [])
+            self.db.setdefault("next_ids", {})
+            self._reindex()
+            for collection in (*LIST_COLLECTIONS, "next_ids"):
+                self._dirty[collection] = self._changed[collection] = None
+            self.flush()
+            return
+
+        self.db = self._read_db()
+        self._reindex()
+        self.version, self._version_sig = self._read_version()
+
+    def _read_db(self) -> dict:
+        """Every collection as the segment files on disk hold it (call under the file lock)."""
+        db = {}
+        for collection in LIST_COLLECTIONS:
+            records, n = [], 0
+            while os.path.exists(self._path(self._segment_name(collection, n))):
+                with open(self._path(self._segment_name(collection, n)), "r") as f:
+                    records.extend(json.load(f))
+                n += 1
+            db[collection] = records
+        with open(self._path("next_ids.json"), "r") as f:
+            db["next_ids"] = json.load(f)
+        return db
+
+    def refresh(self, exact: bool = False) -> bool:
+        """Merges in another process's flush if there was one; True if db was reloaded.
+
+        Without ``exact`` a one-stat ``stale`` check decides whether to look
+        at all, which is what reruns want; callers about to write pass
+        ``exact=True`` so the on-disk version number is always compared.
+        """
+        if not exact and not self.stale():
+            return False
+        with self.locked():
+            if not self._moved_on():
+                return False
+            self._merge()
+            return True
+
+    def _merge(self):
+        """Reloads db from disk and re-applies the records changed here since the last flush.
+
+        Called under ``locked()``. A record both sides changed keeps this
+        process's version; everything it did not touch comes from disk.
+        """
+        disk = self._read_db()
+        dirty = {}
+        for collection in LIST_COLLECTIONS:
+            field, records = ID_FIELDS[collection], disk[collection]
+            changed = self._changed.get(collection, {})
+            if changed is None:
+                changed = {record[field]: record for record in self.db[collection]}
+            positions = {record[field]: i for i, record in enumerate(records)}
+            segments = set()
+            for record_id, record in changed.items():
+                pos = positions.get(record_id)
+                if pos is None:
+                    pos = positions[record_id] = len(records)
+                    records.append(record)
+                else:
+                    records[pos] = record
+                segments.add(pos // self.segment_size)
+            self.db[collection] = records  # same db dict, so holders of it see the merge
+            if segments:
+                dirty[collection] = segments
+        next_ids = disk["next_ids"]
+        for kind, last in self.db["next_ids"].items():
+            next_ids[kind] = max(next_ids.get(kind, 0), last)
+        self.db["next_ids"] = next_ids
+        if "next_ids" in self._dirty:
+            dirty["next_ids"] = None
+        self._dirty = dirty
+        self._reindex()
+        self.version, self._version_sig = self._read_version()
+        self.generation += 1
+
+    def _reindex(self):
+        next_ids = self.db["next_ids"]
+        for collection, field in ID_FIELDS.items():
+            records = self.db[collection]
+            self._positions[collection] = {record[field]: i for i, record in enumerate(records)}
+            # Segments are renamed one at a time; never hand out an ID already on disk
+            kind = ID_KINDS.get(collection)
+            if kind and records:
+                next_ids[kind] = max(next_ids.get(kind, 0), max(self._positions[collection]))
+
+    def _stat(self, name: str):
+        try:
+            stat = os.stat(self._path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read_version(self):
+        signature = self._stat(VERSION_FILE)
+        try:
+            with open(self._path(VERSION_FILE), "r") as f:
+                return json.load(f)["version"], signature
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return 0, signature
+
+    def load_document(self, name: str):
+        """A derived document's data, or None if it is missing or older than the segments."""
+        try:
+            with open(self._path(f"{name}.json"), "r") as f:
+                document = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return document.get("data") if document.get("version") == self.version else None
+
+    def register(self, name: str, getter):
+        """Writes ``getter()`` to ``<name>.json`` on every flush (called under the lock)."""
+        with self.lock:
+            self._derived[name] = getter
+
+    def stale(self) -> bool:
+        """True if another process has flushed since we loaded or last flushed (one stat).
+
+        A hint only: two flushes inside one timestamp tick can leave the
+        same mtime and size (and a reused inode). Anything that writes
+        decides with ``_moved_on`` under the file lock instead.
+        """
+        return self._stat(VERSION_FILE) != self._version_sig
+
+    def _moved_on(self) -> bool:
+        """True if version.json holds another version than ours (call under ``locked()``)."""
+        version, signature = self._read_version()
+        return version != self.version or signature != self._version_sig
+
+    # --- DIRTY TRACKING ---
+    def mark(self, collection: str, record: dict = None):
+        """Records that ``record`` (or, if None, the whole collection) changed."""
+        with self.lock:
+            if collection == "next_ids" or record is None:
+                self._dirty[collection] = self._changed[collection] = None
+            else:
+                positions = self._positions[collection]
+                record_id = record[ID_FIELDS[collection]]
+                changed = self._changed.setdefault(collection, {})
+                if changed is not None:
+                    changed[record_id] = record
+                pos = positions.get(record_id)
+                if pos is None:  # appended since the last mark, almost always the last record
+                    records = self.db[collection]
+                    pos = len(records) - 1
+                    while pos > 0 and records[pos] is not record:
+                        pos -= 1
+                    positions[record_id] = pos
+                segments = self._dirty.setdefault(collection, set())
+                if segments is not None:
+                    segments.add(pos // self.segment_size)
+            self._wake.notify()
+
+    def extend(self, collection: str, records: list):
+        """Appends ``records`` and marks the segments they land in (bulk imports)."""
+        if not records:
+            return
+        with self.lock:
+            existing = self.db[collection]
+            first = len(existing)
+            existing.extend(records)
+            field, positions = ID_FIELDS[collection], self._positions[collection]
+            changed = self._changed.setdefault(collection, {})
+            for pos, record in enumerate(records, first):
+                positions[record[field]] = pos
+                if changed is not None:
+                    changed[record[field]] = record
+            segments = self._dirty.setdefault(collection, set())
+            if segments is not None:
+                segments.update(range(first // self.segment_size, (len(existing) - 1) // self.segment_size + 1))
+            self._wake.notify()
+
+    def replace(self, collection: str, old: dict, new: dict):
+        """Swaps ``new`` in for ``old`` (records are replaced, never mutated) and marks it."""
+        with self.lock:
+            pos = self._positions[collection][old[ID_FIELDS[collection]]]
+            self.db[collection][pos] = new
+            self.mark(collection, new)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    # --- FLUSHING ---
+    def _snapshot(self) -> dict:
+        """Serializes dirty segments under the lock; returns ``{file name: text}``."""
+        files = {}
+        for collection, segments in self._dirty.items():
+            if collection == "next_ids":
+                files["next_ids.json"] = json.dumps(self.db["next_ids"])
+                continue
+            records = self.db[collection]
+            count = -(-len(records) // self.segment_size)
+            for n in (range(count) if segments is None else sorted(segments)):
+                chunk = records[n * self.segment_size:(n + 1) * self.segment_size]
+                files[self._segment_name(collection, n)] = json.dumps(chunk, separators=(",", ":"))
+        self._dirty = {}
+        self._changed = {}
+        return files
+
+    def flush(self) -> int:
+        """Writes every dirty segment now; returns the bytes written."""
+        # Under both locks throughout: flushes (from any process) land one at a
+        # time, in order, and no write can slip in between the merge and the rename
+        with self.locked():
+            if not self._dirty:
+                return 0
+            merged = self._moved_on()
+            if merged:
+                self._merge()
+            files = self._snapshot()
+            # Derived documents describe the db before the merge; leave them to
+            # the next flush after their owners rebuild
+            derived = {} if merged else {name: getter() for name, getter in self._derived.items()}
+            version = max(self.version, self._read_version()[0]) + 1
+            for name, data in derived.items():  # after the segments they describe
+                if data is not None:
+                    files[f"{name}.json"] = json.dumps({"version": version, "data": data}, separators=(",", ":"))
+            written = 0
+            for name, text in files.items():
+                path = self._path(name)
+                data = text.encode()
+                self._write_file(path, data)
+                written += len(data)
+            # Last, so a reader that sees the new version also sees every segment
+            self._write_file(self._path(VERSION_FILE), json.dumps({"version": version}).encode())
+            self.version, self._version_sig = version, self._stat(VERSION_FILE)
+            self.bytes_written += written
+            self.flushes += 1
+            return written
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _flush_loop(self):
+        while True:
+            with self.lock:
+                while not self._dirty and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+            time.sleep(self.flush_delay)  # let the rest of a burst arrive
+            self.flush()
+
+    def close(self):
+        """Stops the flusher and writes anything still dirty."""
+        with self.lock:
+            self._closed = True
+            self._wake.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+
+# --- SELF-TEST ---
+def self_test(workdir: str = "hospital_store_selftest"):
+    """Two stores on one directory flush back to back; neither loses the other's records."""
+    import shutil
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    empty = {"admins": [], "doctors": [], "patients": [], "appointments": [], "next_ids": {}}
+    first = HospitalStore(workdir, empty, background=False)
+    second = HospitalStore(workdir, background=False)
+    for store, user_id, name in ((first, 1, "Alice"), (second, 2, "Bob")):
+        with store.lock:
+            store.db["patients"].append({"user_id": user_id, "name": name})
+            store.mark("patients", store.db["patients"][-1])
+    first.flush()
+    # Same-tick flushes can leave an identical (mtime, size, inode): stale() is fooled, the flush must not be
+    second._version_sig = first._version_sig
+    assert not second.stale()
+    second.flush()
+    names = sorted(p["name"] for p in HospitalStore(workdir, background=False).db["patients"])
+    assert names == ["Alice", "Bob"], names
+    shutil.rmtree(workdir)
+    print("hospital_store self-test passed")
+
+
+# --- BENCHMARK ---
+def _book(db: dict, rng) -> dict:
+    appt_id = db["next_ids"]["appointment"] + 1
+    db["next_ids"]["appointment"] = appt_id
+    appt = {"appointment_id": appt_id, "patient_id": rng.randrange(100_000), "doctor_id": rng.randrange(1_000),
+            "date": "2026-01-01", "status": "Pending"}
+    db["appointments"].append(appt)
+    return appt
+
+
+def benchmark(n_appointments: int = 1_000_000, bookings: int = 5, workdir: str = "hospital_store_bench"):
+    """Bytes written and latency per booking: whole-file write_db vs segment flush."""
+    import shutil
+
+    rng = random.Random(5)
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    db = {"admins": [], "doctors": [], "patients": [], "appointments": [],
+          "next_ids": {"doctor": 0, "patient": 0, "appointment": 0}}
+    for _ in range(n_appointments):
+        _book(db, rng)
+
+    legacy = os.path.join(workdir, "data.json")
+    start = time.perf_counter()
+    for _ in range(bookings):
+        _book(db, rng)
+        with open(legacy, "w") as f:
+            json.dump(db, f, indent=4)
+    before = (time.perf_counter() - start) / bookings
+    before_bytes = os.path.getsize(legacy)
+    print(f"write_db (indent=4):   {before_bytes / 2**20:8.2f} MiB, {before * 1000:8.1f} ms per booking")
+
+    store = HospitalStore(os.path.join(workdir, "segments"), legacy_file=legacy, background=False)
+    store.bytes_written = 0
+    start = time.perf_counter()
+    for _ in range(bookings):
+        with store.lock:
+            store.mark("appointments", _book(store.db, rng))
+            store.mark("next_ids")
+        store.flush()
+    after = (time.perf_counter() - start) / bookings
+    print(f"segment flush:         {store.bytes_written / bookings / 2**10:8.2f} KiB, {after * 1000:8.1f} ms per booking "
+          f"({before / after:.0f}x faster)")
+
+    store = HospitalStore(os.path.join(workdir, "segments"))
+    store.bytes_written = 0
+    start = time.perf_counter()
+    for _ in range(500):
+        with store.lock:
+            store.mark("appointments", _book(store.db, rng))
+            store.mark("next_ids")
+    store.close()
+    print(f"background flusher:    500 bookings in {time.perf_counter() - start:.2f}s -> {store.flushes} flushes, "
+          f"{store.bytes_written / 500 / 2**10:.2f} KiB per booking")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    self_test()
+    benchmark()
@@ -0,0 +1,129 @@
+"""Fixed-point money as integer cents.
+
+Every balance and amount in the bank modules is a plain ``int`` number of
+cents: addition, comparison and ``sum`` are exact and run at native integer
+speed, and no rounding drift builds up. Conversion happens only at the
+edges -- user input (``to_cents``), display (``format_cents``) and legacy
+JSON records that still hold a float ``balance`` (``migrate_record``).
+"""
+import math
+import random
+import time
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENT = Decimal("0.01")
+
+
+def to_cents(value) -> int:
+    """Converts a currency amount (str, float, int or Decimal) to integer cents.
+
+    Strings and Decimals are converted exactly; floats are rounded to the
+    nearest cent, which is exact for any value entered with two decimals.
+    """
+    if isinstance(value, bool):
+        raise ValueError("Not an amount.")
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        if not math.isfinite(value):  # inf / nan, e.g. JSON's 1e999 or Infinity
+            raise ValueError(f"Not an amount: {value!r}")
+        return round(value * 100)
+    try:
+        return int(Decimal(str(value).strip()).quantize(CENT, ROUND_HALF_UP) * 100)
+    except (InvalidOperation, ValueError):  # ValueError: int() of a NaN
+        raise ValueError(f"Not an amount: {value!r}")
+
+
+def from_cents(cents: int) -> Decimal:
+    """Exact currency value of ``cents`` (for reports and exports)."""
+    return Decimal(cents) / 100
+
+
+def format_cents(cents: int) -> str:
+    """``123456`` -> ``'1,234.56'``."""
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(cents), 100)
+    return f"{sign}{units:,}.{rest:02d}"
+
+
+def cents_to_str(cents: int) -> str:
+    """``123456`` -> ``'1234.56'`` (no grouping; for CSV and other files)."""
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(cents), 100)
+    return f"{sign}{units}.{rest:02d}"
+
+
+def sum_cents(values) -> int:
+    """Exact total of an iterable of cent amounts."""
+    return sum(values)
+
+
+def migrate_record(record: dict) -> dict:
+    """Replaces a legacy float ``balance`` with integer ``balance_cents`` in place."""
+    if "balance" in record:
+        record["balance_cents"] = to_cents(record.pop("balance"))
+    return record
+
+
+def balance_cents(record: dict) -> int:
+    """Balance of an account record in cents, whichever format it is stored in."""
+    if "balance_cents" in record:
+        return record["balance_cents"]
+    return to_cents(record.get("balance", 0))
+
+
+# --- BENCHMARK ---
+def benchmark(n_ops: int = 10_000_000):
+    """Runs the same deposit/withdraw stream on float, Decimal and integer cents."""
+    rng = random.Random(42)
+    amounts = [rng.randrange(1, 100_000) for _ in range(1000)]  # cents
+    signs = [1 if rng.random() < 0.55 else -1 for _ in range(1000)]
+    stream = [(s * a) for s, a in zip(signs, amounts)]
+    reps = n_ops // len(stream)
+
+    start = time.perf_counter()
+    balance = 0.0
+    float_stream = [c / 100 for c in stream]
+    for _ in range(reps):
+        for x in float_stream:
+            balance += x
+    float_time = time.perf_counter() - start
+    float_result = balance
+
+    start = time.perf_counter()
+    balance = Decimal(0)
+    dec_stream = [Decimal(c) / 100 for c in stream]
+    for _ in range(reps):
+        for x in dec_stream:
+            balance += x
+    dec_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    balance = 0
+    for _ in range(reps):
+        for x in stream:
+            balance += x
+    cents_time = time.perf_counter() - start
+
+    exact = from_cents(balance)
+    drift = Decimal(repr(float_result)) - exact
+    print(f"{reps * len(stream):,} running-balance updates")
+    print(f"  float   : {float_time:6.2f}s  result {float_result!r} (drift {drift})")
+    print(f"  Decimal : {dec_time:6.2f}s  result {exact}")
+    print(f"  cents   : {cents_time:6.2f}s  result {format_cents(balance)}")
+
+    # Bulk reconciliation: total and compare a whole column of balances at once.
+    # Each column is built only when its turn comes and freed before the next.
+    for label, build, total in (("float", lambda: [c / 100 for _ in range(reps) for c in stream], sum),
+                                ("Decimal", lambda: [Decimal(c) / 100 for _ in range(reps) for c in stream], sum),
+                                ("cents", lambda: stream * reps, sum_cents)):
+        values = build()
+        start = time.perf_counter()
+        result = total(values)
+        matches = sum(1 for v in values if v > values[0])
+        print(f"  bulk sum+compare {label:<8}: {time.perf_counter() - start:6.2f}s  total {result}  ({matches} above first)")
+        del values
+
+
+if __name__ == "__main__":
+    benchmark()
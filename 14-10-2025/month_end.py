@@ -0,0 +1,274 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from bank_ledger import Ledger
+from bank_service import BankError, BankService, DATA_FILE, JOURNAL_FILE, LEDGER_FILE
+from money import format_cents, to_cents
+
+# --- CONFIGURATION ---
+PARTITION_SIZE = 5_000     # accounts per task handed to a worker
+STATEMENTS_DIR = "statements"
+
+
+# --- PER-ACCOUNT MATH ---
+def month_end_balance(balance: int, monthly_rate: float, fee_cents: int, below_cents: int):
+    """Returns ``(interest, fee, closing)`` in cents, the same rules as ``ColumnarAccounts``."""
+    interest = round(balance * monthly_rate) if balance > 0 else 0
+    credited = balance + interest
+    fee = max(min(credited, fee_cents), 0) if credited < below_cents else 0
+    return interest, fee, credited - fee
+
+
+def account_digest(holder: str, closing: int) -> int:
+    """64-bit digest of one account's closing balance."""
+    return int.from_bytes(hashlib.blake2b(f"{holder}\0{closing}".encode(), digest_size=8).digest(), "big")
+
+
+def statement_path(out_dir: str, holder: str) -> str:
+    return os.path.join(out_dir, quote(holder, safe="") + ".txt")
+
+
+# --- WORKERS ---
+_ledger = None  # per-process Ledger, opened once by _init_worker
+
+
+def _init_worker(ledger_file):
+    global _ledger
+    _ledger = Ledger(ledger_file) if ledger_file else None
+
+
+def _statement_text(holder, period, opening, entries, interest, fee, closing) -> str:
+    start, end = period
+    lines = [
+        f"Statement for {holder}",
+        f"Period: {datetime.fromtimestamp(start):%Y-%m-%d} to {datetime.fromtimestamp(end):%Y-%m-%d}",
+        f"Opening balance: {format_cents(opening)}",
+        "",
+    ]
+    for e in entries:
+        lines.append(f"{datetime.fromtimestamp(e['ts']):%Y-%m-%d %H:%M}  {e['type']:<10}"
+                     f"{format_cents(e['amount_cents']):>15}{format_cents(e['balance_cents']):>15}")
+    if interest:
+        lines.append(f"{'month end':<16}  {'interest':<10}{format_cents(interest):>15}"
+                     f"{format_cents(closing + fee):>15}")
+    if fee:
+        lines.append(f"{'month end':<16}  {'fee':<10}{format_cents(fee):>15}{format_cents(closing):>15}")
+    lines += ["", f"Closing balance: {format_cents(closing)}", ""]
+    return "\n".join(lines)
+
+
+def _run_partition(task):
+    """Computes interest, fees and statements for one slice of accounts.
+
+    Returns totals, the partition's checksum and the balance updates; the
+    parent applies the updates, so workers never touch the store.
+    """
+    rows, monthly_rate, fee_cents, below_cents, period, out_dir = task
+    interest_total = fee_total = charged = closing_total = checksum = 0
+    updates = []
+    for holder, balance in rows:
+        interest, fee, closing = month_end_balance(balance, monthly_rate, fee_cents, below_cents)
+        interest_total += interest
+        fee_total += fee
+        charged += fee > 0
+        closing_total += closing
+        checksum += account_digest(holder, closing)
+        if closing != balance:
+            updates.append((holder, interest, fee, closing))
+        if out_dir is not None:
+            opening, entries = balance, []
+            if _ledger is not None:
+                statement = _ledger.statement(holder, *period)
+                entries = statement["entries"]
+                if statement["opening"] is not None:
+                    opening = statement["opening"]
+            with open(statement_path(out_dir, holder), "w") as f:
+                f.write(_statement_text(holder, period, opening, entries, interest, fee, closing))
+    return len(rows), interest_total, fee_total, charged, closing_total, checksum % 2**64, updates
+
+
+# --- DRIVER ---
+def run_partitions(balances: dict, annual_rate: float, fee_cents: int, below_cents: int, period,
+                   out_dir: str = None, workers: int = None, ledger_file: str = None,
+                   partition_size: int = PARTITION_SIZE, progress=None) -> dict:
+    """Runs month-end for ``{holder: balance_cents}`` across a process pool.
+
+    Holders are sorted and cut into fixed-size partitions, so the work split
+    does not depend on dict order. The checksum is the sum of per-account
+    digests modulo 2**64: it is the same however many workers ran or in
+    which order partitions finished. ``progress(done, total)`` is called as
+    partitions complete.
+    """
+    workers = workers or os.cpu_count()
+    holders = sorted(balances)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    tasks = [
+        ([(h, balances[h]) for h in holders[i:i + partition_size]],
+         annual_rate / 12, fee_cents, below_cents, period, out_dir)
+        for i in range(0, len(holders), partition_size)
+    ]
+
+    summary = {"accounts": 0, "interest": 0, "fees": 0, "charged": 0, "total": 0, "checksum": 0, "updates": []}
+
+    def merge(result):
+        count, interest, fees, charged, total, checksum, updates = result
+        summary["accounts"] += count
+        summary["interest"] += interest
+        summary["fees"] += fees
+        summary["charged"] += charged
+        summary["total"] += total
+        summary["checksum"] = (summary["checksum"] + checksum) % 2**64
+        summary["updates"].extend(updates)
+        if progress:
+            progress(summary["accounts"], len(holders))
+
+    if workers == 1:
+        # In-process: the single-threaded baseline
+        _init_worker(ledger_file)
+        for task in tasks:
+            merge(_run_partition(task))
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(ledger_file,)) as pool:
+            for result in pool.imap_unordered(_run_partition, tasks):
+                merge(result)
+    summary["updates"].sort()
+    summary["checksum"] = f"{summary['checksum']:016x}"
+    return summary
+
+
+def marker_path(service: BankService, period) -> str:
+    """The file recording that month-end ran for ``period`` (next to the journal)."""
+    month = f"{datetime.fromtimestamp(period[0]):%Y-%m}"
+    return os.path.join(os.path.dirname(os.path.abspath(service.journal.journal_file)), f"month_end_{month}.done")
+
+
+def run_month_end(service: BankService, annual_rate: float, fee: float, below: float, period,
+                  out_dir: str, workers: int = None, progress=None, force: bool = False) -> dict:
+    """Credits interest, charges fees and writes statements for every account.
+
+    Runs inside one journal transaction so no other write interleaves with
+    the batch; the new balances are written with a single journal append and
+    the interest/fee entries with one ledger write, dated at the end of the
+    period. A marker file per period, checked and written under the journal
+    lock, stops the same month being charged twice unless ``force`` is set.
+    """
+    outcome = {}
+    marker = marker_path(service, period)
+    created = []
+
+    def run(accounts):
+        if os.path.exists(marker) and not force:
+            raise BankError(f"Month-end already ran for this period ({marker}); use --force to run it again.")
+        balances = {name: account["balance_cents"] for name, account in accounts.base.items()}
+        summary = run_partitions(balances, annual_rate, to_cents(fee), to_cents(below), period, out_dir,
+                                 workers, service.ledger.ledger_file, progress=progress)
+        history = []
+        for holder, interest, fee_cents, closing in summary.pop("updates"):
+            if interest:
+                history.append((holder, "interest", interest, closing + fee_cents))
+            if fee_cents:
+                history.append((holder, "fee", fee_cents, closing))
+            accounts.get(holder)["balance_cents"] = closing
+        outcome.update(summary, history=history)
+        if not os.path.exists(marker):
+            created.append(marker)
+        with open(marker, "w") as f:
+            json.dump({"ran_at": time.time(), "accounts": summary["accounts"], "checksum": summary["checksum"]}, f)
+        return [entry[0] for entry in history]
+
+    try:
+        service.journal.transact(run)
+    except BaseException:
+        for path in created:  # the balances were not written, so the period has not run
+            os.remove(path)
+        raise
+    service.ledger.record_many(outcome.pop("history"), ts=period[1])
+    return outcome
+
+
+def month_period(month: str):
+    """``'2026-09'`` -> ``(start_ts, end_ts)`` covering that calendar month."""
+    start = datetime.strptime(month, "%Y-%m")
+    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start.timestamp(), end.timestamp() - 1e-6
+
+
+def print_progress(done: int, total: int):
+    sys.stdout.write(f"\r  {done:,}/{total:,} accounts ({done * 100 // max(total, 1)}%)")
+    sys.stdout.flush()
+    if done == total:
+        sys.stdout.write("\n")
+
+
+# --- BENCHMARK ---
+def benchmark(n_accounts: int = 200_000, max_workers: int = None, workdir: str = "month_end_bench"):
+    """Times the same run with 1..N workers and checks every run agrees on the checksum."""
+    max_workers = max_workers or os.cpu_count()
+    rng = random.Random(11)
+    balances = {f"holder{i}": rng.randrange(0, 2_000_000) for i in range(n_accounts)}
+    period = month_period(datetime.now().strftime("%Y-%m"))
+    counts = sorted({1, *(w for w in (2, 4, 8, 16, 32, 64) if w < max_workers), max_workers})
+    baseline = checksum = None
+    for workers in counts:
+        shutil.rmtree(workdir, ignore_errors=True)
+        start = time.perf_counter()
+        summary = run_partitions(balances, 0.04, 500, 50_000, period, workdir, workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        assert checksum in (None, summary["checksum"]), "checksum depends on the worker count"
+        checksum = summary["checksum"]
+        print(f"{workers:>3} workers: {elapsed:6.2f}s ({n_accounts / elapsed:>9,.0f} accounts/s, "
+              f"speedup {baseline / elapsed:4.1f}x) checksum {checksum}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Month-end interest, fees and statements.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="run month-end on the bank data files")
+    run.add_argument("--month", default=datetime.now().strftime("%Y-%m"), help="YYYY-MM (default: this month)")
+    run.add_argument("--rate", type=float, default=4.0, help="annual interest rate in percent")
+    run.add_argument("--fee", default="5.00")
+    run.add_argument("--below", default="500.00", help="charge the fee below this balance")
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--data-dir", default=".", help="directory holding the bank data files")
+    run.add_argument("--out", default=None, help=f"statement directory (default: {STATEMENTS_DIR}/<month>)")
+    run.add_argument("--force", action="store_true", help="run again for a month that has already run")
+    bench = sub.add_parser("bench", help="scaling benchmark from 1 to N workers")
+    bench.add_argument("--accounts", type=int, default=200_000)
+    bench.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        benchmark(args.accounts, args.workers)
+        return
+    service = BankService(
+        os.path.join(args.data_dir, DATA_FILE),
+        os.path.join(args.data_dir, JOURNAL_FILE),
+        os.path.join(args.data_dir, LEDGER_FILE),
+    )
+    out_dir = args.out or os.path.join(args.data_dir, STATEMENTS_DIR, args.month)
+    start = time.perf_counter()
+    try:
+        summary = run_month_end(service, args.rate / 100, args.fee, args.below, month_period(args.month),
+                                out_dir, args.workers, progress=print_progress, force=args.force)
+    except BankError as e:
+        raise SystemExit(f"Error: {e}")
+    print(f"{summary['accounts']:,} accounts in {time.perf_counter() - start:.1f}s: "
+          f"interest {format_cents(summary['interest'])}, {summary['charged']} fees "
+          f"({format_cents(summary['fees'])}), total {format_cents(summary['total'])}")
+    print(f"checksum {summary['checksum']}, statements in {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
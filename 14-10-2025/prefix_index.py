@@ -0,0 +1,49 @@
+from bisect import bisect_left, insort
+
+# --- CONFIGURATION ---
+TOP_K = 20
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string that sorts after every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class PrefixIndex:
+    """Sorted-array index for case-insensitive typeahead search.
+
+    Entries are kept as ``(casefolded key, key)`` in one sorted list, so a
+    prefix lookup is two bisects and returning the top K matches touches
+    only K entries. ``add``/``remove`` keep the list sorted incrementally.
+    """
+
+    def __init__(self, keys=()):
+        self.entries = sorted((key.casefold(), key) for key in keys)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        i = bisect_left(self.entries, (key.casefold(), key))
+        return i < len(self.entries) and self.entries[i][1] == key
+
+    def add(self, key: str):
+        insort(self.entries, (key.casefold(), key))
+
+    def remove(self, key: str):
+        i = bisect_left(self.entries, (key.casefold(), key))
+        if i < len(self.entries) and self.entries[i][1] == key:
+            del self.entries[i]
+
+    def range(self, prefix: str):
+        """``(lo, hi)`` positions of the entries starting with ``prefix``."""
+        if not prefix:
+            return 0, len(self.entries)
+        folded = prefix.casefold()
+        return (bisect_left(self.entries, (folded,)),
+                bisect_left(self.entries, (_prefix_end(folded),)))
+
+    def search(self, prefix: str, k: int = TOP_K) -> list:
+        """The first ``k`` keys (in sorted order) that start with ``prefix``."""
+        lo, hi = self.range(prefix)
+        return [key for _, key in self.entries[lo:min(hi, lo + k)]]
@@ -0,0 +1,361 @@
+import heapq
+import random
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+
+# --- CONFIGURATION ---
+DEFAULT_HOURS = {"start": "09:00", "end": "17:00", "slot_minutes": 15, "weekdays": [0, 1, 2, 3, 4]}
+
+
+class SlotUnavailable(ValueError):
+    """A booking request for a slot that is taken or outside working hours."""
+
+
+def default_hours() -> dict:
+    """A fresh copy of ``DEFAULT_HOURS``, with its own ``weekdays`` list."""
+    return {**DEFAULT_HOURS, "weekdays": list(DEFAULT_HOURS["weekdays"])}
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class DoctorSchedule:
+    """One doctor's working hours and booked slots.
+
+    Days are ``date.toordinal()`` numbers and each day's bookings are one
+    int used as a bitmap (bit ``j`` = slot ``j``), so a conflict check is a
+    bit test and the first free slot of a day is found with bit arithmetic.
+    Working days are also numbered consecutively (``_index``), skipping the
+    doctor's days off, and fully booked days are kept as sorted runs of
+    those numbers, so a next-free search jumps over any stretch of full
+    days with one bisect: it never checks more than three bitmaps, however
+    far ahead the first free slot is.
+    """
+
+    def __init__(self, doctor_id: int, start: str = "09:00", end: str = "17:00", slot_minutes: int = 15,
+                 weekdays=(0, 1, 2, 3, 4)):
+        self.doctor_id = doctor_id
+        self.start = _minutes(start)
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = (_minutes(end) - self.start) // slot_minutes
+        self.weekdays = frozenset(weekdays)
+        self._workdays = sorted(self.weekdays)
+        self.all_slots = (1 << self.slots_per_day) - 1
+        self.booked = {}       # day -> bitmap of booked slots
+        self.full_starts = []  # runs of fully booked working days, as _index numbers:
+        self.full_ends = []    # sorted, disjoint and inclusive, never adjacent
+
+    @classmethod
+    def from_hours(cls, doctor_id: int, hours: dict = None) -> "DoctorSchedule":
+        hours = {**DEFAULT_HOURS, **(hours or {})}
+        return cls(doctor_id, hours["start"], hours["end"], hours["slot_minutes"], hours["weekdays"])
+
+    # --- SLOT <-> DATETIME ---
+    def slot_of(self, when: datetime):
+        """``(day, slot)`` for a slot start time; raises SlotUnavailable outside working hours."""
+        offset = when.hour * 60 + when.minute - self.start
+        slot, rest = divmod(offset, self.slot_minutes)
+        if when.weekday() not in self.weekdays or rest or not 0 <= slot < self.slots_per_day:
+            raise SlotUnavailable(f"{when:%a %Y-%m-%d %H:%M} is not a slot in this doctor's working hours.")
+        return when.toordinal(), slot
+
+    def slot_time(self, day: int, slot: int) -> datetime:
+        return datetime.combine(date.fromordinal(day), datetime.min.time()) + \
+            timedelta(minutes=self.start + slot * self.slot_minutes)
+
+    # --- WORKING-DAY NUMBERS ---
+    def _index(self, day: int) -> int:
+        """Number of the first working day at or after ``day`` (consecutive across days off)."""
+        week, weekday = divmod(day - 1, 7)  # ordinal 1 is a Monday
+        return week * len(self._workdays) + bisect_left(self._workdays, weekday)
+
+    def _day(self, index: int) -> int:
+        week, rank = divmod(index, len(self._workdays))
+        return week * 7 + self._workdays[rank] + 1
+
+    def _add_full(self, index: int):
+        starts, ends = self.full_starts, self.full_ends
+        k = bisect_right(starts, index)
+        joins_left = k > 0 and ends[k - 1] == index - 1
+        joins_right = k < len(starts) and starts[k] == index + 1
+        if joins_left and joins_right:
+            ends[k - 1] = ends[k]
+            del starts[k], ends[k]
+        elif joins_left:
+            ends[k - 1] = index
+        elif joins_right:
+            starts[k] = index
+        else:
+            starts.insert(k, index)
+            ends.insert(k, index)
+
+    def _remove_full(self, index: int):
+        starts, ends = self.full_starts, self.full_ends
+        k = bisect_right(starts, index) - 1
+        first, last = starts[k], ends[k]
+        if first == last:
+            del starts[k], ends[k]
+        elif index == first:
+            starts[k] = index + 1
+        elif index == last:
+            ends[k] = index - 1
+        else:
+            ends[k] = index - 1
+            starts.insert(k + 1, index + 1)
+            ends.insert(k + 1, last)
+
+    def _full_run_end(self, index: int):
+        """Last working-day number of the full run containing ``index``, or None."""
+        k = bisect_right(self.full_starts, index) - 1
+        return self.full_ends[k] if k >= 0 and self.full_ends[k] >= index else None
+
+    # --- BOOKING ---
+    def is_free_slot(self, day: int, slot: int) -> bool:
+        return not (self.booked.get(day, 0) >> slot) & 1
+
+    def book_slot(self, day: int, slot: int):
+        mask = self.booked.get(day, 0)
+        bit = 1 << slot
+        if mask & bit:
+            raise SlotUnavailable("That slot is already booked.")
+        mask |= bit
+        self.booked[day] = mask
+        if mask == self.all_slots and self._is_workday(day):
+            self._add_full(self._index(day))
+
+    def cancel_slot(self, day: int, slot: int):
+        mask = self.booked.get(day, 0)
+        if mask == self.all_slots and self._is_workday(day):
+            self._remove_full(self._index(day))
+        mask &= ~(1 << slot)
+        if mask:
+            self.booked[day] = mask
+        else:
+            self.booked.pop(day, None)
+
+    def _is_workday(self, day: int) -> bool:
+        return (day - 1) % 7 in self.weekdays
+
+    def is_free(self, when: datetime) -> bool:
+        try:
+            return self.is_free_slot(*self.slot_of(when))
+        except SlotUnavailable:
+            return False
+
+    def book(self, when: datetime):
+        self.book_slot(*self.slot_of(when))
+
+    def cancel(self, when: datetime):
+        self.cancel_slot(*self.slot_of(when))
+
+    # --- SEARCH ---
+    def free_slots(self, day: date) -> list:
+        """Start times of every free slot on ``day``."""
+        n = day.toordinal()
+        if day.weekday() not in self.weekdays:
+            return []
+        mask = self.booked.get(n, 0)
+        return [self.slot_time(n, j) for j in range(self.slots_per_day) if not (mask >> j) & 1]
+
+    def next_free_slot(self, day: int, slot: int = 0):
+        """First free ``(day, slot)`` at or after the given position (None only if the doctor has no slots)."""
+        if not self.slots_per_day or not self.weekdays:
+            return None
+        index = self._index(day)
+        if self._day(index) != day:  # a day off: start at the next working day's first slot
+            slot = 0
+        while True:
+            run_end = self._full_run_end(index)
+            if run_end is not None:
+                index, slot = run_end + 1, 0  # never full: runs are maximal
+            day = self._day(index)
+            # Free slots at or after `slot`: clear booked bits and everything below
+            free = ~self.booked.get(day, 0) & self.all_slots & ~((1 << slot) - 1)
+            if free:
+                return day, (free & -free).bit_length() - 1
+            # Only reachable with slot > 0 on a day that is not full, so the next
+            # day is either the start of a run or has a free slot
+            index, slot = index + 1, 0
+
+    def next_free(self, after: datetime):
+        """Start time of the first free slot at or after ``after``, or None."""
+        offset = after.hour * 60 + after.minute - self.start
+        slot = max(0, -(-offset // self.slot_minutes))  # round up to the next slot boundary
+        found = self.next_free_slot(after.toordinal(), slot)
+        return self.slot_time(*found) if found else None
+
+
+class _Frontier:
+    """One specialization's doctors in a heap keyed on each one's next free slot.
+
+    An entry is the doctor's first free slot at or after some earlier query
+    time; while that doctor's bookings do not change it is still the answer
+    for any later query up to the slot itself. A query therefore only
+    recomputes the doctors whose bookings changed (``stale``) or whose slot
+    it has passed, and reads the rest off the top of the heap. Queries must
+    not go back in time (``cursor``); one that does rebuilds the heap.
+    """
+
+    def __init__(self):
+        self.order = {}    # doctor_id -> position in the specialization (ties go to the earliest)
+        self.entries = {}  # doctor_id -> its live heap entry (older ones are skipped when popped)
+        self.heap = []     # (start time, order, doctor_id)
+        self.stale = set()
+        self.cursor = None
+
+    def _push(self, schedule: "DoctorSchedule", doctor_id: int, after: datetime):
+        when = schedule.next_free(after)
+        if when is None:
+            self.entries.pop(doctor_id, None)
+            return
+        entry = self.entries[doctor_id] = (when, self.order[doctor_id], doctor_id)
+        heapq.heappush(self.heap, entry)
+
+    def earliest(self, schedules: dict, after: datetime):
+        if self.cursor is None or after < self.cursor:
+            self.entries, self.heap, self.stale = {}, [], set(self.order)
+        self.cursor = after
+        for doctor_id in self.stale:
+            self._push(schedules[doctor_id], doctor_id, after)
+        self.stale = set()
+        if len(self.heap) > 2 * len(self.order) + 64:  # drop superseded entries
+            self.heap = list(self.entries.values())
+            heapq.heapify(self.heap)
+        while self.heap:
+            top = self.heap[0]
+            when, _, doctor_id = top
+            if self.entries.get(doctor_id) is not top:
+                heapq.heappop(self.heap)
+            elif when >= after:
+                return when, doctor_id
+            else:
+                heapq.heappop(self.heap)
+                self._push(schedules[doctor_id], doctor_id, after)
+        return None
+
+
+class Scheduler:
+    """Schedules for every doctor, grouped by specialization.
+
+    Book and cancel through the scheduler, not the ``DoctorSchedule``, so
+    ``earliest_free`` knows which doctors to look at again.
+    """
+
+    def __init__(self):
+        self.schedules = {}         # doctor_id -> DoctorSchedule
+        self.by_specialization = {}  # specialization (casefolded) -> [doctor_id]
+        self.specialization_of = {}  # doctor_id -> specialization (casefolded)
+        self._frontiers = {}         # specialization (casefolded) -> _Frontier
+
+    @classmethod
+    def from_db(cls, db: dict) -> "Scheduler":
+        """Builds schedules from the doctors and the timed appointments in the db."""
+        scheduler = cls()
+        for doctor in db["doctors"]:
+            scheduler.add_doctor(doctor["user_id"], doctor["specialization"], doctor.get("hours"))
+        for appt in db["appointments"]:
+            if appt.get("time") and appt.get("status") != "Cancelled" and appt["doctor_id"] in scheduler.schedules:
+                try:
+                    scheduler.book(appt["doctor_id"], appointment_time(appt))
+                except SlotUnavailable:
+                    pass  # hours changed or a double booking from before scheduling; keep the record
+        return scheduler
+
+    def add_doctor(self, doctor_id: int, specialization: str, hours: dict = None) -> DoctorSchedule:
+        schedule = self.schedules[doctor_id] = DoctorSchedule.from_hours(doctor_id, hours)
+        key = specialization.casefold()
+        doctors = self.by_specialization.setdefault(key, [])
+        frontier = self._frontiers.setdefault(key, _Frontier())
+        frontier.order[doctor_id] = len(doctors)
+        frontier.stale.add(doctor_id)
+        doctors.append(doctor_id)
+        self.specialization_of[doctor_id] = key
+        return schedule
+
+    def book(self, doctor_id: int, when: datetime):
+        self.schedules[doctor_id].book(when)
+        self._frontiers[self.specialization_of[doctor_id]].stale.add(doctor_id)
+
+    def cancel(self, doctor_id: int, when: datetime):
+        self.schedules[doctor_id].cancel(when)
+        self._frontiers[self.specialization_of[doctor_id]].stale.add(doctor_id)
+
+    def earliest_free(self, specialization: str, after: datetime):
+        """``(start time, doctor_id)`` of the earliest free slot among doctors of ``specialization``.
+
+        Ties go to the doctor added first. Repeated queries with a
+        non-decreasing ``after`` (e.g. ``datetime.now()``) cost a heap peek
+        plus one search per doctor booked or cancelled since the last one.
+        """
+        frontier = self._frontiers.get(specialization.casefold())
+        if frontier is None:
+            return None
+        # next_free works in whole minutes; so must the heap's "still ahead of after" test
+        return frontier.earliest(self.schedules, after.replace(second=0, microsecond=0))
+
+
+def appointment_time(appt: dict) -> datetime:
+    """Start time of an appointment record (``date`` + ``time``)."""
+    return datetime.strptime(f"{appt['date']} {appt['time']}", "%Y-%m-%d %H:%M")
+
+
+# --- BENCHMARK ---
+def benchmark(n_doctors: int = 5_000, n_booked: int = 10_000_000, n_specializations: int = 50):
+    """Books ``n_booked`` random slots, then times conflict checks and next-free searches."""
+    rng = random.Random(9)
+    scheduler = Scheduler()
+    for doctor_id in range(n_doctors):
+        scheduler.add_doctor(doctor_id, f"spec{doctor_id % n_specializations}")
+    first_day = date.today().toordinal()
+    workdays = [d for d in range(first_day, first_day + 366) if date.fromordinal(d).weekday() < 5]
+    schedules = list(scheduler.schedules.values())
+    per_day = schedules[0].slots_per_day
+
+    start = time.perf_counter()
+    booked = 0
+    # Fill each doctor's earliest days densely (the realistic shape: the near future is busiest)
+    per_doctor = n_booked // n_doctors
+    for schedule in schedules:
+        for k in range(per_doctor):
+            day = workdays[k // per_day] if rng.random() < 0.9 else rng.choice(workdays)
+            slot = k % per_day
+            if schedule.is_free_slot(day, slot):
+                schedule.book_slot(day, slot)
+                booked += 1
+    print(f"booked {booked:,} slots for {n_doctors} doctors in {time.perf_counter() - start:.1f}s")
+
+    queries = 100_000
+    probes = [(rng.choice(schedules), rng.choice(workdays), rng.randrange(per_day)) for _ in range(queries)]
+    start = time.perf_counter()
+    for schedule, day, slot in probes:
+        schedule.is_free_slot(day, slot)
+    print(f"conflict check: {(time.perf_counter() - start) / queries * 1e6:.2f} us")
+
+    start = time.perf_counter()
+    for schedule, day, slot in probes[:10_000]:
+        schedule.next_free_slot(workdays[0], 0)
+    print(f"next free slot for one doctor: {(time.perf_counter() - start) / 10_000 * 1e6:.1f} us")
+
+    for n_full in (10, 300, 3_000):
+        schedule = DoctorSchedule(-1)
+        for day in [d for d in range(first_day, first_day + 2 * n_full) if date.fromordinal(d).weekday() < 5][:n_full]:
+            for slot in range(schedule.slots_per_day):
+                schedule.book_slot(day, slot)
+        start = time.perf_counter()
+        for _ in range(10_000):
+            schedule.next_free_slot(first_day)
+        print(f"next free slot after {n_full:,} fully booked days: {(time.perf_counter() - start) / 10_000 * 1e6:.1f} us")
+
+    now = datetime.combine(date.today(), datetime.min.time())
+    start = time.perf_counter()
+    for i in range(1_000):
+        scheduler.earliest_free(f"spec{i % n_specializations}", now)
+    print(f"earliest free slot across a specialization ({n_doctors // n_specializations} doctors): "
+          f"{(time.perf_counter() - start):.3f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,247 @@
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+import numpy as np
+
+# --- CONFIGURATION ---
+TOP_K = 20
+MIN_SCORE = 0.5       # share of the query's trigrams a match must contain
+SAVE_EVERY = 10_000   # changes between automatic saves; startup indexes the unsaved tail
+_WORDS = re.compile(r"[^\W\d_]+")
+
+
+def name_trigrams(text: str) -> set:
+    """Trigrams of each word, padded like ``"  ann "`` so word starts weigh more."""
+    grams = set()
+    for word in _WORDS.findall(text.casefold()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def contact_trigrams(text: str) -> set:
+    """Trigrams of the digits only (tagged ``#``), so ``555-0123`` matches ``5550123``."""
+    digits = "".join(ch for ch in text if ch.isdigit())
+    return {"#" + digits[i:i + 3] for i in range(len(digits) - 2)}
+
+
+class TrigramIndex:
+    """Fuzzy lookup of patients by name and contact number.
+
+    Each trigram maps to a sorted ``array('I')`` of the patient IDs that
+    contain it (4 bytes per entry), which grows in place on insert. A query
+    counts, per patient, how many of its trigrams they share with one
+    ``np.bincount`` over zero-copy NumPy views of the posting arrays, so
+    its cost is the length of those lists, not the number of patients.
+    Matches need ``MIN_SCORE`` of the query's trigrams and are ranked by
+    that share, then by how closely their length matches the query's.
+    """
+
+    def __init__(self):
+        self.postings = {}       # trigram -> sorted array('I') of patient IDs
+        self.sizes = array("B")  # patient ID -> number of trigrams (for ranking)
+        self.count = 0
+        self.max_id = 0
+        self.changes = 0         # since the last save
+        # Arrays can't grow while NumPy views of them exist; views live only under this lock
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def trigrams(name: str, contact: str = "") -> set:
+        return name_trigrams(name) | contact_trigrams(contact)
+
+    # --- UPDATES ---
+    def add(self, patient_id: int, name: str, contact: str = ""):
+        grams = self.trigrams(name, contact)
+        with self._lock:
+            self._add(patient_id, grams)
+
+    def _add(self, patient_id: int, grams: set):
+        for gram in grams:
+            ids = self.postings.get(gram)
+            if ids is None:
+                self.postings[gram] = array("I", (patient_id,))
+            elif ids[-1] < patient_id:  # IDs only grow, so this is the usual case
+                ids.append(patient_id)
+            else:
+                insort(ids, patient_id)
+        if len(self.sizes) <= patient_id:
+            self.sizes.extend(bytes(patient_id + 1 - len(self.sizes)))
+        self.sizes[patient_id] = min(len(grams), 255)
+        self.count += 1
+        self.max_id = max(self.max_id, patient_id)
+        self.changes += 1
+
+    def remove(self, patient_id: int, name: str, contact: str = ""):
+        """Drops a patient indexed under this name and contact (call with the old values on edits)."""
+        with self._lock:
+            for gram in self.trigrams(name, contact):
+                ids = self.postings.get(gram)
+                if ids is None:
+                    continue
+                i = bisect_left(ids, patient_id)
+                if i < len(ids) and ids[i] == patient_id:
+                    del ids[i]
+                    if not ids:
+                        del self.postings[gram]
+            self.count -= 1
+            self.changes += 1
+
+    # --- SEARCH ---
+    def search(self, query: str, k: int = TOP_K, min_score: float = MIN_SCORE) -> list:
+        """Up to ``k`` ``(patient_id, score)`` pairs, best first; score is 0-1."""
+        grams = name_trigrams(query) | contact_trigrams(query)
+        if not grams:
+            return []
+        with self._lock:
+            lists = [np.frombuffer(self.postings[gram], dtype=np.uint32) for gram in grams if gram in self.postings]
+            if not lists:
+                return []
+            shared = np.bincount(np.concatenate(lists), minlength=len(self.sizes))
+            del lists
+            ids = np.flatnonzero(shared >= max(1, math.ceil(min_score * len(grams))))
+            sizes = np.frombuffer(self.sizes, dtype=np.uint8)[ids].astype(np.int64)  # a copy
+        if not len(ids):
+            return []
+        hits = shared[ids]
+        closeness = hits / (len(grams) + sizes - hits)  # Jaccard: penalises much longer names
+        order = np.lexsort((ids, -closeness, -hits))[:k]
+        return [(int(ids[i]), round(int(hits[i]) / len(grams), 3)) for i in order]
+
+    # --- PERSISTENCE ---
+    def save(self, path: str):
+        """Writes a JSON header line then every posting array's raw bytes (temp file + rename)."""
+        with self._lock:  # header and bytes from the same moment
+            grams = list(self.postings)
+            header = {"count": self.count, "max_id": self.max_id, "sizes": len(self.sizes),
+                      "trigrams": grams, "lengths": [len(self.postings[g]) for g in grams]}
+            blobs = [self.sizes.tobytes(), *(self.postings[g].tobytes() for g in grams)]
+            self.changes = 0
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            f.writelines(blobs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def maybe_save(self, path: str, every: int = SAVE_EVERY):
+        if self.changes >= every:
+            self.save(path)
+
+    @classmethod
+    def load(cls, path: str) -> "TrigramIndex":
+        index = cls()
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            data = memoryview(f.read())
+        index.count, index.max_id = header["count"], header["max_id"]
+        index.sizes = array("B", data[:header["sizes"]])
+        pos = header["sizes"]
+        width = array("I").itemsize
+        for gram, length in zip(header["trigrams"], header["lengths"]):
+            ids = array("I")
+            ids.frombytes(data[pos:pos + length * width])
+            index.postings[gram] = ids
+            pos += length * width
+        return index
+
+
+def open_patient_index(path: str, patients) -> TrigramIndex:
+    """The saved index brought up to date with ``patients``, or a fresh build.
+
+    Patients added since the last save (IDs above its ``max_id``) are
+    indexed on top of it; if the counts still disagree, it is rebuilt and
+    saved.
+    """
+    patients = list(patients)
+    index = None
+    if os.path.exists(path):
+        try:
+            index = TrigramIndex.load(path)
+        except (ValueError, KeyError):
+            index = None
+    if index is not None:
+        saved_max = index.max_id
+        for p in patients:
+            if p["user_id"] > saved_max:
+                index.add(p["user_id"], p["name"], p.get("contact", ""))
+        if index.count == len(patients):
+            return index
+    index = TrigramIndex()
+    for p in patients:
+        index.add(p["user_id"], p["name"], p.get("contact", ""))
+    index.save(path)
+    return index
+
+
+# --- BENCHMARK ---
+FIRST = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth",
+         "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Priya", "Arjun",
+         "Surendar", "Lakshmi", "Mohammed", "Fatima", "Wei", "Yuki", "Olga", "Carlos", "Ana", "Kwame"]
+SYLLABLES = ["ka", "ran", "su", "mi", "tho", "ven", "la", "ri", "dan", "go", "pel", "sha", "mo", "tan", "vi",
+             "ro", "ne", "bar", "li", "chen", "ya", "ko", "dra", "mal", "zi", "pra", "hu", "sen", "ta", "wor"]
+
+
+def _typo(text: str, rng) -> str:
+    i = rng.randrange(len(text))
+    return text[:i] + rng.choice("aeiou") + text[i + 1:]
+
+
+def benchmark(n_patients: int = 1_000_000, queries: int = 500, path: str = "trigram_bench.idx"):
+    """Build, save, load and query latency over ``n_patients`` synthetic patients."""
+    import resource
+
+    rng = random.Random(24)
+
+    def surname():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randrange(2, 5))).title()
+
+    patients = [(i, f"{rng.choice(FIRST)} {surname()}", f"+91 9{rng.randrange(10**9):09d}")
+                for i in range(1, n_patients + 1)]
+    start = time.perf_counter()
+    index = TrigramIndex()
+    for patient_id, name, contact in patients:
+        index.add(patient_id, name, contact)
+    build = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    entries = sum(map(len, index.postings.values()))
+    print(f"built {n_patients:,} patients in {build:.1f}s: {len(index.postings):,} trigrams, "
+          f"{entries:,} entries ({entries * 4 / 2**20:.0f} MiB), peak RSS {peak:.0f} MiB")
+
+    start = time.perf_counter()
+    index.save(path)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = TrigramIndex.load(path)
+    load = time.perf_counter() - start
+    print(f"save {saved:.2f}s, load {load:.2f}s ({os.path.getsize(path) / 2**20:.0f} MiB) instead of a {build:.0f}s rebuild")
+    os.remove(path)
+
+    samples = [rng.choice(patients) for _ in range(queries)]
+    kinds = {
+        "typo in full name": [_typo(name, rng) for _, name, _ in samples],
+        "partial name": [" ".join(w[:4] for w in name.split()[:2]) for _, name, _ in samples],
+        "last 6 digits": [contact[-6:] for _, _, contact in samples],
+    }
+    for kind, qs in kinds.items():
+        times, found = [], 0
+        for (patient_id, _, _), query in zip(samples, qs):
+            start = time.perf_counter()
+            results = loaded.search(query)
+            times.append(time.perf_counter() - start)
+            found += any(pid == patient_id for pid, _ in results)
+        times.sort()
+        print(f"{kind:>18}: p50 {times[len(times) // 2] * 1000:6.1f} ms, p99 {times[len(times) * 99 // 100] * 1000:6.1f} ms, "
+              f"target in top {TOP_K}: {found * 100 // queries}%")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,28 +1,49 @@
 import streamlit as st
+import threading
+
+# Money helpers: amounts are integer cents
+def to_cents(amount):
+    """Converts a currency amount (as entered) to integer cents."""
+    return round(amount * 100)
+
+def format_cents(cents):
+    """Formats integer cents as a currency string, e.g. 123456 -> '1,234.56'."""
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(cents), 100)
+    return f"{sign}{units:,}.{rest:02d}"
 
 # ATM class with methods
 class ATM:
+    __slots__ = ("balance_cents", "_lock")  # no per-instance __dict__
+
     def __init__(self, initial_balance=1000):
-        self.balance = initial_balance
+        # Money is kept as integer cents so repeated operations never drift
+        self.balance_cents = to_cents(initial_balance)
+        # Guards balance so a check-then-debit cannot interleave with another thread
+        self._lock = threading.Lock()
 
     def check_balance(self):
-        return f"Your current balance is: ${self.balance}"
+        return f"Your current balance is: ${format_cents(self.balance_cents)}"
 
     def deposit(self, amount):
-        if amount > 0:
-            self.balance += amount
-            return f"Deposit successful. New balance is: ${self.balance}"
-        else:
-            return "Invalid deposit amount. Please enter a positive number."
+        amount = to_cents(amount)
+        with self._lock:
+            if amount > 0:
+                self.balance_cents += amount
+                return f"Deposit successful. New balance is: ${format_cents(self.balance_cents)}"
+            else:
+                return "Invalid deposit amount. Please enter a positive number."
 
     def withdraw(self, amount):
-        if amount > 0 and amount <= self.balance:
-            self.balance -= amount
-            return f"Withdrawal successful. New balance is: ${self.balance}"
-        elif amount > self.balance:
-            return "Insufficient funds. Withdrawal denied."
-        else:
-            return "Invalid withdrawal amount. Please enter a positive number."
+        amount = to_cents(amount)
+        with self._lock:
+            if amount > 0 and amount <= self.balance_cents:
+                self.balance_cents -= amount
+                return f"Withdrawal successful. New balance is: ${format_cents(self.balance_cents)}"
+            elif amount > self.balance_cents:
+                return "Insufficient funds. Withdrawal denied."
+            else:
+                return "Invalid withdrawal amount. Please enter a positive number."
 
 # Use Streamlit's session state to store the ATM object
 # This ensures the balance persists across user interactions
@@ -61,4 +82,4 @@ with tab3:
         else:
             st.success(message)
         st.experimental_rerun()
-        
\ No newline at end of file
+        
\ No newline at end of file